@@ -0,0 +1,217 @@
+"""
+Cache semântico de respostas do agente de conhecimento.
+
+Perguntas sobre taxas e produtos se repetem com pequenas variações de
+redação. A pergunta é convertida em embedding (mesmo modelo da base vetorial)
+e comparada com as perguntas já respondidas; acima de
+`SEMANTIC_CACHE_THRESHOLD` de similaridade, a resposta final (já revisada pelo
+Editor) é devolvida sem ferramentas, RAG ou chamadas ao LLM.
+
+Regras:
+    - Usado apenas na rota `knowledge_agent` (nunca para dados de conta do suporte).
+    - Entradas são compartilhadas entre usuários: perguntas de abertura iguais
+      reaproveitam a mesma resposta em qualquer sessão.
+    - Perguntas de continuação ("e no débito?") dependem do contexto: cada
+      entrada guarda o digest do histórico anterior (resumo + mensagens) e só é
+      reutilizada em um turno com o mesmo histórico.
+    - Limitado a `SEMANTIC_CACHE_MAX_ENTRIES` entradas (LRU).
+    - Invalidado automaticamente quando a versão do índice muda (`ingest_data.py`).
+    - Respostas produzidas com falha em ferramentas não são armazenadas.
+    - A execução de teste do warm-up não consulta nem alimenta o cache.
+
+O ciclo de um turno é: `lookup` (knowledge) -> `store` (personality, com a
+resposta final) ou `discard`. A latência do turno original é registrada para
+estimar o tempo economizado em cada acerto.
+"""
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from langchain_core.messages import HumanMessage
+from app.core.config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_PENDING_TTL
+)
+from app.core.metrics import SEMANTIC_CACHE_LOOKUPS, SEMANTIC_CACHE_SAVED_SECONDS, SEMANTIC_CACHE_INVALIDATIONS
+from app.core.vector_store import get_embedding_function, get_index_version
+from app.core.warmup_llm import is_warmup_run
+
+logger = logging.getLogger(__name__)
+
+def _last_question(state: dict) -> HumanMessage:
+    """Última mensagem do usuário (no Editor, a resposta do especialista já está no histórico)."""
+    return next(m for m in reversed(state["messages"]) if isinstance(m, HumanMessage))
+
+def cache_key(state: dict) -> str:
+    """Identifica o turno atual (sessão + mensagem do usuário)."""
+    return f"{state.get('user_id', '')}:{_last_question(state).id}"
+
+def context_digest(state: dict) -> str:
+    """
+    Digest do histórico anterior à pergunta atual ("" em uma pergunta de abertura).
+
+    Args:
+        state (dict): Estado do grafo.
+
+    Returns:
+        str: Hash do resumo e das mensagens que antecedem a última pergunta.
+    """
+    messages = state["messages"]
+    prior = messages[:max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))]
+    summary = state.get("history_summary") or ""
+    if not prior and not summary:
+        return ""
+
+    digest = hashlib.sha256(summary.encode("utf-8"))
+    for message in prior:
+        digest.update(f"\x00{message.type}\x00{message.content}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+class CacheEntry(NamedTuple):
+    question: str
+    answer: str
+    vector: np.ndarray
+    latency: float
+    context: str
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas indexado por similaridade de embeddings.
+
+    Args:
+        embeddings_factory (Callable): Fornece o modelo de embeddings.
+        version_provider (Callable): Retorna a versão atual do índice vetorial.
+        max_entries (int): Quantidade máxima de respostas armazenadas (LRU).
+        threshold (float): Similaridade de cosseno mínima para reutilização.
+        pending_ttl (float): Validade (s) de um turno aguardando `store`.
+    """
+
+    def __init__(self, embeddings_factory: Callable = get_embedding_function,
+                 version_provider: Callable[[], str] = get_index_version,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 pending_ttl: float = SEMANTIC_CACHE_PENDING_TTL):
+        self.embeddings_factory = embeddings_factory
+        self.version_provider = version_provider
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.pending_ttl = pending_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._pending: Dict[str, Tuple[str, np.ndarray, float, str, str]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._matrix_contexts: Optional[np.ndarray] = None
+        self._version: Optional[str] = None
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(self.embeddings_factory().embed_query(text), dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Cache semântico indisponível (embeddings): {e}")
+            return None
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _sync_version(self) -> str:
+        """Descarta todas as respostas se o índice vetorial foi reconstruído."""
+        version = self.version_provider()
+        if self._version is not None and version != self._version and self._entries:
+            logger.info(f"Índice vetorial atualizado; cache semântico invalidado ({len(self._entries)} respostas)")
+            SEMANTIC_CACHE_INVALIDATIONS.inc()
+            self._entries.clear()
+            self._matrix = None
+        self._version = version
+        return version
+
+    def _search(self, vector: np.ndarray, context: str) -> Optional[CacheEntry]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.stack([self._entries[k].vector for k in self._matrix_keys])
+            self._matrix_contexts = np.array([self._entries[k].context for k in self._matrix_keys], dtype=object)
+
+        similarities = np.where(self._matrix_contexts == context, self._matrix @ vector, -np.inf)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        key = self._matrix_keys[best]
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def lookup(self, state: dict) -> Optional[str]:
+        """
+        Procura uma resposta para a pergunta atual.
+
+        Em caso de miss, o turno fica pendente até `store`/`discard`.
+
+        Args:
+            state (dict): Estado do grafo (rota knowledge_agent).
+
+        Returns:
+            Optional[str]: Resposta final reutilizada ou None.
+        """
+        if not SEMANTIC_CACHE_ENABLED or is_warmup_run():
+            return None
+
+        start = time.monotonic()
+        question = _last_question(state).content
+        vector = self._embed(question)
+        if vector is None:
+            return None
+
+        context = context_digest(state)
+        with self._lock:
+            version = self._sync_version()
+            entry = self._search(vector, context)
+            if entry is None:
+                self._expire_pending(start)
+                self._pending[cache_key(state)] = (question, vector, start, version, context)
+
+        SEMANTIC_CACHE_LOOKUPS.labels(result="hit" if entry else "miss").inc()
+        if entry is None:
+            return None
+
+        SEMANTIC_CACHE_SAVED_SECONDS.inc(max(0.0, entry.latency - (time.monotonic() - start)))
+        logger.info(f"Cache semântico: resposta reutilizada | Pergunta original: {entry.question[:40]}")
+        return entry.answer
+
+    def store(self, state: dict, answer: str):
+        """Armazena a resposta final do turno pendente (se o índice não mudou no meio)."""
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.pop(cache_key(state), None)
+            if pending is None or not answer:
+                return
+            question, vector, start, version, context = pending
+            if version != self._version:
+                return
+
+            self._entries[cache_key(state)] = CacheEntry(question, answer, vector, now - start, context)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def discard(self, state: dict):
+        """Descarta o turno pendente (ex.: falha em ferramentas)."""
+        with self._lock:
+            self._pending.pop(cache_key(state), None)
+
+    def _expire_pending(self, now: float):
+        expired = [key for key, (_, _, start, _, _) in self._pending.items() if now - start > self.pending_ttl]
+        for key in expired:
+            del self._pending[key]
+
+    def clear(self):
+        """Remove todas as respostas e turnos pendentes."""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+semantic_cache = SemanticAnswerCache()
@@ -1,7 +1,83 @@
+import asyncio
+import logging
+from typing import List
 from langchain_core.messages import SystemMessage, AIMessage
 from app.core.config import llm
+from app.core.resilience import LLMUnavailableError
+from app.core.speculation import speculative_retriever, speculation_key
+from app.agents.utils.nodes import with_tone, UNSTABLE_PROVIDER_MESSAGE
+from app.agents.utils.history import build_history_context, abuild_history_context, with_summary
+from app.agents.utils.tools import run_tool_calls, arun_tool_calls, fit_tool_outputs, ToolResult
+from app.agents.knowledge.cache import semantic_cache
 from app.agents.knowledge.tools import search_infinitepay_knowledge, web_search
 
+logger = logging.getLogger(__name__)
+
+# Ferramentas disponíveis ao especialista (indexadas pelo nome usado nas Tool Calls)
+TOOLS = {
+    "search_infinitepay_knowledge": search_infinitepay_knowledge,
+    "web_search": web_search
+}
+
+def _build_system_message(summary: str) -> SystemMessage:
+    return SystemMessage(content=with_summary(with_tone(
+        "Você é um Especialista da InfinitePay.\n"
+        "1. Utilize as ferramentas disponíveis para buscar informações precisas.\n"
+        "2. CITAÇÃO OBRIGATÓRIA: Ao final, cite a fonte se a ferramenta fornecer link. Formato: 'Fonte: [url]'\n"
+        "3. Se não houver link disponível, não invente."
+    ), summary))
+
+def _tool_message(result: ToolResult) -> SystemMessage:
+    if result.error is not None:
+        return SystemMessage(content=f"Erro na ferramenta: {result.error}")
+    return SystemMessage(content=f"Dados recuperados: {result.output}")
+
+def _claim_prefetch(state: dict) -> dict:
+    """Recupera a busca RAG antecipada pelo Router (modo especulativo), se houver."""
+    future = speculative_retriever.claim(speculation_key(state))
+    return {"search_infinitepay_knowledge": future} if future else {}
+
+def _settle_prefetch(prefetched: dict, speculated: bool):
+    """Contabiliza a busca antecipada como acerto (consumida) ou desperdício."""
+    if not speculated:
+        return
+    future = prefetched.pop("search_infinitepay_knowledge", None)
+    if future is None:
+        speculative_retriever.record_hit()
+    else:
+        speculative_retriever.record_waste(future, reason="unused")
+
+def _cached_response(state: dict, answer: str) -> dict:
+    """Resposta reutilizada do cache semântico (a busca especulativa, se houver, é descartada)."""
+    speculative_retriever.discard(speculation_key(state), reason="unused")
+    return {
+        "final_response": answer,
+        "messages": [AIMessage(content=answer)],
+        "answer_cached": True
+    }
+
+def _settle_cache(state: dict, results: List[ToolResult]):
+    """Somente respostas baseadas na base oficial e sem falhas de ferramenta são cacheáveis."""
+    cacheable = all(
+        r.name == "search_infinitepay_knowledge" and r.error is None and not str(r.output).startswith("Erro")
+        for r in results
+    )
+    if not cacheable:
+        semantic_cache.discard(state)
+
+def _unavailable_response(state: dict, prefetched: dict, speculated: bool, history_updates: dict,
+                          error: LLMUnavailableError) -> dict:
+    """Provedor do LLM indisponível após o roteamento: resposta de instabilidade, nunca cacheada."""
+    logger.error(f"LLM indisponível no Agente de Conhecimento: {error}")
+    _settle_prefetch(prefetched, speculated)
+    semantic_cache.discard(state)
+    return {
+        "final_response": UNSTABLE_PROVIDER_MESSAGE,
+        "messages": [AIMessage(content=UNSTABLE_PROVIDER_MESSAGE)],
+        "answer_cached": False,
+        **history_updates
+    }
+
 def knowledge_node(state: dict) -> dict:
     """
     Agente especialista em recuperação de informações (RAG + Web).
@@ -13,44 +89,92 @@ def knowledge_node(state: dict) -> dict:
     Returns:
         dict: Atualização de estado com resposta final e mensagens processadas.
     """
-    messages = state["messages"]
-    
+    # Pergunta equivalente já respondida: dispensa ferramentas e LLM
+    cached = semantic_cache.lookup(state)
+    if cached is not None:
+        return _cached_response(state, cached)
+
+    summary, messages, history_updates = build_history_context(state)
+    prefetched = _claim_prefetch(state)
+    speculated = bool(prefetched)
+
     # Vinculação de ferramentas ao LLM
-    tools = [search_infinitepay_knowledge, web_search]
-    llm_with_tools = llm.bind_tools(tools)
-    
-    system_message = SystemMessage(content=(
-        "Você é um Especialista da InfinitePay.\n"
-        "1. Utilize as ferramentas disponíveis para buscar informações precisas.\n"
-        "2. CITAÇÃO OBRIGATÓRIA: Ao final, cite a fonte se a ferramenta fornecer link. Formato: 'Fonte: [url]'\n"
-        "3. Se não houver link disponível, não invente."
-    ))
-    
-    # Execução inicial do modelo
-    response = llm_with_tools.invoke([system_message] + messages)
-    final_content = response.content
-    
-    # Processamento de chamadas de ferramentas (Tool Calls)
-    if response.tool_calls:
-        tool_outputs = []
-        for call in response.tool_calls:
-            tool_func = {
-                "search_infinitepay_knowledge": search_infinitepay_knowledge,
-                "web_search": web_search
-            }.get(call["name"])
-            
-            if tool_func:
-                try:
-                    res = tool_func.invoke(call["args"])
-                    tool_outputs.append(SystemMessage(content=f"Dados recuperados: {res}"))
-                except Exception as e:
-                    tool_outputs.append(SystemMessage(content=f"Erro na ferramenta: {str(e)}"))
-        
-        # Geração da resposta final com base nos dados recuperados
-        final_answer = llm.invoke([system_message] + messages + tool_outputs)
-        final_content = final_answer.content
-    
+    llm_with_tools = llm.bind_tools(list(TOOLS.values()))
+    system_message = _build_system_message(summary)
+
+    try:
+        # Execução inicial do modelo
+        response = llm_with_tools.invoke([system_message] + messages)
+        final_content = response.content
+        results = []
+
+        # Processamento de chamadas de ferramentas (Tool Calls)
+        if response.tool_calls:
+            # Chamadas independentes executadas em paralelo (ordem preservada)
+            # Busca antecipada (se houver) substitui a chamada ao RAG
+            results = run_tool_calls(response.tool_calls, TOOLS, prefetched=prefetched)
+            tool_outputs = [_tool_message(result) for result in fit_tool_outputs(results)]
+
+            # Geração da resposta final com base nos dados recuperados
+            final_answer = llm.invoke([system_message] + messages + tool_outputs)
+            final_content = final_answer.content
+
+    except LLMUnavailableError as e:
+        return _unavailable_response(state, prefetched, speculated, history_updates, e)
+
+    _settle_prefetch(prefetched, speculated)
+    _settle_cache(state, results)
+    return {
+        "final_response": final_content,
+        "messages": [AIMessage(content=final_content)],
+        "answer_cached": False,
+        **history_updates
+    }
+
+async def aknowledge_node(state: dict) -> dict:
+    """
+    Versão assíncrona do especialista de conhecimento.
+
+    As chamadas ao LLM usam `ainvoke`; as ferramentas de busca (Chroma e
+    DuckDuckGo) são bloqueantes e, via `ainvoke`, executam no thread pool.
+
+    Args:
+        state (dict): Estado atual do grafo contendo histórico de mensagens.
+
+    Returns:
+        dict: Atualização de estado com resposta final e mensagens processadas.
+    """
+    cached = await asyncio.to_thread(semantic_cache.lookup, state)
+    if cached is not None:
+        return _cached_response(state, cached)
+
+    summary, messages, history_updates = await abuild_history_context(state)
+    prefetched = _claim_prefetch(state)
+    speculated = bool(prefetched)
+
+    llm_with_tools = llm.bind_tools(list(TOOLS.values()))
+    system_message = _build_system_message(summary)
+
+    try:
+        response = await llm_with_tools.ainvoke([system_message] + messages)
+        final_content = response.content
+        results = []
+
+        if response.tool_calls:
+            results = await arun_tool_calls(response.tool_calls, TOOLS, prefetched=prefetched)
+            tool_outputs = [_tool_message(result) for result in fit_tool_outputs(results)]
+
+            final_answer = await llm.ainvoke([system_message] + messages + tool_outputs)
+            final_content = final_answer.content
+
+    except LLMUnavailableError as e:
+        return _unavailable_response(state, prefetched, speculated, history_updates, e)
+
+    _settle_prefetch(prefetched, speculated)
+    _settle_cache(state, results)
     return {
         "final_response": final_content,
-        "messages": [AIMessage(content=final_content)]
-    }
\ No newline at end of file
+        "messages": [AIMessage(content=final_content)],
+        "answer_cached": False,
+        **history_updates
+    }
@@ -0,0 +1,74 @@
+"""
+Cache de decisões do Router para mensagens repetidas.
+
+Boa parte do tráfego repete as mesmas frases ("qual meu saldo", "quais as
+taxas da maquininha"). A decisão de rota é armazenada por forma normalizada da
+mensagem (caixa, espaços, pontuação e acentos), com limite de tamanho (LRU) e
+expiração (TTL). É consultado após o guardrail e antes da classificação.
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.core.config import ROUTE_CACHE_MAX_ENTRIES, ROUTE_CACHE_TTL
+from app.core.metrics import ROUTE_CACHE_LOOKUPS
+from app.core.text import normalize_key
+
+class RouteCache:
+    """
+    Cache LRU + TTL de rotas, seguro para acesso concorrente.
+
+    Args:
+        max_entries (int): Quantidade máxima de mensagens armazenadas.
+        ttl (float): Validade (s) de cada decisão.
+    """
+
+    def __init__(self, max_entries: int = ROUTE_CACHE_MAX_ENTRIES, ttl: float = ROUTE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Optional[str]:
+        """
+        Retorna a rota armazenada para a mensagem, se válida.
+
+        Args:
+            text (str): Mensagem do usuário.
+
+        Returns:
+            Optional[str]: Rota em cache ou None.
+        """
+        key = normalize_key(text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        ROUTE_CACHE_LOOKUPS.labels(result="hit" if entry else "miss").inc()
+        return entry[0] if entry else None
+
+    def put(self, text: str, route: str):
+        """Armazena a rota decidida para a mensagem, removendo a entrada menos recente se cheio."""
+        key = normalize_key(text)
+        if not key or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (route, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove todas as decisões armazenadas."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+route_cache = RouteCache()
@@ -0,0 +1,130 @@
+"""
+Camada de segurança do Router: bloqueio por padrões (keywords).
+
+Os padrões vêm de um arquivo externo (`guardrail_rules.txt`, um por linha,
+`#` para comentários) e são compilados em uma única expressão regular no
+formato de trie (prefixos compartilhados), sobre texto normalizado sem
+acentos. A varredura percorre a mensagem uma única vez, com custo por posição
+limitado ao comprimento do maior padrão, e não ao número de padrões.
+
+O arquivo é recarregado automaticamente quando sua data de modificação muda
+(verificada no máximo a cada `GUARDRAIL_RELOAD_INTERVAL` segundos), sem
+necessidade de deploy. Em caso de erro na recarga, as regras anteriores são
+mantidas.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+from app.core.config import GUARDRAIL_RULES_PATH, GUARDRAIL_RELOAD_INTERVAL
+from app.core.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+def load_rules(path: str) -> List[str]:
+    """
+    Lê o arquivo de regras, normalizando cada padrão.
+
+    Args:
+        path (str): Caminho do arquivo de regras.
+
+    Returns:
+        List[str]: Padrões normalizados, sem duplicatas.
+    """
+    patterns = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            pattern = normalize_text(line.split("#", 1)[0])
+            if pattern:
+                patterns.append(pattern)
+    return sorted(set(patterns))
+
+def _trie_pattern(node: Dict) -> str:
+    # Um padrão completo já basta para o bloqueio: extensões são redundantes
+    if "" in node:
+        return ""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items())]
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+def compile_patterns(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """
+    Compila os padrões em uma única regex estruturada como trie.
+
+    Args:
+        patterns (Iterable[str]): Padrões já normalizados.
+
+    Returns:
+        Optional[re.Pattern]: Expressão compilada ou None se não houver padrões.
+    """
+    trie: Dict = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    if not trie:
+        return None
+    return re.compile(_trie_pattern(trie))
+
+class GuardrailMatcher:
+    """
+    Matcher de padrões bloqueados com recarga a quente do arquivo de regras.
+
+    Args:
+        rules_path (str): Arquivo de regras.
+        reload_interval (float): Intervalo mínimo (s) entre verificações de alteração.
+    """
+
+    def __init__(self, rules_path: str = GUARDRAIL_RULES_PATH, reload_interval: float = GUARDRAIL_RELOAD_INTERVAL):
+        self.rules_path = rules_path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._regex: Optional[re.Pattern] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = float("-inf")
+        self.pattern_count = 0
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+
+            try:
+                mtime = os.path.getmtime(self.rules_path)
+                if mtime == self._mtime:
+                    return
+                patterns = load_rules(self.rules_path)
+                self._regex = compile_patterns(patterns)
+                self._mtime = mtime
+                self.pattern_count = len(patterns)
+                logger.info(f"Regras de guardrail carregadas | Padrões: {len(patterns)}")
+            except Exception as e:
+                logger.error(f"Falha ao carregar regras de guardrail ({self.rules_path}); mantendo as anteriores: {e}")
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Procura o primeiro padrão bloqueado presente na mensagem.
+
+        Args:
+            text (str): Mensagem do usuário (texto bruto).
+
+        Returns:
+            Optional[str]: Padrão encontrado (normalizado) ou None.
+        """
+        self._maybe_reload()
+        regex = self._regex
+        if regex is None:
+            return None
+
+        match = regex.search(normalize_text(text))
+        return match.group(0) if match else None
+
+guardrail_matcher = GuardrailMatcher()
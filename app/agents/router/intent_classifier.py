@@ -0,0 +1,207 @@
+"""
+Classificador de intenção local (fast path do Router).
+
+Usa o mesmo modelo de embeddings da base vetorial (`all-MiniLM-L6-v2`) e um
+arquivo de exemplos rotulados (`intents.json`). A mensagem é comparada por
+similaridade de cosseno com os exemplos de cada rota (vizinho mais próximo);
+a rota só é decidida localmente quando a similaridade supera
+`INTENT_CONFIDENCE_THRESHOLD` e a vantagem sobre a segunda rota supera
+`INTENT_MARGIN`. Mensagens ambíguas seguem para o LLM.
+
+Os exemplos de `guardrail` e `fallback` são negativos: nunca decidem a rota
+localmente (segurança e mensagens fora de contexto ficam com as regras do
+guardrail e com o LLM), mas "atraem" mensagens parecidas, evitando que caiam
+com alta confiança em uma rota de atendimento. Fora dos exemplos cadastrados,
+a proteção contra encaminhamentos errados depende apenas do limiar e da margem.
+
+A concordância com o LLM é medida de graça nos casos ambíguos e, nos acertos
+do fast path, por amostragem em segundo plano (`INTENT_SHADOW_SAMPLE_RATE`).
+"""
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from app.core.config import (
+    INTENT_EXEMPLARS_PATH, INTENT_CONFIDENCE_THRESHOLD, INTENT_MARGIN, INTENT_SHADOW_SAMPLE_RATE
+)
+from app.core.metrics import INTENT_FAST_PATH, INTENT_AGREEMENT
+from app.core.vector_store import get_embedding_function
+from app.core.warmup_llm import is_warmup_run
+
+logger = logging.getLogger(__name__)
+
+# Rotas cujos exemplos apenas desviam mensagens para o LLM (exemplos negativos)
+DEFERRED_ROUTES = ("guardrail", "fallback")
+
+class IntentPrediction(NamedTuple):
+    """
+    Resultado da classificação local.
+
+    Attributes:
+        route (str): Rota mais provável.
+        confidence (float): Similaridade com o exemplo mais próximo da rota.
+        margin (float): Diferença para a segunda rota mais provável.
+        confident (bool): Indica se a decisão pode dispensar o LLM.
+    """
+    route: str
+    confidence: float
+    margin: float
+    confident: bool
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+class IntentClassifier:
+    """
+    Classificador por vizinho mais próximo sobre exemplos rotulados.
+
+    O treinamento (embedding dos exemplos) é preguiçoso e ocorre no warm-up ou
+    na primeira mensagem. Se o modelo de embeddings estiver indisponível (ex.:
+    ainda não baixado), o Router usa apenas o LLM e o treinamento é tentado
+    novamente após `retry_backoff` segundos, dobrando a espera a cada falha
+    (até 10 minutos).
+
+    Args:
+        exemplars_path (str): Arquivo JSON no formato {rota: [exemplos]}.
+        embeddings_factory (Callable): Fornece o modelo de embeddings.
+        threshold (float): Similaridade mínima para decisão local.
+        margin (float): Vantagem mínima sobre a segunda rota.
+        deferred_routes (tuple): Rotas de exemplos negativos (nunca decididas localmente).
+        retry_backoff (float): Espera (s) antes de nova tentativa de treinamento.
+    """
+    MAX_RETRY_BACKOFF = 600.0
+
+    def __init__(self, exemplars_path: str = INTENT_EXEMPLARS_PATH,
+                 embeddings_factory: Callable = get_embedding_function,
+                 threshold: float = INTENT_CONFIDENCE_THRESHOLD, margin: float = INTENT_MARGIN,
+                 deferred_routes: tuple = DEFERRED_ROUTES, retry_backoff: float = 30.0):
+        self.exemplars_path = exemplars_path
+        self.embeddings_factory = embeddings_factory
+        self.threshold = threshold
+        self.margin = margin
+        self.deferred_routes = deferred_routes
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        self._fitted = False
+        self._available = False
+        self._failures = 0
+        self._retry_at = 0.0
+        self._routes: List[str] = []
+        self._labels: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+
+    def fit(self) -> bool:
+        """
+        Carrega os exemplos e calcula seus embeddings (uma vez, após o primeiro sucesso).
+
+        Returns:
+            bool: True se o classificador está disponível.
+        """
+        if self._fitted:
+            return self._available
+        if time.monotonic() < self._retry_at:
+            return False
+
+        with self._lock:
+            if self._fitted:
+                return self._available
+            if time.monotonic() < self._retry_at:
+                return False
+
+            try:
+                with open(self.exemplars_path, encoding="utf-8") as f:
+                    exemplars: Dict[str, List[str]] = json.load(f)
+
+                texts, labels = [], []
+                self._routes = sorted(exemplars)
+                for index, route in enumerate(self._routes):
+                    texts.extend(exemplars[route])
+                    labels.extend([index] * len(exemplars[route]))
+
+                vectors = self.embeddings_factory().embed_documents(texts)
+                self._matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+                self._labels = np.asarray(labels)
+                self._available = len(self._routes) >= 2
+                self._fitted = True
+                logger.info(f"Classificador de intenção treinado | Rotas: {len(self._routes)} | Exemplos: {len(texts)}")
+            except Exception as e:
+                delay = min(self.MAX_RETRY_BACKOFF, self.retry_backoff * 2 ** self._failures)
+                self._failures += 1
+                self._retry_at = time.monotonic() + delay
+                logger.error(f"Classificador de intenção indisponível, usando apenas o LLM (nova tentativa em {delay:.0f}s): {e}")
+                self._available = False
+
+            return self._available
+
+    def predict(self, text: str) -> Optional[IntentPrediction]:
+        """
+        Classifica a mensagem localmente.
+
+        Args:
+            text (str): Mensagem do usuário.
+
+        Returns:
+            Optional[IntentPrediction]: Predição ou None se o classificador estiver indisponível.
+        """
+        if not self.fit():
+            return None
+
+        query = _normalize(np.asarray(self.embeddings_factory().embed_query(text), dtype=np.float32))
+        similarities = self._matrix @ query
+
+        # Similaridade do vizinho mais próximo em cada rota
+        scores = np.full(len(self._routes), -1.0, dtype=np.float32)
+        np.maximum.at(scores, self._labels, similarities)
+
+        ranking = np.argsort(scores)[::-1]
+        best, second = float(scores[ranking[0]]), float(scores[ranking[1]])
+        margin = best - second
+        route = self._routes[ranking[0]]
+        return IntentPrediction(
+            route=route,
+            confidence=best,
+            margin=margin,
+            confident=best >= self.threshold and margin >= self.margin and route not in self.deferred_routes
+        )
+
+intent_classifier = IntentClassifier()
+
+# Verificações de concordância (shadow) fora do caminho crítico da requisição
+_shadow_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="intent-shadow")
+
+def record_agreement(prediction: IntentPrediction, llm_route: Optional[str]):
+    """Registra se a rota do LLM coincide com a predição local."""
+    if llm_route is None:
+        return
+    confidence = "high" if prediction.confident else "low"
+    result = "agree" if llm_route == prediction.route else "disagree"
+    INTENT_AGREEMENT.labels(confidence=confidence, result=result).inc()
+
+def schedule_shadow_check(prediction: IntentPrediction, classify: Callable[[], Optional[str]]):
+    """
+    Amostra acertos do fast path para comparação com o LLM em segundo plano.
+
+    Args:
+        prediction (IntentPrediction): Decisão tomada localmente.
+        classify (Callable): Classificação via LLM (síncrona) da mesma mensagem.
+    """
+    # O executor não herda o contexto: no warm-up, a verificação iria ao provedor
+    if INTENT_SHADOW_SAMPLE_RATE <= 0 or is_warmup_run() or random.random() >= INTENT_SHADOW_SAMPLE_RATE:
+        return
+
+    def run():
+        try:
+            record_agreement(prediction, classify())
+        except Exception as e:
+            logger.warning(f"Falha na verificação shadow do classificador: {e}")
+
+    _shadow_executor.submit(run)
+
+def record_fast_path(outcome: str):
+    """Contabiliza o desfecho do fast path (hit, ambiguous, unavailable)."""
+    INTENT_FAST_PATH.labels(outcome=outcome).inc()
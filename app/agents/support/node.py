@@ -1,10 +1,41 @@
 import logging
 from langchain_core.messages import SystemMessage, AIMessage
 from app.core.config import llm
+from app.agents.utils.nodes import with_tone
+from app.agents.utils.history import build_history_context, abuild_history_context, with_summary
+from app.agents.utils.tools import run_tool_calls, arun_tool_calls, fit_tool_outputs, ToolResult
 from app.agents.support.tools import get_user_profile, check_transfer_status
 
 logger = logging.getLogger(__name__)
 
+# Ferramentas disponíveis ao especialista (indexadas pelo nome usado nas Tool Calls)
+TOOLS = {
+    "get_user_profile": get_user_profile,
+    "check_transfer_status": check_transfer_status
+}
+
+FALLBACK_MESSAGE = "Desculpe, o sistema de suporte está temporariamente indisponível."
+
+def _build_system_message(user_id: str, summary: str) -> SystemMessage:
+    return SystemMessage(content=with_summary(with_tone(
+        f"Você é um Assistente Técnico. Cliente ID: {user_id}.\n"
+        "Objetivo: Resolver problemas de conta e fornecer dados cadastrais.\n"
+        "DIRETRIZES:\n"
+        "1. Para saldo/dados -> USE 'get_user_profile'.\n"
+        "2. Para erro/falha/bloqueio -> USE 'check_transfer_status'.\n"
+        "3. NÃO alucine dados."
+    ), summary))
+
+def _tool_args(call: dict, user_id: str) -> dict:
+    args = call["args"]
+    if "user_id" not in args: args["user_id"] = user_id # Injeção de dependência (ID)
+    return args
+
+def _tool_message(result: ToolResult) -> SystemMessage:
+    if result.error is not None:
+        return SystemMessage(content=f"Erro na Ferramenta: {result.error}")
+    return SystemMessage(content=f"Sistema: {result.output}")
+
 def support_node(state: dict) -> dict:
     """
     Agente de Suporte Técnico.
@@ -17,53 +48,76 @@ def support_node(state: dict) -> dict:
         dict: Resposta processada e atualização de estado.
     """
     user_id = state["user_id"]
-    messages = state["messages"]
-    
-    tools = [get_user_profile, check_transfer_status]
-    llm_with_tools = llm.bind_tools(tools)
-    
-    system_message = SystemMessage(content=(
-        f"Você é um Assistente Técnico. Cliente ID: {user_id}.\n"
-        "Objetivo: Resolver problemas de conta e fornecer dados cadastrais.\n"
-        "DIRETRIZES:\n"
-        "1. Para saldo/dados -> USE 'get_user_profile'.\n"
-        "2. Para erro/falha/bloqueio -> USE 'check_transfer_status'.\n"
-        "3. NÃO alucine dados."
-    ))
-    
+    summary, messages, history_updates = build_history_context(state)
+
+    llm_with_tools = llm.bind_tools(list(TOOLS.values()))
+    system_message = _build_system_message(user_id, summary)
+
     final_content = "Erro ao processar solicitação de suporte."
-    
+
     try:
         response = llm_with_tools.invoke([system_message] + messages)
         final_content = response.content
 
         if response.tool_calls:
-            tool_outputs = []
-            for call in response.tool_calls:
-                args = call["args"]
-                if "user_id" not in args: args["user_id"] = user_id # Injeção de dependência (ID)
-                
-                tool_func = {
-                    "get_user_profile": get_user_profile,
-                    "check_transfer_status": check_transfer_status
-                }.get(call["name"])
-                
-                if tool_func:
-                    try:
-                        res = tool_func.invoke(args)
-                        tool_outputs.append(SystemMessage(content=f"Sistema: {res}"))
-                    except Exception as e:
-                        tool_outputs.append(SystemMessage(content=f"Erro na Ferramenta: {e}"))
-            
+            # Chamadas independentes executadas em paralelo (ordem preservada)
+            results = run_tool_calls(response.tool_calls, TOOLS, prepare_args=lambda call: _tool_args(call, user_id))
+            tool_outputs = [_tool_message(result) for result in fit_tool_outputs(results)]
+
             # Segunda passada no LLM com os dados da ferramenta
             final_answer = llm.invoke([system_message] + messages + tool_outputs)
             final_content = final_answer.content
 
     except Exception as e:
         logger.error(f"Erro crítico no Agente de Suporte: {e}")
-        final_content = "Desculpe, o sistema de suporte está temporariamente indisponível."
-    
+        final_content = FALLBACK_MESSAGE
+
+    return {
+        "final_response": final_content,
+        "messages": [AIMessage(content=final_content)],
+        **history_updates
+    }
+
+async def asupport_node(state: dict) -> dict:
+    """
+    Versão assíncrona do Agente de Suporte (`ainvoke` nas chamadas ao LLM).
+
+    As ferramentas consultam a base em memória (MOCK_DB) e são executadas
+    diretamente no event loop, evitando o salto para o thread pool.
+
+    Args:
+        state (dict): Estado atual contendo user_id e mensagens.
+
+    Returns:
+        dict: Resposta processada e atualização de estado.
+    """
+    user_id = state["user_id"]
+    summary, messages, history_updates = await abuild_history_context(state)
+
+    llm_with_tools = llm.bind_tools(list(TOOLS.values()))
+    system_message = _build_system_message(user_id, summary)
+
+    final_content = "Erro ao processar solicitação de suporte."
+
+    try:
+        response = await llm_with_tools.ainvoke([system_message] + messages)
+        final_content = response.content
+
+        if response.tool_calls:
+            results = await arun_tool_calls(
+                response.tool_calls, TOOLS, prepare_args=lambda call: _tool_args(call, user_id), blocking=False
+            )
+            tool_outputs = [_tool_message(result) for result in fit_tool_outputs(results)]
+
+            final_answer = await llm.ainvoke([system_message] + messages + tool_outputs)
+            final_content = final_answer.content
+
+    except Exception as e:
+        logger.error(f"Erro crítico no Agente de Suporte: {e}")
+        final_content = FALLBACK_MESSAGE
+
     return {
         "final_response": final_content,
-        "messages": [AIMessage(content=final_content)]
-    }
\ No newline at end of file
+        "messages": [AIMessage(content=final_content)],
+        **history_updates
+    }
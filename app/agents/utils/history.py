@@ -0,0 +1,134 @@
+"""
+Gerenciamento de histórico para os prompts dos agentes especialistas.
+
+Mantém os turnos mais recentes na íntegra (janela limitada por tokens) e
+consolida os turnos antigos em um resumo incremental persistido no estado
+(`history_summary`). O resumo só é atualizado quando o excedente acumulado
+fora da janela ultrapassa o gatilho configurado, de modo que o custo por
+turno permanece estável em sessões longas.
+"""
+import logging
+from typing import List, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from app.core.config import llm, HISTORY_WINDOW_TOKENS, HISTORY_SUMMARY_TRIGGER_TOKENS, TOKEN_BUDGET_HISTORY_SHARE
+from app.core.tokens import count_message_tokens
+from app.core.token_budget import token_allowance, record_degradation
+
+logger = logging.getLogger(__name__)
+
+# Tag das chamadas de resumo (permite ignorá-las no streaming de tokens)
+SUMMARY_TAG = "history_summary"
+
+SUMMARY_PROMPT = (
+    "Você mantém o resumo de um atendimento da InfinitePay.\n"
+    "Atualize o RESUMO ATUAL incorporando os NOVOS TRECHOS da conversa.\n"
+    "Preserve fatos relevantes (dados do cliente, problemas relatados, respostas e fontes citadas).\n"
+    "Seja conciso: no máximo 8 frases. Responda apenas com o resumo atualizado."
+)
+
+def _pending_messages(messages: List[BaseMessage], summarized_until: str) -> List[BaseMessage]:
+    """Retorna as mensagens ainda não incorporadas ao resumo."""
+    if summarized_until:
+        for index, message in enumerate(messages):
+            if message.id == summarized_until:
+                return messages[index + 1:]
+    return messages
+
+def _split_window(messages: List[BaseMessage], window_tokens: int) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+    """
+    Separa as mensagens em excedente e janela recente (limitada por tokens).
+
+    A mensagem mais recente (pergunta atual) é sempre incluída na janela.
+    """
+    total, start = 0, len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        cost = count_message_tokens([messages[index]])
+        if total + cost > window_tokens and start < len(messages):
+            break
+        total += cost
+        start = index
+    return messages[:start], messages[start:]
+
+def _summary_messages(previous_summary: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Monta o prompt que incorpora novos trechos ao resumo existente."""
+    transcript = "\n".join(
+        f"{'Cliente' if isinstance(m, HumanMessage) else 'Assistente'}: {m.content}"
+        for m in messages
+    )
+    return [
+        SystemMessage(content=SUMMARY_PROMPT),
+        HumanMessage(content=f"RESUMO ATUAL:\n{previous_summary or '(vazio)'}\n\nNOVOS TRECHOS:\n{transcript}")
+    ]
+
+def _summarize(previous_summary: str, messages: List[BaseMessage]) -> str:
+    """Incorpora novos trechos ao resumo existente com uma chamada ao LLM."""
+    response = llm.invoke(_summary_messages(previous_summary, messages), config={"tags": [SUMMARY_TAG]})
+    return response.content.strip()
+
+async def _asummarize(previous_summary: str, messages: List[BaseMessage]) -> str:
+    """Versão assíncrona de `_summarize`."""
+    response = await llm.ainvoke(_summary_messages(previous_summary, messages), config={"tags": [SUMMARY_TAG]})
+    return response.content.strip()
+
+def _plan_history(state: dict) -> Tuple[str, List[BaseMessage], List[BaseMessage], bool]:
+    """Separa excedente e janela recente, indicando se o resumo deve ser atualizado."""
+    summary = state.get("history_summary", "")
+    pending = _pending_messages(state["messages"], state.get("summarized_until", ""))
+
+    # Orçamento de tokens apertado: janela menor e excedente fora do prompt, sem gastar com
+    # o resumo (as mensagens seguem pendentes e são resumidas em um turno futuro)
+    window_tokens = token_allowance(HISTORY_WINDOW_TOKENS, TOKEN_BUDGET_HISTORY_SHARE, floor=0)
+    overflow, window = _split_window(pending, window_tokens)
+    if window_tokens < HISTORY_WINDOW_TOKENS and overflow:
+        record_degradation("trim_history")
+        return summary, [], window, False
+
+    # Excedente pequeno segue na íntegra; o resumo só é refeito ao atingir o gatilho
+    should_summarize = bool(overflow) and count_message_tokens(overflow) >= HISTORY_SUMMARY_TRIGGER_TOKENS
+    return summary, overflow, window, should_summarize
+
+def _apply_summary(new_summary: str, overflow: List[BaseMessage], window: List[BaseMessage]) -> Tuple[str, List[BaseMessage], dict]:
+    logger.info(f"Resumo do histórico atualizado | Mensagens consolidadas: {len(overflow)}")
+    return new_summary, window, {"history_summary": new_summary, "summarized_until": overflow[-1].id}
+
+def build_history_context(state: dict) -> Tuple[str, List[BaseMessage], dict]:
+    """
+    Monta o histórico enviado ao especialista (resumo + janela recente).
+
+    Args:
+        state (dict): Estado atual do grafo.
+
+    Returns:
+        tuple: (resumo, mensagens para o prompt, atualizações de estado).
+    """
+    summary, overflow, window, should_summarize = _plan_history(state)
+    if not should_summarize:
+        return summary, overflow + window, {}
+
+    try:
+        new_summary = _summarize(summary, overflow)
+    except Exception as e:
+        logger.error(f"Falha ao atualizar resumo do histórico: {e}")
+        return summary, overflow + window, {}
+
+    return _apply_summary(new_summary, overflow, window)
+
+async def abuild_history_context(state: dict) -> Tuple[str, List[BaseMessage], dict]:
+    """Versão assíncrona de `build_history_context`."""
+    summary, overflow, window, should_summarize = _plan_history(state)
+    if not should_summarize:
+        return summary, overflow + window, {}
+
+    try:
+        new_summary = await _asummarize(summary, overflow)
+    except Exception as e:
+        logger.error(f"Falha ao atualizar resumo do histórico: {e}")
+        return summary, overflow + window, {}
+
+    return _apply_summary(new_summary, overflow, window)
+
+def with_summary(prompt: str, summary: str) -> str:
+    """Anexa o resumo da conversa anterior ao prompt de sistema, se houver."""
+    if not summary:
+        return prompt
+    return f"{prompt}\n\nRESUMO DA CONVERSA ANTERIOR:\n{summary}"
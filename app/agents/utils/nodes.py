@@ -1,21 +1,45 @@
 import random
 import logging
 from langchain_core.messages import RemoveMessage, AIMessage
-from app.core.config import llm
+from app.core.config import llm, llm_circuit, PERSONALITY_MODE
+from app.core.tokens import count_tokens
+from app.core.token_budget import can_afford
+from app.agents.knowledge.cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 
+# Resposta quando o provedor do LLM está indisponível (circuito aberto, prazo excedido)
+UNSTABLE_PROVIDER_MESSAGE = "⚠️ Nosso assistente está instável no momento. Tente novamente em instantes."
+
+# Regras de tom de voz aplicadas pelo próprio especialista no modo single_pass
+TONE_RULES = (
+    "REGRAS DE ESTILO DA RESPOSTA FINAL:\n"
+    "- TOM: Profissional, direto e amigável. Use emojis com moderação (⚡, 🚀, 👨‍💼).\n"
+    "- Se os dados utilizados tiverem link, termine com 'Fonte: [url]'. Se NÃO houver link, JAMAIS INVENTE.\n"
+    "- Escreva a resposta diretamente para o cliente, sem aspas ou comentários sobre o texto."
+)
+
+def with_tone(prompt: str) -> str:
+    """Incorpora as regras de tom ao prompt do especialista (somente no modo single_pass)."""
+    if PERSONALITY_MODE != "single_pass":
+        return prompt
+    return f"{prompt}\n\n{TONE_RULES}"
+
 def fallback_node(state: dict) -> dict:
     """
-    Nó de Fallback. Acionado quando a intenção do usuário não é compreendida.
+    Nó de Fallback. Acionado quando a intenção do usuário não é compreendida
+    ou quando o provedor do LLM está indisponível (circuito aberto).
     Remove a mensagem confusa do histórico para manter o contexto limpo.
     """
     messages = state["messages"]
-    options = [
-        "Desculpe, sou especialista apenas em InfinitePay e finanças.",
-        "Não entendi. Poderia reformular focando em nossos serviços?",
-        "Esse assunto foge do meu conhecimento técnico atual."
-    ]
+    if llm_circuit.is_open():
+        options = [UNSTABLE_PROVIDER_MESSAGE]
+    else:
+        options = [
+            "Desculpe, sou especialista apenas em InfinitePay e finanças.",
+            "Não entendi. Poderia reformular focando em nossos serviços?",
+            "Esse assunto foge do meu conhecimento técnico atual."
+        ]
     
     # Remove input do usuário do histórico (Efêmero)
     delete_op = RemoveMessage(id=messages[-1].id)
@@ -48,27 +72,35 @@ def human_handoff_node(state: dict) -> dict:
         "messages": [AIMessage(content="[Sistema] Transferindo para atendimento humano...")]
     }
 
-def personality_node(state: dict) -> dict:
+def _personality_prompt(state: dict):
     """
-    Agente de Personalidade (Editor).
-    Refina a resposta final para adequação ao tom de voz da marca (Tone of Voice).
-    
-    Aplica filtros para não processar mensagens de erro ou segurança.
+    Monta o prompt do Editor ou indica que a resposta deve seguir sem reescrita.
+
+    Returns:
+        tuple: (prompt ou None, resposta original).
     """
     original_response = state.get("final_response", "")
     origin_agent = state.get("next_agent", "")
     
-    if not original_response: return {"final_response": "Erro interno de resposta."}
+    if not original_response: return None, "Erro interno de resposta."
     
     # Agentes que NÃO devem ter resposta reescrita (Segurança/Erro)
     ignored_agents = ["guardrail", "fallback"]
     
     if origin_agent in ignored_agents:
-        return {"final_response": original_response}
+        return None, original_response
+
+    # Resposta do cache semântico já foi revisada quando armazenada
+    if origin_agent == "knowledge_agent" and state.get("answer_cached"):
+        return None, original_response
 
     # Evita gastar tokens com respostas muito curtas
     if len(original_response) < 5: 
-        return {"final_response": original_response}
+        return None, original_response
+
+    # Single-pass: tom já aplicado pelo especialista; apenas pós-processamento determinístico
+    if PERSONALITY_MODE == "single_pass":
+        return None, _sanitize_personality(original_response)
 
     system_prompt = (
         "Você é o Editor de Texto da InfinitePay. Refine a resposta abaixo.\n"
@@ -78,17 +110,72 @@ def personality_node(state: dict) -> dict:
         "3. TOM: Profissional, direto e amigável. Use emojis com moderação (⚡, 🚀, 👨‍💼).\n"
         f"TEXTO ORIGINAL:\n{original_response}"
     )
+
+    # Saldo do orçamento insuficiente para a reescrita (prompt + resposta de tamanho similar):
+    # aplica apenas a sanitização e não armazena a resposta no cache semântico
+    if not can_afford(count_tokens(system_prompt) + count_tokens(original_response), "skip_personality"):
+        semantic_cache.discard(state)
+        return None, _sanitize_personality(original_response)
+    return system_prompt, original_response
+
+def _sanitize_personality(content: str) -> str:
+    cleaned = content.strip().replace('"', '')
+    
+    # Sanitização Anti-Alucinação de Fontes
+    if "Fonte:" in cleaned and "http" not in cleaned:
+        cleaned = cleaned.split("Fonte:")[0].strip()
+    return cleaned
+
+def _remember_answer(state: dict, final_response: str) -> dict:
+    """Armazena a resposta final do agente de conhecimento no cache semântico."""
+    if state.get("next_agent") == "knowledge_agent" and not state.get("answer_cached"):
+        semantic_cache.store(state, final_response)
+    return {"final_response": final_response}
+
+def personality_node(state: dict) -> dict:
+    """
+    Agente de Personalidade (Editor).
+    Refina a resposta final para adequação ao tom de voz da marca (Tone of Voice).
+    
+    Aplica filtros para não processar mensagens de erro ou segurança. No modo
+    `PERSONALITY_MODE=single_pass` não há chamada ao LLM: a resposta do
+    especialista passa apenas pela sanitização (aspas e fontes).
+    """
+    system_prompt, original_response = _personality_prompt(state)
+    if system_prompt is None:
+        return _remember_answer(state, original_response)
     
     try:
         response = llm.invoke(system_prompt)
-        cleaned = response.content.strip().replace('"', '')
-        
-        # Sanitização Anti-Alucinação de Fontes
-        if "Fonte:" in cleaned and "http" not in cleaned:
-            cleaned = cleaned.split("Fonte:")[0].strip()
-            
-        return {"final_response": cleaned}
+        return _remember_answer(state, _sanitize_personality(response.content))
         
     except Exception as e:
         logger.error(f"Erro no Agente de Personalidade: {e}")
-        return {"final_response": original_response}
\ No newline at end of file
+        semantic_cache.discard(state)
+        return {"final_response": original_response}
+
+async def apersonality_node(state: dict) -> dict:
+    """Versão assíncrona do Agente de Personalidade (`llm.ainvoke`)."""
+    system_prompt, original_response = _personality_prompt(state)
+    if system_prompt is None:
+        return _remember_answer(state, original_response)
+
+    try:
+        response = await llm.ainvoke(system_prompt)
+        return _remember_answer(state, _sanitize_personality(response.content))
+
+    except Exception as e:
+        logger.error(f"Erro no Agente de Personalidade: {e}")
+        semantic_cache.discard(state)
+        return {"final_response": original_response}
+
+# Variantes assíncronas dos nós determinísticos: executam direto no event loop,
+# sem ocupar o thread pool usado pelo LangGraph para nós síncronos.
+async def afallback_node(state: dict) -> dict:
+    return fallback_node(state)
+
+async def aguardrail_node(state: dict) -> dict:
+    return guardrail_node(state)
+
+async def ahuman_handoff_node(state: dict) -> dict:
+    return human_handoff_node(state)
@@ -0,0 +1,197 @@
+"""
+Execução concorrente das Tool Calls emitidas pelos agentes especialistas.
+
+Chamadas independentes são disparadas em paralelo, de modo que um lote com
+`search_infinitepay_knowledge` + `web_search` custe aproximadamente a
+ferramenta mais lenta, e não a soma. Cada ferramenta tem um timeout próprio e
+o lote inteiro respeita um prazo compartilhado; os resultados são devolvidos
+na mesma ordem das chamadas, preservando o prompt de follow-up.
+
+Observação: ferramentas síncronas rodam em threads, que não podem ser
+interrompidas; ao expirar o prazo o resultado é descartado, mas a thread
+termina em segundo plano.
+"""
+import time
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, NamedTuple, Optional
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langchain_core.tools import BaseTool
+from app.core.config import (
+    TOOL_CALL_TIMEOUT, TOOL_BATCH_DEADLINE, TOOL_EXECUTOR_WORKERS,
+    TOKEN_BUDGET_CONTEXT_SHARE, TOKEN_BUDGET_MIN_CONTEXT
+)
+from app.core.metrics import ERRORS
+from app.core.tokens import truncate_tokens
+from app.core.token_budget import token_allowance, record_degradation
+
+logger = logging.getLogger(__name__)
+
+# Pool dedicado às ferramentas dos nós síncronos (propaga o contexto/callbacks)
+_executor: ThreadPoolExecutor = ContextThreadPoolExecutor(
+    max_workers=TOOL_EXECUTOR_WORKERS, thread_name_prefix="tool-call"
+)
+
+class ToolResult(NamedTuple):
+    """
+    Resultado de uma Tool Call.
+
+    Attributes:
+        name (str): Nome da ferramenta.
+        output (Optional[str]): Retorno da ferramenta (None em caso de erro).
+        error (Optional[str]): Descrição do erro/timeout, se houver.
+    """
+    name: str
+    output: Optional[str] = None
+    error: Optional[str] = None
+
+def fit_tool_outputs(results: List[ToolResult]) -> List[ToolResult]:
+    """
+    Trunca os retornos das ferramentas ao saldo do orçamento de tokens da requisição.
+
+    O limite (fração `TOKEN_BUDGET_CONTEXT_SHARE` do saldo, nunca abaixo de
+    `TOKEN_BUDGET_MIN_CONTEXT`) é dividido igualmente entre os resultados.
+    Sem orçamento, os resultados são devolvidos sem alteração.
+
+    Args:
+        results (List[ToolResult]): Resultados das Tool Calls.
+
+    Returns:
+        List[ToolResult]: Resultados com os retornos possivelmente truncados.
+    """
+    limit = token_allowance(None, TOKEN_BUDGET_CONTEXT_SHARE, floor=TOKEN_BUDGET_MIN_CONTEXT)
+    if limit is None or not results:
+        return results
+
+    per_result = max(1, limit // len(results))
+    fitted = [
+        r._replace(output=truncate_tokens(r.output, per_result)) if r.output else r
+        for r in results
+    ]
+    if any(f.output != r.output for f, r in zip(fitted, results)):
+        record_degradation("trim_context")
+    return fitted
+
+def _timeout_result(name: str, timeout: float) -> ToolResult:
+    ERRORS.labels(component="tool_timeout", name=name).inc()
+    logger.warning(f"Tempo limite excedido na ferramenta '{name}' ({timeout:.1f}s)")
+    return ToolResult(name=name, error=f"Tempo limite excedido ({timeout:.1f}s)")
+
+def _resolve(calls: List[dict], tools: Dict[str, BaseTool], prepare_args: Optional[Callable[[dict], dict]]):
+    """Associa cada chamada à ferramenta correspondente (ignora nomes desconhecidos)."""
+    resolved = []
+    for call in calls:
+        tool_func = tools.get(call["name"])
+        if tool_func is None:
+            logger.warning(f"Ferramenta desconhecida ignorada: {call['name']}")
+            continue
+        args = prepare_args(call) if prepare_args else call["args"]
+        resolved.append((call["name"], tool_func, args))
+    return resolved
+
+def run_tool_calls(
+    calls: List[dict],
+    tools: Dict[str, BaseTool],
+    prepare_args: Optional[Callable[[dict], dict]] = None,
+    timeout: float = TOOL_CALL_TIMEOUT,
+    deadline: float = TOOL_BATCH_DEADLINE,
+    prefetched: Optional[Dict[str, Future]] = None,
+) -> List[ToolResult]:
+    """
+    Executa as Tool Calls em paralelo (thread pool) para os nós síncronos.
+
+    Args:
+        calls (list): Tool Calls emitidas pelo LLM (`response.tool_calls`).
+        tools (dict): Ferramentas disponíveis, indexadas por nome.
+        prepare_args (Callable, optional): Ajusta os argumentos de cada chamada.
+        timeout (float): Timeout individual de cada ferramenta (segundos).
+        deadline (float): Prazo total do lote (segundos).
+        prefetched (dict, optional): Resultados antecipados por nome de ferramenta
+            (execução especulativa); cada um substitui a primeira chamada correspondente
+            e é removido do dicionário ao ser consumido.
+
+    Returns:
+        List[ToolResult]: Resultados na ordem das chamadas.
+    """
+    resolved = _resolve(calls, tools, prepare_args)
+    # Todas as chamadas partem juntas: o limite efetivo é o menor entre timeout e prazo
+    limit = min(timeout, deadline)
+    start = time.monotonic()
+    prefetched = prefetched if prefetched is not None else {}
+    futures = [
+        prefetched.pop(name) if name in prefetched else _executor.submit(tool_func.invoke, args)
+        for name, tool_func, args in resolved
+    ]
+
+    results = []
+    for (name, _, _), future in zip(resolved, futures):
+        remaining = start + limit - time.monotonic()
+        try:
+            results.append(ToolResult(name=name, output=future.result(timeout=max(0.0, remaining))))
+        except FutureTimeoutError:
+            future.cancel()
+            results.append(_timeout_result(name, limit))
+        except Exception as e:
+            results.append(ToolResult(name=name, error=str(e)))
+    return results
+
+async def arun_tool_calls(
+    calls: List[dict],
+    tools: Dict[str, BaseTool],
+    prepare_args: Optional[Callable[[dict], dict]] = None,
+    timeout: float = TOOL_CALL_TIMEOUT,
+    deadline: float = TOOL_BATCH_DEADLINE,
+    prefetched: Optional[Dict[str, Future]] = None,
+    blocking: bool = True,
+) -> List[ToolResult]:
+    """
+    Executa as Tool Calls concorrentemente no event loop (nós assíncronos).
+
+    Args:
+        calls (list): Tool Calls emitidas pelo LLM (`response.tool_calls`).
+        tools (dict): Ferramentas disponíveis, indexadas por nome.
+        prepare_args (Callable, optional): Ajusta os argumentos de cada chamada.
+        timeout (float): Timeout individual de cada ferramenta (segundos).
+        deadline (float): Prazo total do lote (segundos).
+        prefetched (dict, optional): Resultados antecipados por nome de ferramenta
+            (ver `run_tool_calls`).
+        blocking (bool): Se False, as ferramentas (ex.: consultas em memória) são
+            executadas direto no event loop, sem o salto para o thread pool.
+
+    Returns:
+        List[ToolResult]: Resultados na ordem das chamadas.
+    """
+    resolved = _resolve(calls, tools, prepare_args)
+
+    if not blocking:
+        results = []
+        for name, tool_func, args in resolved:
+            try:
+                results.append(ToolResult(name=name, output=tool_func.invoke(args)))
+            except Exception as e:
+                results.append(ToolResult(name=name, error=str(e)))
+        return results
+
+    prefetched = prefetched if prefetched is not None else {}
+    limit = min(timeout, deadline)
+    tasks = [
+        asyncio.create_task(asyncio.wait_for(
+            asyncio.wrap_future(prefetched.pop(name)) if name in prefetched else tool_func.ainvoke(args),
+            timeout=limit
+        ))
+        for name, tool_func, args in resolved
+    ]
+    if tasks:
+        await asyncio.wait(tasks)
+
+    results = []
+    for (name, _, _), task in zip(resolved, tasks):
+        error = task.exception()
+        if error is None:
+            results.append(ToolResult(name=name, output=task.result()))
+        elif isinstance(error, asyncio.TimeoutError):
+            results.append(_timeout_result(name, limit))
+        else:
+            results.append(ToolResult(name=name, error=str(error)))
+    return results
@@ -0,0 +1,228 @@
+"""
+Gravação e reprodução (cassette) das chamadas ao LLM.
+
+Com `LLM_CASSETTE_MODE=record`, cada chamada ao provedor é registrada em um
+arquivo JSONL (`LLM_CASSETTE_PATH`) com o prompt, as ferramentas vinculadas, a
+resposta (incluindo tool calls), o nó de origem e a latência observada. Com
+`LLM_CASSETTE_MODE=replay`, as respostas são servidas a partir do arquivo, sem
+rede nem chave de API, de forma instantânea ou com a latência original
+(`LLM_CASSETTE_TIMING=recorded`), o que permite medir o overhead do grafo e da
+recuperação de forma reproduzível (ex.: CI).
+
+A chave de cada gravação é o hash do conteúdo das mensagens (sem ids), das
+ferramentas e dos stops. Prompts gravados mais de uma vez são reproduzidos em
+sequência circular. Uma chamada sem gravação no modo replay gera
+`CassetteMissError`.
+
+O cassette fica abaixo do `ResilientChatModel`: prazos, hedging e retentativas
+continuam valendo durante a reprodução com a latência original.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, message_chunk_to_message, messages_from_dict, message_to_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from app.core.resilience import LLMUnavailableError, current_node
+from app.core.stub_llm import StubChatModel
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay")
+TIMINGS = ("instant", "recorded")
+
+class CassetteMissError(LLMUnavailableError):
+    """Chamada sem gravação correspondente no cassette (modo replay)."""
+
+def _message_payload(message: BaseMessage) -> dict:
+    payload = {"type": message.type, "content": message.content}
+    if getattr(message, "tool_calls", None):
+        payload["tool_calls"] = [{"name": c["name"], "args": c["args"]} for c in message.tool_calls]
+    return payload
+
+def request_payload(messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> dict:
+    """
+    Representação determinística de uma chamada (ignora ids de mensagens e de tool calls).
+
+    Args:
+        messages (List[BaseMessage]): Prompt enviado ao LLM.
+        stop (Optional[List[str]]): Sequências de parada.
+
+    Returns:
+        dict: Mensagens, nomes das ferramentas vinculadas e stops.
+    """
+    tools = [t.get("function", t).get("name") for t in kwargs.get("tools") or []]
+    return {"messages": [_message_payload(m) for m in messages], "tools": tools, "stop": stop}
+
+def request_key(payload: dict) -> str:
+    """Hash estável da chamada."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+class Cassette:
+    """
+    Arquivo JSONL de gravações, carregado integralmente na inicialização.
+
+    Args:
+        path (str): Caminho do arquivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self.load()
+
+    def load(self):
+        """Carrega as gravações existentes (arquivo ausente equivale a cassette vazio)."""
+        with self._lock:
+            self._entries.clear()
+            self._cursor.clear()
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    for line in filter(str.strip, f):
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+            except FileNotFoundError:
+                return
+        logger.info(f"Cassette carregado | Arquivo: {self.path} | Gravações: {len(self)}")
+
+    def record(self, payload: dict, message: BaseMessage, latency: float, node: Optional[str]):
+        entry = {
+            "key": request_key(payload),
+            "node": node,
+            "latency": round(latency, 6),
+            "request": payload,
+            "response": message_to_dict(message_chunk_to_message(message))
+        }
+        with self._lock:
+            self._entries[entry["key"]].append(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def lookup(self, payload: dict) -> dict:
+        """
+        Retorna a próxima gravação da chamada (sequência circular).
+
+        Raises:
+            CassetteMissError: Nenhuma gravação para a chamada.
+        """
+        key = request_key(payload)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(f"Chamada ao LLM não gravada no cassette {self.path} (chave {key[:12]}).")
+            entry = entries[self._cursor[key] % len(entries)]
+            self._cursor[key] += 1
+            return entry
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model que grava (record) ou reproduz (replay) as chamadas ao provedor.
+
+    Attributes:
+        cassette (Cassette): Arquivo de gravações.
+        mode (str): "record" ou "replay".
+        timing (str): No replay, "instant" ou "recorded" (latência original).
+        delegate (Optional[BaseChatModel]): Provedor real (obrigatório em record).
+    """
+    cassette: Cassette
+    mode: str = "replay"
+    timing: str = "instant"
+    delegate: Optional[BaseChatModel] = None
+
+    _stub: StubChatModel = PrivateAttr(default_factory=StubChatModel)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.mode}"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Formata as ferramentas como o provedor (ou no formato OpenAI, em replay)."""
+        if self.delegate is not None:
+            return self.bind(**self.delegate.bind_tools(tools, **kwargs).kwargs)
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _replay(self, payload: dict) -> tuple:
+        entry = self.cassette.lookup(payload)
+        message = messages_from_dict([entry["response"]])[0]
+        delay = entry["latency"] if self.timing == "recorded" else 0.0
+        return message, delay
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        payload = request_payload(messages, stop, **kwargs)
+        if self.mode == "replay":
+            message, delay = self._replay(payload)
+            time.sleep(delay)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        start = time.perf_counter()
+        result = self.delegate._generate(messages, stop=stop, **kwargs)
+        self.cassette.record(payload, result.generations[0].message, time.perf_counter() - start,
+                             current_node(run_manager))
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        payload = request_payload(messages, stop, **kwargs)
+        if self.mode == "replay":
+            message, delay = self._replay(payload)
+            await asyncio.sleep(delay)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        start = time.perf_counter()
+        result = await self.delegate._agenerate(messages, stop=stop, **kwargs)
+        self.cassette.record(payload, result.generations[0].message, time.perf_counter() - start,
+                             current_node(run_manager))
+        return result
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        payload = request_payload(messages, stop, **kwargs)
+        if self.mode == "replay":
+            message, delay = self._replay(payload)
+            await asyncio.sleep(delay)
+            for chunk in self._stub._to_chunks(message, None):
+                yield chunk
+            return
+
+        start = time.perf_counter()
+        aggregated: Optional[ChatGenerationChunk] = None
+        async for chunk in self.delegate._astream(messages, stop=stop, **kwargs):
+            aggregated = chunk if aggregated is None else aggregated + chunk
+            yield chunk
+        message = aggregated.message if aggregated is not None else AIMessage(content="")
+        self.cassette.record(payload, message, time.perf_counter() - start, current_node(run_manager))
+
+def wrap_with_cassette(provider: Optional[BaseChatModel], mode: str, path: str, timing: str) -> BaseChatModel:
+    """
+    Envolve o provedor com o cassette conforme o modo configurado.
+
+    Args:
+        provider (Optional[BaseChatModel]): Provedor real (dispensável em replay).
+        mode (str): "off", "record" ou "replay".
+        path (str): Arquivo JSONL do cassette.
+        timing (str): "instant" ou "recorded" (apenas replay).
+
+    Returns:
+        BaseChatModel: Provedor original (modo off) ou `CassetteChatModel`.
+    """
+    if mode == "off":
+        return provider
+    logger.warning(f"LLM_CASSETTE_MODE={mode}: chamadas ao LLM {'gravadas em' if mode == 'record' else 'reproduzidas de'} {path}")
+    return CassetteChatModel(cassette=Cassette(path), mode=mode, timing=timing, delegate=provider)
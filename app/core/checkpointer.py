@@ -0,0 +1,510 @@
+"""
+Checkpointers (persistência de estado do grafo) selecionáveis por configuração.
+
+- memory: `BoundedMemorySaver` em processo (padrão, apenas um worker), com
+  limite de threads, expiração por inatividade e retenção apenas dos
+  checkpoints mais recentes de cada thread.
+- sqlite: banco SQLite local em modo WAL, compartilhado entre múltiplos
+  processos/workers do mesmo nó, com a mesma retenção por thread e expiração
+  por inatividade do backend em memória.
+
+A fila por sessão (`SessionExecutionQueue`) é por processo: com vários
+workers, duas requisições simultâneas do mesmo usuário em workers distintos
+podem executar o grafo ao mesmo tempo sobre o mesmo checkpoint. A ordem dos
+turnos só é garantida com sticky sessions por `user_id` no balanceador.
+"""
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Set, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP, BaseCheckpointSaver, ChannelVersions, Checkpoint,
+    CheckpointMetadata, CheckpointTuple, get_checkpoint_id, get_checkpoint_metadata
+)
+from langgraph.checkpoint.memory import MemorySaver
+from app.core.config import (
+    CHECKPOINTER_BACKEND, CHECKPOINT_SQLITE_PATH,
+    CHECKPOINT_MAX_THREADS, CHECKPOINT_IDLE_TTL, CHECKPOINT_MAX_PER_THREAD
+)
+from app.core.metrics import CHECKPOINT_EVICTIONS, CHECKPOINT_THREADS
+
+logger = logging.getLogger(__name__)
+
+# Tabelas WITHOUT ROWID: linhas fisicamente agrupadas pela chave primária,
+# tornando a leitura do último checkpoint de uma thread uma busca de índice única.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+"""
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver com consumo de memória limitado.
+
+    - Retém apenas os `max_checkpoints_per_thread` checkpoints mais recentes de
+      cada thread (e os blobs de canais que eles referenciam).
+    - Remove threads ociosas há mais de `idle_ttl` segundos.
+    - Limita o total de threads residentes, removendo as menos recentes (LRU).
+
+    Índices auxiliares por thread evitam varrer todo o armazenamento a cada
+    remoção, mantendo o custo proporcional ao tamanho da própria thread.
+
+    Args:
+        max_threads (int): Máximo de threads em memória (0 desativa o limite).
+        idle_ttl (float): Segundos de inatividade até a expiração (0 desativa).
+        max_checkpoints_per_thread (int): Checkpoints retidos por thread.
+    """
+
+    def __init__(self, max_threads: int = 10000, idle_ttl: float = 3600.0,
+                 max_checkpoints_per_thread: int = 1, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.idle_ttl = idle_ttl
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+
+        self._lock = threading.RLock()
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self._checkpoint_versions: Dict[Tuple[str, str, str], ChannelVersions] = {}
+        self._blob_keys: Dict[Tuple[str, str], Set[tuple]] = {}
+        self.evictions = {"lru": 0, "ttl": 0}
+        self.pruned_checkpoints = 0
+
+    def _touch(self, thread_id: str):
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _is_expired(self, thread_id: str) -> bool:
+        last_access = self._last_access.get(thread_id)
+        return bool(self.idle_ttl) and last_access is not None and time.monotonic() - last_access > self.idle_ttl
+
+    def _evict(self, thread_id: str, reason: str):
+        self.delete_thread(thread_id)
+        self.evictions[reason] += 1
+        CHECKPOINT_EVICTIONS.labels(reason=reason).inc()
+
+    def _enforce_limits(self):
+        """Remove threads expiradas e, se necessário, as menos recentes (LRU)."""
+        while self._last_access:
+            oldest = next(iter(self._last_access))
+            if not self._is_expired(oldest):
+                break
+            self._evict(oldest, "ttl")
+
+        while self.max_threads and len(self._last_access) > self.max_threads:
+            self._evict(next(iter(self._last_access)), "lru")
+
+        CHECKPOINT_THREADS.set(len(self._last_access))
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str):
+        """Descarta checkpoints antigos da thread e os blobs não mais referenciados."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        excess = len(checkpoints) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+
+        for checkpoint_id in sorted(checkpoints)[:excess]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self._checkpoint_versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self.pruned_checkpoints += excess
+
+        live = {
+            (thread_id, checkpoint_ns, channel, version)
+            for checkpoint_id in checkpoints
+            for channel, version in self._checkpoint_versions.get((thread_id, checkpoint_ns, checkpoint_id), {}).items()
+        }
+        blob_keys = self._blob_keys.get((thread_id, checkpoint_ns), set())
+        for key in blob_keys - live:
+            self.blobs.pop(key, None)
+        blob_keys &= live
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            if self._is_expired(thread_id):
+                self._evict(thread_id, "ttl")
+                return None
+            if thread_id not in self._last_access:
+                return None
+
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(self, config: Optional[RunnableConfig], **kwargs: Any) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            items = [*super().list(config, **kwargs)]
+        yield from items
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+
+            self._checkpoint_versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            self._blob_keys.setdefault((thread_id, checkpoint_ns), set()).update(
+                (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+            )
+            self._prune_thread(thread_id, checkpoint_ns)
+            self._touch(thread_id)
+            self._enforce_limits()
+        return result
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                   task_id: str, task_path: str = "") -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+                for checkpoint_id in checkpoints:
+                    self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                    self._checkpoint_versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                for key in self._blob_keys.pop((thread_id, checkpoint_ns), set()):
+                    self.blobs.pop(key, None)
+            self._last_access.pop(thread_id, None)
+
+    def stats(self) -> dict:
+        """Retorna tamanho atual e contadores de remoção."""
+        with self._lock:
+            return {
+                "threads": len(self._last_access),
+                "checkpoints": len(self._checkpoint_versions),
+                "blobs": len(self.blobs),
+                "evictions": dict(self.evictions),
+                "pruned_checkpoints": self.pruned_checkpoints
+            }
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Checkpointer persistido em SQLite (modo WAL) seguro para múltiplos processos.
+
+    Cada thread do processo mantém sua própria conexão; o modo WAL permite
+    leitores concorrentes com um escritor por vez, e o `busy_timeout` faz os
+    escritores de outros workers aguardarem em vez de falhar. As escritas de
+    um mesmo passo (`put_writes`) são gravadas em lote numa única transação.
+
+    Retenção (0 desativa cada limite):
+        - Cada `put` descarta os checkpoints da thread além dos
+          `max_checkpoints_per_thread` mais recentes (e suas escritas).
+        - Threads sem atividade há mais de `idle_ttl` segundos são removidas
+          por uma varredura executada no máximo a cada `sweep_interval`.
+
+    Args:
+        path (str): Caminho do arquivo do banco.
+        busy_timeout_ms (int): Espera máxima por lock de escrita entre processos.
+        max_checkpoints_per_thread (int): Checkpoints retidos por thread.
+        idle_ttl (float): Segundos de inatividade até a expiração da thread.
+        sweep_interval (float): Intervalo mínimo (s) entre varreduras de expiração.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000, max_checkpoints_per_thread: int = 0,
+                 idle_ttl: float = 0.0, sweep_interval: float = 60.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn().executescript(SCHEMA)
+        logger.info(f"Checkpointer SQLite inicializado em: {path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, criando-a sob demanda."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, statements: Sequence[Tuple[str, Any]]):
+        """Executa um conjunto de comandos atomicamente (BEGIN IMMEDIATE)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _build_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        """Reconstrói um CheckpointTuple a partir de uma linha e de suas escritas pendentes."""
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self._conn().execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id
+            }},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_checkpoint_id
+                }}
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((w_type, value)))
+                for task_id, channel, w_type, value in writes
+            ]
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+
+        if checkpoint_id := get_checkpoint_id(config):
+            row = self._conn().execute(
+                f"SELECT {columns} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id)
+            ).fetchone()
+        else:
+            row = self._conn().execute(
+                f"SELECT {columns} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns)
+            ).fetchone()
+
+        return self._build_tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[dict] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            f"metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+            params
+        ).fetchall()
+
+        remaining = limit
+        for thread_id, checkpoint_ns, *row in rows:
+            if remaining is not None and remaining <= 0:
+                break
+
+            checkpoint_tuple = self._build_tuple(thread_id, checkpoint_ns, tuple(row))
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+
+            if remaining is not None:
+                remaining -= 1
+            yield checkpoint_tuple
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        self._transaction([
+            (
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, serialized_checkpoint, metadata_type, serialized_metadata)
+            ),
+            ("INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)", (thread_id, time.time())),
+            *self._prune_statements(thread_id, checkpoint_ns)
+        ])
+        self._maybe_sweep()
+
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]
+        }}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                   task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        # Escritas especiais (erro, interrupção) substituem; as demais são idempotentes
+        verb = "INSERT OR REPLACE" if all(c in WRITES_IDX_MAP for c, _ in writes) else "INSERT OR IGNORE"
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+             channel, *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+
+        self._transaction([(
+            f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+            "channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )])
+
+    def _prune_statements(self, thread_id: str, checkpoint_ns: str) -> list:
+        """Comandos que descartam os checkpoints da thread além dos mais recentes."""
+        if not self.max_checkpoints_per_thread:
+            return []
+
+        stale = (
+            "thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?)"
+        )
+        params = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.max_checkpoints_per_thread)
+        return [
+            (f"DELETE FROM writes WHERE {stale}", params),
+            (f"DELETE FROM checkpoints WHERE {stale}", params),
+        ]
+
+    def _maybe_sweep(self):
+        """Remove threads ociosas além de `idle_ttl` (no máximo uma varredura por intervalo)."""
+        if not self.idle_ttl:
+            return
+        with self._sweep_lock:
+            if time.monotonic() - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = time.monotonic()
+
+        expired = "SELECT thread_id FROM threads WHERE updated_at < ?"
+        cutoff = (time.time() - self.idle_ttl,)
+        conn = self._conn()
+        removed = conn.execute(f"SELECT COUNT(*) FROM ({expired})", cutoff).fetchone()[0]
+        if not removed:
+            return
+
+        self._transaction([
+            (f"DELETE FROM writes WHERE thread_id IN ({expired})", cutoff),
+            (f"DELETE FROM checkpoints WHERE thread_id IN ({expired})", cutoff),
+            ("DELETE FROM threads WHERE updated_at < ?", cutoff),
+        ])
+        CHECKPOINT_EVICTIONS.labels(reason="ttl").inc(removed)
+        logger.info(f"Checkpointer SQLite: {removed} threads expiradas removidas")
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._transaction([
+            ("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,)),
+            ("DELETE FROM writes WHERE thread_id = ?", (thread_id,)),
+            ("DELETE FROM threads WHERE thread_id = ?", (thread_id,)),
+        ])
+
+    # Variantes assíncronas: I/O de disco executado fora do event loop
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[dict] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]],
+                          task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Versões em string ordenáveis, no mesmo formato do MemorySaver
+        current_v = 0 if current is None else int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+def build_checkpointer(backend: str = CHECKPOINTER_BACKEND) -> BaseCheckpointSaver:
+    """
+    Instancia o checkpointer configurado.
+
+    Args:
+        backend (str): "memory" ou "sqlite".
+
+    Returns:
+        BaseCheckpointSaver: Checkpointer a ser usado na compilação do grafo.
+    """
+    if backend == "sqlite":
+        return SQLiteCheckpointSaver(
+            CHECKPOINT_SQLITE_PATH,
+            max_checkpoints_per_thread=CHECKPOINT_MAX_PER_THREAD,
+            idle_ttl=CHECKPOINT_IDLE_TTL
+        )
+
+    if backend != "memory":
+        logger.warning(f"Checkpointer desconhecido '{backend}'. Utilizando memória.")
+    return BoundedMemorySaver(
+        max_threads=CHECKPOINT_MAX_THREADS,
+        idle_ttl=CHECKPOINT_IDLE_TTL,
+        max_checkpoints_per_thread=CHECKPOINT_MAX_PER_THREAD
+    )
@@ -0,0 +1,200 @@
+"""
+Primitivas de controle de concorrência para execução do grafo.
+
+Garante que requisições de uma mesma sessão (thread_id) sejam processadas em
+ordem, sem disputar o mesmo checkpoint, enquanto sessões distintas seguem em
+paralelo, e limita o total de execuções simultâneas (controle de admissão).
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+logger = logging.getLogger(__name__)
+
+class BackpressureError(Exception):
+    """
+    Erro base para rejeições por saturação.
+
+    Attributes:
+        status_code (int): Código HTTP sugerido para a resposta.
+        retry_after (int): Segundos sugeridos para nova tentativa (header Retry-After).
+    """
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class SessionQueueFullError(BackpressureError):
+    """Fila da sessão atingiu a profundidade máxima."""
+    status_code = 429
+
+class SessionQueueTimeoutError(BackpressureError):
+    """Tempo máximo de espera pela vez na fila da sessão excedido."""
+    status_code = 503
+
+class _SessionSlot:
+    """Estado interno de uma sessão: lock FIFO e total de requisições pendentes."""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+class SessionExecutionQueue:
+    """
+    Fila de execução ordenada por sessão (thread_id).
+
+    Cada sessão possui um lock FIFO próprio: requisições concorrentes do mesmo
+    usuário aguardam a execução anterior terminar, e sessões diferentes não
+    competem entre si. As entradas são removidas assim que a sessão fica ociosa.
+
+    A fila é local ao processo: com múltiplos workers, a ordem por sessão exige
+    sticky sessions por `user_id` no balanceador.
+
+    Args:
+        max_depth (int): Máximo de requisições (em execução + aguardando) por sessão.
+        timeout (float): Tempo máximo, em segundos, aguardando a vez na fila.
+        retry_after (int): Valor sugerido de Retry-After nas rejeições.
+    """
+
+    def __init__(self, max_depth: int, timeout: float, retry_after: int = 1):
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._sessions: Dict[str, _SessionSlot] = {}
+
+    @asynccontextmanager
+    async def acquire(self, thread_id: str) -> AsyncIterator[None]:
+        """
+        Reserva a vez de execução da sessão durante o bloco `async with`.
+
+        Args:
+            thread_id (str): Identificador da sessão no LangGraph.
+
+        Raises:
+            SessionQueueFullError: A sessão já possui `max_depth` requisições pendentes.
+            SessionQueueTimeoutError: A vez não foi obtida dentro de `timeout`.
+        """
+        slot = self._sessions.get(thread_id)
+        if slot is None:
+            slot = self._sessions[thread_id] = _SessionSlot()
+
+        if slot.pending >= self.max_depth:
+            logger.warning(f"Fila da sessao cheia | Thread: {thread_id}")
+            raise SessionQueueFullError(
+                "Muitas requisições simultâneas para esta sessão.", self.retry_after
+            )
+
+        slot.pending += 1
+        try:
+            try:
+                await asyncio.wait_for(slot.lock.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout aguardando fila da sessao | Thread: {thread_id}")
+                raise SessionQueueTimeoutError(
+                    "Tempo de espera da sessão excedido.", self.retry_after
+                )
+
+            try:
+                yield
+            finally:
+                slot.lock.release()
+        finally:
+            slot.pending -= 1
+            if slot.pending == 0 and self._sessions.get(thread_id) is slot:
+                del self._sessions[thread_id]
+
+    def stats(self) -> dict:
+        """Retorna o total de sessões ativas e de requisições pendentes."""
+        return {
+            "active_sessions": len(self._sessions),
+            "pending_requests": sum(slot.pending for slot in self._sessions.values())
+        }
+
+class AdmissionRejectedError(BackpressureError):
+    """Capacidade esgotada: execuções e fila de espera global estão cheias."""
+    status_code = 429
+
+class AdmissionTimeoutError(BackpressureError):
+    """Requisição aguardou na fila global além do prazo configurado."""
+    status_code = 503
+
+class AdmissionController:
+    """
+    Controle de admissão global para execuções do grafo.
+
+    Limita quantas execuções rodam simultaneamente (cada uma dispara várias
+    chamadas ao LLM) e mantém uma fila de espera limitada com prazo. Quando a
+    fila está cheia a rejeição é imediata, evitando acúmulo de requisições em
+    memória enquanto o provedor está saturado.
+
+    Args:
+        max_in_flight (int): Máximo de execuções simultâneas do grafo.
+        max_queue (int): Máximo de requisições aguardando uma vaga.
+        queue_timeout (float): Tempo máximo de espera na fila, em segundos.
+        retry_after (int): Valor sugerido de Retry-After nas rejeições.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, retry_after: int = 1):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected_total = 0
+        self.timed_out_total = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Ocupa uma vaga de execução durante o bloco `async with`.
+
+        Raises:
+            AdmissionRejectedError: Sem vagas e com a fila de espera cheia.
+            AdmissionTimeoutError: A vaga não foi liberada dentro de `queue_timeout`.
+        """
+        if self._semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.rejected_total += 1
+                logger.warning(f"Admissao rejeitada | Em execucao: {self.in_flight} | Fila: {self.queued}")
+                raise AdmissionRejectedError(
+                    "Serviço saturado. Tente novamente em instantes.", self.retry_after
+                )
+
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out_total += 1
+                logger.warning(f"Timeout na fila de admissao | Em execucao: {self.in_flight}")
+                raise AdmissionTimeoutError(
+                    "Tempo de espera por capacidade excedido.", self.retry_after
+                )
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Retorna ocupação atual, limites e contadores de rejeição."""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "rejected_total": self.rejected_total,
+            "timed_out_total": self.timed_out_total
+        }
@@ -2,6 +2,10 @@ import os
 import logging
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
+from app.core.stub_llm import StubChatModel
+from app.core.cassette import MODES as CASSETTE_MODES, TIMINGS as CASSETTE_TIMINGS, wrap_with_cassette
+from app.core.resilience import CircuitBreaker, ResilientChatModel, parse_node_deadlines
+from app.core.warmup_llm import WarmupChatModel
 
 load_dotenv()
 
@@ -32,13 +36,172 @@ logger = get_logger("CoreConfig")
 
 GROQ_API_KEY = os.getenv("CHAVE_GROQ")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+# Endpoint alternativo (ex.: servidor stub local com injeção de latência/erros)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
 
-if not GROQ_API_KEY:
+# Provedor do LLM: "groq" (produção) ou "stub" (offline, determinístico)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+
+# Cassette do LLM: "off", "record" (grava chamadas reais) ou "replay" (offline, sem provedor)
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+if LLM_CASSETTE_MODE not in CASSETTE_MODES:
+    logger.warning(f"LLM_CASSETTE_MODE inválido ('{LLM_CASSETTE_MODE}'); utilizando 'off'.")
+    LLM_CASSETTE_MODE = "off"
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "./tests/cassettes/llm.jsonl")
+# Replay: "instant" (sem espera) ou "recorded" (latência original)
+LLM_CASSETTE_TIMING = os.getenv("LLM_CASSETTE_TIMING", "instant").lower()
+if LLM_CASSETTE_TIMING not in CASSETTE_TIMINGS:
+    logger.warning(f"LLM_CASSETTE_TIMING inválido ('{LLM_CASSETTE_TIMING}'); utilizando 'instant'.")
+    LLM_CASSETTE_TIMING = "instant"
+
+# Warm-up na inicialização (embeddings, vector store e execução de teste do grafo)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_GRAPH_PASS = os.getenv("WARMUP_GRAPH_PASS", "true").lower() == "true"
+# LLM da execução de teste do grafo: "stub" (sem chamadas faturadas) ou "provider" (aquece também a conexão)
+WARMUP_LLM = os.getenv("WARMUP_LLM", "stub").lower()
+if WARMUP_LLM not in ("stub", "provider"):
+    logger.warning(f"WARMUP_LLM inválido ('{WARMUP_LLM}'); utilizando 'stub'.")
+    WARMUP_LLM = "stub"
+
+# Persistência de sessões: "memory" (um worker) ou "sqlite" (multi-worker)
+CHECKPOINTER_BACKEND = os.getenv("CHECKPOINTER_BACKEND", "memory").lower()
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "./data/checkpoints.sqlite")
+
+# Limites do checkpointer em memória (0 desativa o respectivo limite)
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "10000"))
+CHECKPOINT_IDLE_TTL = float(os.getenv("CHECKPOINT_IDLE_TTL", "3600"))
+CHECKPOINT_MAX_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "1"))
+
+# Execução em lote (/api/chat/batch)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Fila de execução por sessão (serializa requisições do mesmo thread_id)
+SESSION_QUEUE_MAX_DEPTH = int(os.getenv("SESSION_QUEUE_MAX_DEPTH", "4"))
+SESSION_QUEUE_TIMEOUT = float(os.getenv("SESSION_QUEUE_TIMEOUT", "30"))
+
+# Controle de admissão global (execuções simultâneas do grafo)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+
+# Valor sugerido no header Retry-After das rejeições por saturação
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "2"))
+
+# Nós assíncronos (ainvoke) no grafo; "false" retorna aos nós síncronos no thread pool
+ASYNC_NODES = os.getenv("ASYNC_NODES", "true").lower() == "true"
+
+# Tool Calls concorrentes: timeout por ferramenta, prazo do lote e pool dos nós síncronos
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "10"))
+TOOL_BATCH_DEADLINE = float(os.getenv("TOOL_BATCH_DEADLINE", "15"))
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "8"))
+
+# RAG especulativo: busca disparada em paralelo ao Router (opt-in)
+SPECULATIVE_RAG = os.getenv("SPECULATIVE_RAG", "false").lower() == "true"
+SPECULATIVE_RAG_WORKERS = int(os.getenv("SPECULATIVE_RAG_WORKERS", "4"))
+SPECULATIVE_RAG_TTL = float(os.getenv("SPECULATIVE_RAG_TTL", "60"))
+
+# Tom de voz: "rewrite" (chamada extra ao Editor) ou "single_pass" (regras aplicadas pelo especialista)
+PERSONALITY_MODE = os.getenv("PERSONALITY_MODE", "rewrite").lower()
+if PERSONALITY_MODE not in ("rewrite", "single_pass"):
+    logger.warning(f"PERSONALITY_MODE inválido ('{PERSONALITY_MODE}'); utilizando 'rewrite'.")
+    PERSONALITY_MODE = "rewrite"
+
+# Guardrail do Router: arquivo de padrões bloqueados (recarregado a quente)
+GUARDRAIL_RULES_PATH = os.getenv("GUARDRAIL_RULES_PATH", "./app/agents/router/guardrail_rules.txt")
+GUARDRAIL_RELOAD_INTERVAL = float(os.getenv("GUARDRAIL_RELOAD_INTERVAL", "5"))
+
+# Cache de decisões do Router (mensagens repetidas)
+ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() == "true"
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "5000"))
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", "3600"))
+
+# Classificador de intenção local (fast path do Router)
+INTENT_FAST_PATH = os.getenv("INTENT_FAST_PATH", "true").lower() == "true"
+INTENT_EXEMPLARS_PATH = os.getenv("INTENT_EXEMPLARS_PATH", "./app/agents/router/intents.json")
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+INTENT_MARGIN = float(os.getenv("INTENT_MARGIN", "0.05"))
+INTENT_SHADOW_SAMPLE_RATE = float(os.getenv("INTENT_SHADOW_SAMPLE_RATE", "0.05"))
+
+# Cache semântico de respostas do agente de conhecimento
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_PENDING_TTL = float(os.getenv("SEMANTIC_CACHE_PENDING_TTL", "120"))
+
+# Resiliência do LLM: prazos por nó, hedging (p95 do provedor), retentativas e circuit breaker
+LLM_RESILIENCE = os.getenv("LLM_RESILIENCE", "true").lower() == "true"
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "30"))
+LLM_NODE_DEADLINES = parse_node_deadlines(
+    os.getenv("LLM_NODE_DEADLINES", "router=8,knowledge_agent=25,support_agent=25,personality=15")
+)
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "2.5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.25"))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "2"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_TIMEOUT = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))
+LLM_EXECUTOR_WORKERS = int(os.getenv("LLM_EXECUTOR_WORKERS", "16"))
+
+# Tracing por requisição (Chrome/Perfetto): header opt-in, amostragem e traces mantidos em memória
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_HEADER = os.getenv("TRACE_HEADER", "X-Trace")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_MAX_STORED = int(os.getenv("TRACE_MAX_STORED", "200"))
+
+# Histórico dos especialistas: janela recente (tokens) e gatilho do resumo incremental
+HISTORY_WINDOW_TOKENS = int(os.getenv("HISTORY_WINDOW_TOKENS", "1500"))
+HISTORY_SUMMARY_TRIGGER_TOKENS = int(os.getenv("HISTORY_SUMMARY_TRIGGER_TOKENS", "1000"))
+
+# Orçamento de tokens por requisição (0 desativa) e fatias do saldo para histórico e contexto das ferramentas
+TOKEN_BUDGET_PER_REQUEST = int(os.getenv("TOKEN_BUDGET_PER_REQUEST", "0"))
+TOKEN_BUDGET_HISTORY_SHARE = float(os.getenv("TOKEN_BUDGET_HISTORY_SHARE", "0.3"))
+TOKEN_BUDGET_CONTEXT_SHARE = float(os.getenv("TOKEN_BUDGET_CONTEXT_SHARE", "0.3"))
+TOKEN_BUDGET_MIN_CONTEXT = int(os.getenv("TOKEN_BUDGET_MIN_CONTEXT", "200"))
+TOKEN_USAGE_MAX_USERS = int(os.getenv("TOKEN_USAGE_MAX_USERS", "10000"))
+
+if not GROQ_API_KEY and LLM_PROVIDER == "groq" and LLM_CASSETTE_MODE != "replay":
     logger.warning("Variável de ambiente CHAVE_GROQ não detectada. O sistema pode apresentar falhas.")
 
 # Instância Singleton do LLM para uso compartilhado entre agentes
-llm = ChatGroq(
-    temperature=0, 
-    model_name=GROQ_MODEL,
-    api_key=GROQ_API_KEY
-)
\ No newline at end of file
+if LLM_CASSETTE_MODE == "replay":
+    # Respostas servidas integralmente pelo cassette
+    provider_llm = None
+elif LLM_PROVIDER == "stub":
+    logger.warning("LLM_PROVIDER=stub: respostas simuladas, sem chamadas ao provedor.")
+    provider_llm = StubChatModel(latency_ms=STUB_LLM_LATENCY_MS)
+else:
+    # Retentativas ficam a cargo do ResilientChatModel (evita retentativas aninhadas)
+    provider_llm = ChatGroq(
+        temperature=0, 
+        model_name=GROQ_MODEL,
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_BASE_URL,
+        timeout=LLM_DEADLINE,
+        max_retries=0 if LLM_RESILIENCE else 2
+    )
+
+provider_llm = wrap_with_cassette(provider_llm, LLM_CASSETTE_MODE, LLM_CASSETTE_PATH, LLM_CASSETTE_TIMING)
+
+# Circuit breaker compartilhado (consultado pelo Router para falhar rápido)
+llm_circuit = CircuitBreaker(LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_TIMEOUT)
+
+if LLM_RESILIENCE:
+    llm = ResilientChatModel(
+        delegate=provider_llm,
+        breaker=llm_circuit,
+        deadline=LLM_DEADLINE,
+        node_deadlines=LLM_NODE_DEADLINES,
+        hedge_delay=LLM_HEDGE_DELAY,
+        max_retries=LLM_MAX_RETRIES,
+        retry_backoff=LLM_RETRY_BACKOFF,
+        retry_backoff_max=LLM_RETRY_BACKOFF_MAX,
+        executor_workers=LLM_EXECUTOR_WORKERS
+    )
+else:
+    llm = provider_llm
+
+# Warm-up com o stub: apenas as chamadas da execução de teste deixam de ir ao provedor
+if WARMUP_ENABLED and WARMUP_GRAPH_PASS and WARMUP_LLM == "stub" and LLM_PROVIDER != "stub":
+    llm = WarmupChatModel(delegate=llm, warmup=StubChatModel())
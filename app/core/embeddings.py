@@ -0,0 +1,189 @@
+"""
+Embeddings de consultas com cache LRU e micro-batching entre requisições.
+
+Todas as consultas (classificador de intenção do Router, cache semântico e
+busca RAG) passam por `CachedBatchedEmbeddings`:
+
+- Cache LRU (`EMBEDDING_CACHE_MAX_ENTRIES`) indexado pelo texto normalizado
+  (`normalize_text`: caixa, acentos e espaços). O modelo padrão
+  (`all-MiniLM-L6-v2`) já ignora caixa e acentos na tokenização, portanto a
+  normalização não altera o vetor. Consultas idênticas simultâneas
+  compartilham o mesmo cálculo.
+- Micro-batcher: os misses de requisições concorrentes são acumulados por até
+  `EMBEDDING_BATCH_MAX_WAIT_MS` ms (ou até `EMBEDDING_BATCH_MAX_SIZE` textos) e
+  calculados em um único forward pass (`embed_documents`), aproveitando melhor
+  a CPU. Aumentar a espera/tamanho favorece throughput; reduzi-los favorece a
+  latência individual (`EMBEDDING_BATCH_MAX_WAIT_MS=0` desativa o batching).
+
+`embed_documents` (ingestão e treino do classificador) segue direto para o
+modelo, sem cache.
+"""
+import os
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.core.metrics import EMBEDDING_CACHE_LOOKUPS, EMBEDDING_BATCH_SIZE
+from app.core.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros lidos do ambiente (importado pelo vector_store, que não depende do config da API)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+
+class MicroBatcher:
+    """
+    Agrupa textos enviados por threads concorrentes em chamadas únicas ao modelo.
+
+    Um worker dedicado aguarda o primeiro texto e coleta os seguintes até
+    `max_wait` segundos ou `max_batch` textos.
+
+    Args:
+        delegate (Embeddings): Modelo de embeddings (`embed_documents` em lote).
+        max_batch (int): Tamanho máximo do lote.
+        max_wait (float): Espera máxima (s) pelo preenchimento do lote.
+    """
+
+    def __init__(self, delegate: Embeddings, max_batch: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_wait: float = EMBEDDING_BATCH_MAX_WAIT_MS / 1000):
+        self.delegate = delegate
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Enfileira um texto e retorna o future com seu vetor."""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                # Esgotada a espera, ainda entram no lote os itens que já chegaram
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            EMBEDDING_BATCH_SIZE.observe(len(batch))
+            try:
+                vectors = self.delegate.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+class CachedBatchedEmbeddings(Embeddings):
+    """
+    Embeddings com cache LRU de consultas e micro-batching dos misses.
+
+    Args:
+        delegate (Embeddings): Modelo de embeddings real.
+        max_entries (int): Capacidade do cache (0 desativa).
+        max_batch (int): Tamanho máximo do lote do micro-batcher.
+        max_wait_ms (float): Espera máxima (ms) do micro-batcher (0 desativa o batching).
+    """
+
+    def __init__(self, delegate: Embeddings, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 max_batch: int = EMBEDDING_BATCH_MAX_SIZE, max_wait_ms: float = EMBEDDING_BATCH_MAX_WAIT_MS):
+        self.delegate = delegate
+        self.max_entries = max_entries
+        self.batcher = MicroBatcher(delegate, max_batch, max_wait_ms / 1000) if max_wait_ms > 0 else None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+
+    def __getattr__(self, name: str):
+        # Atributos do modelo original (ex.: model_name) continuam acessíveis
+        if name == "delegate":
+            raise AttributeError(name)
+        return getattr(self.delegate, name)
+
+    def _compute(self, key: str) -> Future:
+        if self.batcher is not None:
+            return self.batcher.submit(key)
+        future: Future = Future()
+        try:
+            future.set_result(self.delegate.embed_query(key))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _store(self, key: str, future: Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.exception() is None and self.max_entries > 0:
+                self._cache[key] = future.result()
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Vetor da consulta (cache, cálculo em andamento ou novo lote).
+
+        Args:
+            text (str): Texto da consulta.
+
+        Returns:
+            List[float]: Embedding da consulta.
+        """
+        key = normalize_text(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                EMBEDDING_CACHE_LOOKUPS.labels(result="hit").inc()
+                return vector
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        EMBEDDING_CACHE_LOOKUPS.labels(result="miss" if owner else "shared").inc()
+
+        if owner:
+            computed = self._compute(key)
+            computed.add_done_callback(lambda done: self._settle(key, future, done))
+        return future.result()
+
+    def _settle(self, key: str, future: Future, computed: Future):
+        error = computed.exception()
+        if error is None:
+            future.set_result(computed.result())
+        else:
+            future.set_exception(error)
+        self._store(key, future)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings em lote direto no modelo (ingestão/treino), sem cache."""
+        return self.delegate.embed_documents(texts)
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,158 @@
+"""
+Índice vetorial plano (força bruta) em arquivos NumPy mapeados em memória.
+
+Para uma base de alguns milhares de chunks, um produto matriz-vetor sobre os
+embeddings normalizados é mais rápido que o cliente do Chroma (SQLite + HNSW)
+e ocupa apenas a matriz em si. Arquivos gravados em `<índice>/flat/`:
+
+    embeddings.npy      float32 (n, d), normalizados (similaridade de cosseno = produto escalar)
+    texts.bin           textos dos chunks em UTF-8, concatenados
+    offsets.npy         int64 (n + 1), início/fim de cada texto em texts.bin
+    metadata.json       metadados distintos (um por página de origem)
+    metadata_ids.npy    int32 (n), metadado de cada chunk
+
+Os arquivos são abertos com `mmap` somente leitura: vários workers (uvicorn
+--workers N) compartilham as mesmas páginas do page cache do sistema, sem
+cópia por processo. O top-k usa `argpartition` (O(n)) e ordena apenas os k
+selecionados.
+
+`FlatVectorStore` implementa a interface `VectorStore` do LangChain, de modo
+que `query_rag` (`as_retriever`) funciona igualmente com qualquer backend.
+"""
+import os
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+FLAT_DIR = "flat"
+
+def flat_path(directory: str) -> str:
+    """Subdiretório do índice plano dentro do diretório de uma versão."""
+    return os.path.join(directory, FLAT_DIR)
+
+def has_flat_index(directory: str) -> bool:
+    """Indica se o diretório da versão contém um índice plano completo."""
+    return os.path.exists(os.path.join(flat_path(directory), "embeddings.npy"))
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def write_flat_index(directory: str, vectors: Iterable[List[float]], texts: List[str],
+                     metadatas: Optional[List[dict]] = None):
+    """
+    Grava o índice plano de uma versão.
+
+    Args:
+        directory (str): Diretório da versão do índice (em construção).
+        vectors (Iterable[List[float]]): Embeddings dos chunks.
+        texts (List[str]): Conteúdo dos chunks.
+        metadatas (Optional[List[dict]]): Metadados por chunk (ex.: source).
+    """
+    target = flat_path(directory)
+    os.makedirs(target, exist_ok=True)
+
+    matrix = _normalize(np.asarray(list(vectors), dtype=np.float32).reshape(len(texts), -1))
+    np.save(os.path.join(target, "embeddings.npy"), matrix)
+
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    with open(os.path.join(target, "texts.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(target, "offsets.npy"), offsets)
+
+    # Chunks de uma mesma página compartilham os metadados
+    distinct, ids = {}, []
+    for metadata in metadatas or [{}] * len(texts):
+        key = json.dumps(metadata, sort_keys=True, ensure_ascii=False)
+        ids.append(distinct.setdefault(key, len(distinct)))
+    with open(os.path.join(target, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump([json.loads(key) for key in distinct], f, ensure_ascii=False)
+    np.save(os.path.join(target, "metadata_ids.npy"), np.asarray(ids, dtype=np.int32))
+
+class FlatVectorStore(VectorStore):
+    """
+    Vector store somente leitura sobre o índice plano mapeado em memória.
+
+    Args:
+        directory (str): Diretório da versão do índice.
+        embedding (Embeddings): Modelo usado para embedar as consultas.
+    """
+
+    def __init__(self, directory: str, embedding: Embeddings):
+        target = flat_path(directory)
+        self._embedding = embedding
+        self.matrix = np.load(os.path.join(target, "embeddings.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(target, "offsets.npy"), mmap_mode="r")
+        self.metadata_ids = np.load(os.path.join(target, "metadata_ids.npy"), mmap_mode="r")
+        texts_path = os.path.join(target, "texts.bin")
+        self.texts = (
+            np.memmap(texts_path, dtype=np.uint8, mode="r") if os.path.getsize(texts_path) else np.zeros(0, np.uint8)
+        )
+        with open(os.path.join(target, "metadata.json"), encoding="utf-8") as f:
+            self.metadatas = json.load(f)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def search_vector(self, vector: List[float], k: int) -> List[Tuple[int, float]]:
+        """
+        Top-k por similaridade de cosseno (um único produto matriz-vetor).
+
+        Args:
+            vector (List[float]): Embedding da consulta.
+            k (int): Quantidade de resultados.
+
+        Returns:
+            List[Tuple[int, float]]: Pares (posição do chunk, similaridade), do mais similar ao menos.
+        """
+        total = len(self)
+        k = min(k, total)
+        if k <= 0:
+            return []
+
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        scores = self.matrix @ query
+        top = np.argpartition(-scores, k - 1)[:k] if k < total else np.arange(total)
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def _document(self, index: int) -> Document:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return Document(
+            page_content=self.texts[start:end].tobytes().decode("utf-8"),
+            metadata=dict(self.metadatas[self.metadata_ids[index]])
+        )
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        return [(self._document(i), score) for i, score in self.search_vector(embedding, k)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k)
+
+    def _select_relevance_score_fn(self):
+        # Similaridade de cosseno em [-1, 1] convertida para [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   persist_directory: Optional[str] = None, **kwargs: Any) -> "FlatVectorStore":
+        """Embeda os textos, grava o índice em `persist_directory` e o abre."""
+        if persist_directory is None:
+            raise ValueError("persist_directory é obrigatório para o índice plano.")
+        write_flat_index(persist_directory, embedding.embed_documents(list(texts)), list(texts), metadatas)
+        return cls(persist_directory, embedding)
@@ -0,0 +1,239 @@
+"""
+Métricas de observabilidade no formato Prometheus.
+
+Registra latência de requisições, de cada nó do grafo, das chamadas ao LLM e
+das ferramentas, além da distribuição de rotas e contagem de erros. A coleta
+dentro do grafo é feita por um callback handler do LangChain, propagado
+automaticamente para nós, LLM e ferramentas através do config da execução.
+
+Para múltiplos workers (uvicorn --workers N), defina `PROMETHEUS_MULTIPROC_DIR`
+com um diretório gravável compartilhado entre os processos, vazio a cada
+inicialização do servidor (o `start.sh` o recria); os gauges de um worker
+encerrado são descartados no shutdown (`mark_worker_stopped`).
+"""
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client import multiprocess
+
+# Buckets cobrindo desde ferramentas locais (ms) até chamadas lentas ao LLM (dezenas de s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    "swarm_http_request_duration_seconds", "Latência das requisições HTTP.",
+    ["method", "path", "status"], buckets=LATENCY_BUCKETS
+)
+GRAPH_LATENCY = Histogram(
+    "swarm_graph_duration_seconds", "Latência de uma execução completa do grafo.",
+    buckets=LATENCY_BUCKETS
+)
+NODE_LATENCY = Histogram(
+    "swarm_node_duration_seconds", "Latência por nó do grafo.",
+    ["node"], buckets=LATENCY_BUCKETS
+)
+LLM_CALLS = Counter(
+    "swarm_llm_calls_total", "Chamadas ao LLM por nó e status.",
+    ["node", "status"]
+)
+LLM_LATENCY = Histogram(
+    "swarm_llm_call_duration_seconds", "Latência das chamadas ao LLM por nó.",
+    ["node"], buckets=LATENCY_BUCKETS
+)
+TOOL_LATENCY = Histogram(
+    "swarm_tool_call_duration_seconds", "Latência das chamadas de ferramentas.",
+    ["tool", "status"], buckets=LATENCY_BUCKETS
+)
+ROUTES = Counter(
+    "swarm_route_total", "Distribuição das rotas decididas pelo Router.",
+    ["route"]
+)
+ERRORS = Counter(
+    "swarm_errors_total", "Erros por componente.",
+    ["component", "name"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "swarm_admission_in_flight", "Execuções do grafo em andamento.",
+    multiprocess_mode="livesum"
+)
+ADMISSION_QUEUED = Gauge(
+    "swarm_admission_queued", "Requisições aguardando vaga no controle de admissão.",
+    multiprocess_mode="livesum"
+)
+
+CHECKPOINT_EVICTIONS = Counter(
+    "swarm_checkpoint_evictions_total", "Threads removidas do checkpointer (LRU/TTL em memória, TTL no SQLite).",
+    ["reason"]
+)
+CHECKPOINT_THREADS = Gauge(
+    "swarm_checkpoint_threads", "Threads residentes no checkpointer em memória.",
+    multiprocess_mode="livesum"
+)
+
+SPECULATIVE_RETRIEVALS = Counter(
+    "swarm_speculative_retrievals_total",
+    "Buscas RAG especulativas por desfecho (started, hit, wasted_route, wasted_unused, expired).",
+    ["outcome"]
+)
+
+ROUTE_CACHE_LOOKUPS = Counter(
+    "swarm_route_cache_lookups_total", "Consultas ao cache de decisões do Router (hit, miss).",
+    ["result"]
+)
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "swarm_semantic_cache_lookups_total", "Consultas ao cache semântico de respostas (hit, miss).",
+    ["result"]
+)
+SEMANTIC_CACHE_SAVED_SECONDS = Counter(
+    "swarm_semantic_cache_saved_seconds_total", "Latência estimada economizada pelos acertos do cache semântico."
+)
+SEMANTIC_CACHE_INVALIDATIONS = Counter(
+    "swarm_semantic_cache_invalidations_total", "Invalidações do cache semântico por reconstrução do índice."
+)
+INTENT_FAST_PATH = Counter(
+    "swarm_intent_fast_path_total",
+    "Desfecho do classificador local do Router (hit, ambiguous, unavailable).",
+    ["outcome"]
+)
+INTENT_AGREEMENT = Counter(
+    "swarm_intent_agreement_total",
+    "Concordância entre o classificador local e o LLM (confidence: high=amostra shadow, low=ambíguas).",
+    ["confidence", "result"]
+)
+
+LLM_RESILIENCE_EVENTS = Counter(
+    "swarm_llm_resilience_events_total",
+    "Eventos de resiliência do cliente LLM (retry, hedge_fired, hedge_won, deadline, circuit_opened, circuit_rejected).",
+    ["event"]
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "swarm_llm_circuit_state", "Estado do circuit breaker do LLM (0=fechado, 1=half-open, 2=aberto).",
+    multiprocess_mode="livemax"
+)
+
+# Contabilidade de tokens (por usuário: GET /api/tokens, evitando cardinalidade alta)
+LLM_TOKENS = Counter(
+    "swarm_llm_tokens_total",
+    "Tokens das chamadas ao LLM por nó (kind: prompt/completion; source: provider/estimate).",
+    ["node", "kind", "source"]
+)
+ROUTE_TOKENS = Counter(
+    "swarm_route_tokens_total", "Tokens consumidos por requisição, agregados pela rota final.", ["route", "kind"]
+)
+TOKEN_BUDGET_DEGRADATIONS = Counter(
+    "swarm_token_budget_degradations_total",
+    "Degradações aplicadas para respeitar o orçamento de tokens (trim_history, trim_context, skip_personality).",
+    ["action"]
+)
+TOKEN_BUDGET_EXCEEDED = Counter(
+    "swarm_token_budget_exceeded_total", "Requisições que ultrapassaram o orçamento mesmo após as degradações."
+)
+
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "swarm_embedding_cache_lookups_total",
+    "Consultas ao cache de embeddings (hit, miss ou shared = cálculo simultâneo reaproveitado).",
+    ["result"]
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "swarm_embedding_batch_size", "Textos por forward pass do micro-batcher de embeddings.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler que converte eventos do LangChain/LangGraph em métricas.
+
+    Mantém apenas o instante de início de cada run ativa (indexado por run_id),
+    sendo seguro para compartilhamento entre execuções concorrentes.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[str, str, float]] = {}
+
+    def _start(self, run_id: UUID, kind: str, label: str):
+        self._runs[run_id] = (kind, label, time.perf_counter())
+
+    def _finish(self, run_id: UUID, status: str = "ok"):
+        entry = self._runs.pop(run_id, None)
+        if entry is None:
+            return
+
+        kind, label, start = entry
+        elapsed = time.perf_counter() - start
+
+        if kind == "graph":
+            GRAPH_LATENCY.observe(elapsed)
+        elif kind == "node":
+            NODE_LATENCY.labels(node=label).observe(elapsed)
+        elif kind == "llm":
+            LLM_CALLS.labels(node=label, status=status).inc()
+            LLM_LATENCY.labels(node=label).observe(elapsed)
+        elif kind == "tool":
+            TOOL_LATENCY.labels(tool=label, status=status).observe(elapsed)
+
+        if status != "ok":
+            ERRORS.labels(component=kind, name=label).inc()
+
+    # --- Grafo e nós ---
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, metadata: Optional[dict] = None, **kwargs: Any):
+        name = kwargs.get("name")
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._start(run_id, "graph", name or "graph")
+        elif node and name == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, status="error")
+
+    # --- LLM ---
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID,
+                            metadata: Optional[dict] = None, **kwargs: Any):
+        self._start(run_id, "llm", (metadata or {}).get("langgraph_node", "unknown"))
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, status="error")
+
+    # --- Ferramentas ---
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id, "tool", kwargs.get("name") or (serialized or {}).get("name", "unknown"))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, status="error")
+
+# Instância compartilhada, injetada no config de cada execução do grafo
+metrics_handler = MetricsCallbackHandler()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Gera o payload no formato de exposição textual do Prometheus.
+
+    Returns:
+        tuple: Corpo da resposta e respectivo content-type.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def mark_worker_stopped():
+    """Remove os gauges "live" deste worker do diretório multiprocesso (no shutdown)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,453 @@
+"""
+Resiliência das chamadas ao LLM (cliente compartilhado entre os agentes).
+
+O `ResilientChatModel` envolve o chat model do provedor e aplica em cada chamada:
+    - Prazo por nó (`LLM_NODE_DEADLINES`, padrão `LLM_DEADLINE`): a chamada é
+      abandonada ao atingir o prazo, em vez de manter a requisição aberta.
+    - Hedging: se a resposta não chegar em `LLM_HEDGE_DELAY` segundos (o p95
+      observado do provedor), uma requisição duplicada é disparada e a primeira
+      a concluir é utilizada.
+    - Retentativas limitadas (`LLM_MAX_RETRIES`) com backoff exponencial e
+      jitter, sempre dentro do prazo do nó e apenas para erros transitórios
+      conhecidos (timeout e conexão do cliente HTTP, 408/409/429 e 5xx). Erros
+      de programação ou de requisição (400, KeyError, cassette) não são repetidos.
+    - Circuit breaker: após `LLM_CIRCUIT_FAILURE_THRESHOLD` requisições
+      consecutivas com falha transitória (cada requisição conta uma vez,
+      independentemente das retentativas) o circuito abre por
+      `LLM_CIRCUIT_RESET_TIMEOUT` segundos e as chamadas falham imediatamente
+      (`CircuitOpenError`); o Router passa a encaminhar para `fallback`. Ao fim
+      do intervalo, uma única chamada de teste (half-open) decide se o circuito
+      fecha. Toda requisição registra um desfecho ao terminar: a chamada de
+      teste encerrada por erro não transitório ou cancelamento reabre o circuito.
+
+No streaming, retentativas valem apenas até o primeiro token (depois disso a
+resposta já foi parcialmente entregue) e não há hedging. Na variante síncrona,
+requisições abandonadas (prazo ou hedge perdedor) terminam em segundo plano,
+limitadas pelo timeout do próprio cliente HTTP.
+"""
+import time
+import random
+import asyncio
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import groq
+import httpx
+from pydantic import Field, PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables.config import ContextThreadPoolExecutor, var_child_runnable_config
+from app.core.metrics import LLM_RESILIENCE_EVENTS, LLM_CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+
+# Códigos HTTP que indicam falha transitória do provedor
+RETRYABLE_STATUS = {408, 409, 429}
+
+# Exceções de timeout/conexão (cliente do provedor, httpx e asyncio)
+TRANSIENT_ERRORS = (
+    TimeoutError, asyncio.TimeoutError, ConnectionError, groq.APIConnectionError,
+    httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError
+)
+
+class LLMUnavailableError(Exception):
+    """Erro base: o provedor do LLM não respondeu de forma utilizável."""
+
+class CircuitOpenError(LLMUnavailableError):
+    """Circuito aberto: chamadas rejeitadas sem consultar o provedor."""
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """O prazo do nó para a chamada ao LLM foi excedido."""
+
+def parse_node_deadlines(spec: str) -> Dict[str, float]:
+    """
+    Interpreta prazos por nó no formato "router=8,knowledge_agent=25".
+
+    Args:
+        spec (str): Especificação vinda da variável de ambiente.
+
+    Returns:
+        Dict[str, float]: Prazo (s) por nome de nó; entradas inválidas são ignoradas.
+    """
+    deadlines = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        node, _, value = item.partition("=")
+        try:
+            deadlines[node.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Prazo de LLM inválido ignorado: '{item}'")
+    return deadlines
+
+def is_retryable(error: BaseException) -> bool:
+    """Apenas timeouts/erros de conexão conhecidos ou status HTTP transitório (408/409/429/5xx)."""
+    if isinstance(error, LLMUnavailableError):
+        return False
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status in RETRYABLE_STATUS or status >= 500)
+
+class CircuitBreaker:
+    """
+    Circuit breaker por falhas consecutivas (closed -> open -> half-open).
+
+    Args:
+        failure_threshold (int): Falhas consecutivas que abrem o circuito (0 desativa).
+        reset_timeout (float): Tempo (s) em aberto antes da chamada de teste.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_open(self) -> bool:
+        """Indica se as chamadas seriam rejeitadas agora (sem contar a chamada de teste)."""
+        with self._lock:
+            return self._state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def before_call(self) -> bool:
+        """
+        Autoriza uma chamada ao provedor.
+
+        Returns:
+            bool: True se a chamada é a chamada de teste (half-open).
+
+        Raises:
+            CircuitOpenError: Circuito aberto ou chamada de teste já em andamento.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+
+        LLM_RESILIENCE_EVENTS.labels(event="circuit_rejected").inc()
+        raise CircuitOpenError("Provedor do LLM indisponível (circuito aberto).")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != self.CLOSED:
+                logger.info("Circuito do LLM fechado: provedor respondeu normalmente.")
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.failure_threshold <= 0:
+                return
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.error(f"Circuito do LLM aberto | Falhas consecutivas: {self._failures}")
+                    LLM_RESILIENCE_EVENTS.labels(event="circuit_opened").inc()
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def release(self, probe: bool):
+        """
+        Encerra uma chamada sem desfecho conclusivo (erro não transitório ou cancelamento).
+
+        Não conta como falha no circuito fechado; a chamada de teste, porém,
+        reabre o circuito para que outra seja feita após `reset_timeout`.
+        """
+        if not probe:
+            return
+        with self._lock:
+            if self._probing and self._state == self.HALF_OPEN:
+                logger.warning("Chamada de teste do circuito do LLM encerrada sem resposta; circuito reaberto.")
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+            self._probing = False
+
+    def _set_state(self, state: str):
+        self._state = state
+        LLM_CIRCUIT_STATE.set({self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[state])
+
+class _Deadline:
+    """Prazo absoluto de uma chamada (incluindo hedges e retentativas)."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+def current_node(run_manager: Any) -> Optional[str]:
+    """Nó do grafo que originou a chamada (metadata do run ou config do contexto)."""
+    metadata = getattr(run_manager, "metadata", None) or {}
+    if "langgraph_node" not in metadata:
+        metadata = (var_child_runnable_config.get() or {}).get("metadata", {})
+    return metadata.get("langgraph_node")
+
+def _consume_exception(future):
+    # Evita avisos de exceção não recuperada em hedges/tentativas abandonados
+    if not future.cancelled():
+        future.exception()
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Chat model que delega ao provedor aplicando prazos, hedging, retentativas e circuit breaker.
+
+    As chamadas ao provedor são feitas diretamente (`_generate`/`_agenerate`),
+    sem callbacks próprios: métricas e streaming de tokens enxergam uma única
+    chamada por invocação, independentemente de hedges e retentativas.
+
+    Attributes:
+        delegate (BaseChatModel): Chat model do provedor.
+        breaker (CircuitBreaker): Circuit breaker compartilhado.
+        deadline (float): Prazo padrão (s) por chamada.
+        node_deadlines (Dict[str, float]): Prazos específicos por nó do grafo.
+        hedge_delay (float): Espera (s) antes da requisição duplicada (0 desativa).
+        max_retries (int): Retentativas após a primeira tentativa.
+        retry_backoff (float): Base (s) do backoff exponencial.
+        retry_backoff_max (float): Teto (s) do backoff.
+        executor_workers (int): Threads para chamadas síncronas (prazo e hedging).
+    """
+    delegate: BaseChatModel
+    breaker: CircuitBreaker = Field(default_factory=CircuitBreaker)
+    deadline: float = 30.0
+    node_deadlines: Dict[str, float] = Field(default_factory=dict)
+    hedge_delay: float = 0.0
+    max_retries: int = 2
+    retry_backoff: float = 0.25
+    retry_backoff_max: float = 2.0
+    executor_workers: int = 16
+
+    _executor: Optional[ContextThreadPoolExecutor] = PrivateAttr(default=None)
+    _executor_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.delegate._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"delegate": self.delegate._identifying_params, "deadline": self.deadline}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Formata as ferramentas como o provedor e as vincula a este wrapper."""
+        return self.bind(**self.delegate.bind_tools(tools, **kwargs).kwargs)
+
+    def _deadline_for(self, run_manager: Any) -> _Deadline:
+        return _Deadline(self.node_deadlines.get(current_node(run_manager), self.deadline))
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: espalha as retentativas de requisições concorrentes
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * 2 ** attempt))
+
+    def _retry_delay(self, error: BaseException, attempt: int, deadline: _Deadline) -> Optional[float]:
+        """Espera até a próxima tentativa (None encerra com o erro)."""
+        if not is_retryable(error) or attempt >= self.max_retries:
+            return None
+        delay = self._backoff(attempt)
+        if delay >= deadline.remaining():
+            return None
+        LLM_RESILIENCE_EVENTS.labels(event="retry").inc()
+        logger.warning(f"Falha transitória no LLM; nova tentativa em {delay:.2f}s: {error}")
+        return delay
+
+    def _settle(self, probe: bool, error: Optional[BaseException]):
+        """Registra o desfecho da requisição no circuit breaker (uma vez, em toda saída)."""
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, LLMDeadlineExceeded) or is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release(probe)
+
+    # --- Síncrono ---
+    def _get_executor(self) -> ContextThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ContextThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix="llm-call")
+            return self._executor
+
+    def _hedged(self, messages: List[BaseMessage], stop: Optional[List[str]], deadline: _Deadline,
+                **kwargs: Any) -> ChatResult:
+        executor = self._get_executor()
+        submit = lambda: executor.submit(self.delegate._generate, messages, stop=stop, **kwargs)
+        first = submit()
+        pending = {first}
+
+        if 0 < self.hedge_delay < deadline.remaining():
+            done, _ = wait(pending, timeout=self.hedge_delay)
+            if not done:
+                LLM_RESILIENCE_EVENTS.labels(event="hedge_fired").inc()
+                pending.add(submit())
+
+        return self._first_success(pending, first, deadline)
+
+    def _first_success(self, pending: set, first: Future, deadline: _Deadline) -> ChatResult:
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        LLM_RESILIENCE_EVENTS.labels(event="hedge_won").inc()
+                    for other in pending:
+                        other.add_done_callback(_consume_exception)
+                    return future.result()
+                error = future.exception()
+
+        for future in pending:
+            future.add_done_callback(_consume_exception)
+        if error is not None and not pending:
+            raise error
+        raise LLMDeadlineExceeded("Prazo da chamada ao LLM excedido.")
+
+    def _retrying(self, messages: List[BaseMessage], stop: Optional[List[str]], deadline: _Deadline,
+                  **kwargs: Any) -> ChatResult:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._hedged(messages, stop, deadline, **kwargs)
+            except LLMDeadlineExceeded:
+                LLM_RESILIENCE_EVENTS.labels(event="deadline").inc()
+                raise
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        deadline = self._deadline_for(run_manager)
+        probe = self.breaker.before_call()
+        try:
+            result = self._retrying(messages, stop, deadline, **kwargs)
+        except BaseException as e:
+            self._settle(probe, e)
+            raise
+        self._settle(probe, None)
+        return result
+
+    # --- Assíncrono ---
+    async def _ahedged(self, messages: List[BaseMessage], stop: Optional[List[str]], deadline: _Deadline,
+                       **kwargs: Any) -> ChatResult:
+        def submit() -> asyncio.Task:
+            task = asyncio.ensure_future(self.delegate._agenerate(messages, stop=stop, **kwargs))
+            task.add_done_callback(_consume_exception)
+            return task
+
+        first = submit()
+        pending = {first}
+        try:
+            if 0 < self.hedge_delay < deadline.remaining():
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_delay)
+                if not done:
+                    LLM_RESILIENCE_EVENTS.labels(event="hedge_fired").inc()
+                    pending.add(submit())
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=deadline.remaining(),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise LLMDeadlineExceeded("Prazo da chamada ao LLM excedido.")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            LLM_RESILIENCE_EVENTS.labels(event="hedge_won").inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _aretrying(self, messages: List[BaseMessage], stop: Optional[List[str]], deadline: _Deadline,
+                         **kwargs: Any) -> ChatResult:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._ahedged(messages, stop, deadline, **kwargs)
+            except LLMDeadlineExceeded:
+                LLM_RESILIENCE_EVENTS.labels(event="deadline").inc()
+                raise
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        deadline = self._deadline_for(run_manager)
+        probe = self.breaker.before_call()
+        try:
+            result = await self._aretrying(messages, stop, deadline, **kwargs)
+        except BaseException as e:
+            self._settle(probe, e)
+            raise
+        self._settle(probe, None)
+        return result
+
+    async def _afirst_chunk(self, messages: List[BaseMessage], stop: Optional[List[str]], deadline: _Deadline,
+                            **kwargs: Any) -> Tuple[Optional[AsyncIterator[ChatGenerationChunk]], Optional[ChatGenerationChunk]]:
+        """Abre o stream e aguarda o primeiro chunk, com retentativas (stream None se vazio)."""
+        for attempt in range(self.max_retries + 1):
+            stream = self.delegate._astream(messages, stop=stop, **kwargs)
+            try:
+                return stream, await asyncio.wait_for(stream.__anext__(), timeout=deadline.remaining())
+            except StopAsyncIteration:
+                return None, None
+            except asyncio.TimeoutError:
+                await stream.aclose()
+                LLM_RESILIENCE_EVENTS.labels(event="deadline").inc()
+                raise LLMDeadlineExceeded("Prazo da chamada ao LLM excedido.")
+            except Exception as e:
+                await stream.aclose()
+                delay = self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        deadline = self._deadline_for(run_manager)
+        probe = self.breaker.before_call()
+        try:
+            stream, first = await self._afirst_chunk(messages, stop, deadline, **kwargs)
+        except BaseException as e:
+            self._settle(probe, e)
+            raise
+        self._settle(probe, None)
+        if stream is None:
+            return
+
+        yield first
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=deadline.remaining())
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    LLM_RESILIENCE_EVENTS.labels(event="deadline").inc()
+                    raise LLMDeadlineExceeded("Prazo da chamada ao LLM excedido durante o streaming.")
+                yield chunk
+        finally:
+            await stream.aclose()
@@ -0,0 +1,93 @@
+"""
+Recuperação especulativa (RAG) em paralelo à classificação do Router.
+
+Com `SPECULATIVE_RAG=true`, o Router dispara `query_rag` sobre a mensagem do
+usuário ao mesmo tempo em que consulta o LLM de roteamento. O resultado fica
+registrado por turno (sessão + ID da mensagem) e é consumido pelo agente de
+conhecimento quando este decide consultar a base; nos demais casos é
+descartado. As métricas `swarm_speculative_retrievals_total{outcome}` permitem
+avaliar a taxa de acerto e o custo das buscas desperdiçadas.
+"""
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from app.core.config import SPECULATIVE_RAG, SPECULATIVE_RAG_WORKERS, SPECULATIVE_RAG_TTL
+from app.core.metrics import SPECULATIVE_RETRIEVALS
+from app.core.vector_store import query_rag
+
+logger = logging.getLogger(__name__)
+
+def speculation_key(state: dict) -> str:
+    """Identifica o turno atual (sessão + mensagem do usuário)."""
+    return f"{state.get('user_id', '')}:{state['messages'][-1].id}"
+
+class SpeculativeRetriever:
+    """
+    Registro de buscas antecipadas, indexadas por turno.
+
+    Entradas não consumidas (ex.: execução interrompida) expiram após `ttl`
+    segundos e são contabilizadas como desperdício.
+
+    Args:
+        retrieve (Callable): Função de busca (padrão: `query_rag`).
+        max_workers (int): Threads dedicadas às buscas especulativas.
+        ttl (float): Tempo máximo de retenção de um resultado não consumido.
+    """
+
+    def __init__(self, retrieve: Callable[[str], str] = query_rag,
+                 max_workers: int = SPECULATIVE_RAG_WORKERS, ttl: float = SPECULATIVE_RAG_TTL):
+        self.retrieve = retrieve
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative-rag")
+        self._pending: Dict[str, Tuple[Future, float]] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        expired = [key for key, (_, created) in self._pending.items() if now - created > self.ttl]
+        for key in expired:
+            future, _ = self._pending.pop(key)
+            future.cancel()
+            SPECULATIVE_RETRIEVALS.labels(outcome="expired").inc()
+
+    def start(self, key: str, query: str):
+        """Dispara a busca antecipada para o turno."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._pending:
+                return
+            self._pending[key] = (self._executor.submit(self.retrieve, query), now)
+        SPECULATIVE_RETRIEVALS.labels(outcome="started").inc()
+
+    def claim(self, key: str) -> Optional[Future]:
+        """Retira o resultado antecipado do turno (None se não houver)."""
+        with self._lock:
+            entry = self._pending.pop(key, None)
+        return entry[0] if entry else None
+
+    def discard(self, key: str, reason: str = "route"):
+        """Descarta a busca do turno, contabilizando o desperdício."""
+        future = self.claim(key)
+        if future is not None:
+            self.record_waste(future, reason)
+
+    def record_hit(self):
+        SPECULATIVE_RETRIEVALS.labels(outcome="hit").inc()
+
+    def record_waste(self, future: Future, reason: str):
+        future.cancel()
+        SPECULATIVE_RETRIEVALS.labels(outcome=f"wasted_{reason}").inc()
+
+speculative_retriever = SpeculativeRetriever()
+
+def start_speculation(state: dict):
+    """Inicia a busca antecipada do turno, se o modo especulativo estiver ativo."""
+    if SPECULATIVE_RAG:
+        speculative_retriever.start(speculation_key(state), state["messages"][-1].content)
+
+def resolve_speculation(state: dict, route: str):
+    """Descarta a busca antecipada quando a rota não é o agente de conhecimento."""
+    if SPECULATIVE_RAG and route != "knowledge_agent":
+        speculative_retriever.discard(speculation_key(state), reason="route")
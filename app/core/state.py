@@ -11,9 +11,15 @@ class AgentState(TypedDict):
         next_agent (str): Próximo nó a ser executado no grafo.
         final_response (str): Texto final gerado para ser enviado ao usuário.
         retry_count (int): Contador para controle de loops e handoff.
+        history_summary (str): Resumo incremental dos turnos fora da janela recente.
+        summarized_until (str): ID da última mensagem já incorporada ao resumo.
+        answer_cached (bool): Indica resposta reutilizada do cache semântico (knowledge_agent).
     """
     messages: Annotated[list, add_messages]
     user_id: str
     next_agent: str
     final_response: str
-    retry_count: int
\ No newline at end of file
+    retry_count: int
+    history_summary: str
+    summarized_until: str
+    answer_cached: bool
\ No newline at end of file
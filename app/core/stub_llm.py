@@ -0,0 +1,125 @@
+"""
+LLM simulado (Stub) para execuções offline.
+
+Reproduz de forma determinística o comportamento esperado pelos nós do grafo
+(classificação de rota, chamada de ferramentas e geração de texto), com
+latência configurável. Utilizado em warm-up, benchmarks e testes de carga sem
+consumir cota do provedor.
+"""
+import json
+import time
+import uuid
+import asyncio
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Heurísticas de roteamento (ordem de precedência)
+ROUTE_KEYWORDS = [
+    ("human_handoff", ["humano", "atendente", "pessoa real"]),
+    ("support_agent", ["saldo", "conta", "pix", "erro", "falh", "transfer", "extrato", "bloque"]),
+    ("knowledge_agent", ["taxa", "como", "quanto", "qual", "quais", "preço", "maquininha", "?"]),
+]
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model determinístico compatível com a interface usada pelos agentes.
+
+    Regras de resposta:
+        - Prompt do Router: retorna o nome da rota com base em palavras-chave.
+        - Ferramentas vinculadas sem resultado prévio: emite uma tool call.
+        - Prompt do Editor (personalidade): devolve o texto original.
+        - Demais casos: resposta simulada ecoando pergunta e dados recuperados.
+
+    Attributes:
+        latency_ms (float): Latência simulada por chamada, em milissegundos.
+    """
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Vincula ferramentas no formato OpenAI, como os provedores reais."""
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[list] = None) -> AIMessage:
+        """Constrói a resposta simulada a partir das mensagens recebidas."""
+        system_text = " ".join(str(m.content) for m in messages if isinstance(m, SystemMessage))
+        human_msgs = [m for m in messages if isinstance(m, HumanMessage)]
+        question = str(human_msgs[-1].content) if human_msgs else str(messages[-1].content)
+
+        if "ROTAS DISPONÍVEIS" in system_text:
+            lowered = question.lower()
+            for route, keywords in ROUTE_KEYWORDS:
+                if any(k in lowered for k in keywords):
+                    return AIMessage(content=route)
+            return AIMessage(content="fallback")
+
+        if "TEXTO ORIGINAL:" in question:
+            return AIMessage(content=question.split("TEXTO ORIGINAL:", 1)[1].strip())
+
+        # Primeira passada do especialista: solicita a ferramenta principal
+        tool_results = [m for m in messages if isinstance(m, SystemMessage) and m is not messages[0]]
+        if tools and not tool_results:
+            spec = tools[0]["function"]
+            params = spec.get("parameters", {}).get("properties", {})
+            args = {name: question for name in params if name != "user_id"}
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": spec["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}]
+            )
+
+        data = " ".join(str(m.content) for m in tool_results)
+        return AIMessage(content=f"Resposta simulada para: {question} {data}".strip())
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        message = self._respond(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        message = self._respond(messages, kwargs.get("tools"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, run_manager, **kwargs)
+        yield from self._to_chunks(result.generations[0].message, run_manager)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        result = await self._agenerate(messages, stop, None, **kwargs)
+        for chunk in self._to_chunks(result.generations[0].message, None):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    @staticmethod
+    def _to_chunks(message: AIMessage, run_manager: Any) -> Iterator[ChatGenerationChunk]:
+        """Fragmenta a resposta em tokens (palavras) para simular streaming."""
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                    for i, c in enumerate(message.tool_calls)
+                ]
+            ))
+            return
+
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == len(words) - 1 else f"{word} "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,49 @@
+"""
+Normalização de texto compartilhada (guardrails, caches e chaves de busca).
+
+Aplica decomposição Unicode de compatibilidade (NFKD), remove acentos
+(marcas combinantes), converte para minúsculas (casefold) e colapsa espaços,
+de forma que "Instruções", "INSTRUCOES" e "instrucoes" resultem no mesmo texto.
+"""
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+def fold_accents(text: str) -> str:
+    """
+    Remove acentos e diacríticos preservando as letras base.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto sem marcas combinantes.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza o texto para comparações insensíveis a caixa, acentos e espaços.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto normalizado.
+    """
+    return _WHITESPACE.sub(" ", fold_accents(text).casefold()).strip()
+
+def normalize_key(text: str) -> str:
+    """
+    Forma canônica para chaves de cache: além de `normalize_text`, remove pontuação.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Chave normalizada (ex.: "Qual meu saldo?!" -> "qual meu saldo").
+    """
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", normalize_text(text))).strip()
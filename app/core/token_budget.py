@@ -0,0 +1,212 @@
+"""
+Contabilidade de tokens e orçamento por requisição.
+
+Cada execução do grafo recebe um `TokenLedger` nos callbacks: ele soma os
+tokens de prompt e de resposta de todas as chamadas ao LLM (router, decisão de
+ferramentas, resposta, personalidade e resumo do histórico), por nó, usando o
+`usage_metadata` do provedor quando disponível e a estimativa do `tiktoken`
+caso contrário.
+
+Com orçamento definido (`TOKEN_BUDGET_PER_REQUEST` ou `token_budget` no
+payload), os nós consultam o saldo via `token_allowance`/`can_afford` e
+degradam de forma gradual em vez de ultrapassá-lo: janela de histórico menor
+(sem resumo), contexto das ferramentas truncado e, por fim, tom de voz aplicado
+sem a reescrita do Editor. Os totais voltam na resposta da API (`usage`) e são
+agregados por nó e rota (Prometheus) e por usuário (`GET /api/tokens`).
+"""
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import var_child_runnable_config
+from app.core.config import TOKEN_USAGE_MAX_USERS
+from app.core.metrics import LLM_TOKENS, ROUTE_TOKENS, TOKEN_BUDGET_DEGRADATIONS, TOKEN_BUDGET_EXCEEDED
+from app.core.tokens import count_message_tokens, count_tokens
+
+logger = logging.getLogger(__name__)
+
+class TokenLedger(BaseCallbackHandler):
+    """
+    Callback handler que contabiliza os tokens de uma requisição.
+
+    Args:
+        budget (Optional[int]): Orçamento total de tokens (None = ilimitado).
+    """
+    run_inline = True
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget or None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.by_node: Dict[str, int] = defaultdict(int)
+        self.degradations: List[str] = []
+        self._pending: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def remaining(self) -> Optional[int]:
+        """Saldo do orçamento (None quando não há orçamento)."""
+        if self.budget is None:
+            return None
+        return self.budget - self.total_tokens
+
+    def degrade(self, action: str):
+        """Registra uma degradação aplicada para respeitar o orçamento."""
+        with self._lock:
+            if action in self.degradations:
+                return
+            self.degradations.append(action)
+        TOKEN_BUDGET_DEGRADATIONS.labels(action=action).inc()
+        logger.info(f"Orçamento de tokens | Degradação: {action} | Saldo: {self.remaining()}")
+
+    def usage(self) -> dict:
+        """Totais da requisição no formato exposto pela API."""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "llm_calls": self.llm_calls,
+            "budget": self.budget,
+            "degraded": list(self.degradations),
+            "by_node": dict(self.by_node)
+        }
+
+    # --- Callbacks ---
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID,
+                            metadata: Optional[dict] = None, **kwargs: Any):
+        # Estimativa prévia do prompt (usada quando o provedor não informa usage)
+        node = (metadata or {}).get("langgraph_node", "unknown")
+        self._pending[run_id] = (node, count_message_tokens(messages[0]) if messages else 0)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        node, prompt_estimate = self._pending.pop(run_id, ("unknown", 0))
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        usage = getattr(message, "usage_metadata", None)
+
+        if usage:
+            prompt, completion, source = usage.get("input_tokens", 0), usage.get("output_tokens", 0), "provider"
+        else:
+            prompt, completion, source = prompt_estimate, count_tokens(getattr(generation, "text", "") or ""), "estimate"
+
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.llm_calls += 1
+            self.by_node[node] += prompt + completion
+
+        LLM_TOKENS.labels(node=node, kind="prompt", source=source).inc(prompt)
+        LLM_TOKENS.labels(node=node, kind="completion", source=source).inc(completion)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._pending.pop(run_id, None)
+
+def current_ledger() -> Optional[TokenLedger]:
+    """Ledger da execução corrente (callbacks do config propagado pelo LangGraph)."""
+    callbacks = (var_child_runnable_config.get() or {}).get("callbacks")
+    handlers = getattr(callbacks, "handlers", callbacks) or []
+    return next((h for h in handlers if isinstance(h, TokenLedger)), None)
+
+def token_allowance(default: Optional[int], share: float, floor: int) -> Optional[int]:
+    """
+    Limite de tokens para um trecho do prompt, considerando o saldo do orçamento.
+
+    Sem orçamento, retorna o limite padrão. Com orçamento, o limite passa a ser
+    a fração `share` do saldo (nunca abaixo de `floor`). Quem aplica o corte
+    registra a degradação com `record_degradation`.
+
+    Args:
+        default (Optional[int]): Limite sem orçamento (None = ilimitado).
+        share (float): Fração do saldo destinada ao trecho.
+        floor (int): Limite mínimo preservado.
+
+    Returns:
+        Optional[int]: Limite efetivo (None = ilimitado).
+    """
+    ledger = current_ledger()
+    remaining = ledger.remaining() if ledger else None
+    if remaining is None:
+        return default
+
+    limit = max(floor, int(remaining * share))
+    if default is not None and limit >= default:
+        return default
+    return limit
+
+def can_afford(tokens: int, action: str) -> bool:
+    """
+    Indica se uma etapa opcional cabe no saldo; caso contrário, registra a degradação.
+
+    Args:
+        tokens (int): Custo estimado da etapa (prompt + resposta).
+        action (str): Nome da degradação aplicada quando não couber.
+
+    Returns:
+        bool: True se não há orçamento ou se o saldo comporta a etapa.
+    """
+    ledger = current_ledger()
+    remaining = ledger.remaining() if ledger else None
+    if remaining is None or tokens <= remaining:
+        return True
+    ledger.degrade(action)
+    return False
+
+def record_degradation(action: str):
+    """Registra uma degradação na requisição corrente (se houver ledger)."""
+    ledger = current_ledger()
+    if ledger is not None:
+        ledger.degrade(action)
+
+class TokenAccounting:
+    """
+    Agregado em memória do consumo por rota e por usuário (LRU de usuários).
+
+    Args:
+        max_users (int): Quantidade máxima de usuários mantidos.
+    """
+
+    def __init__(self, max_users: int = TOKEN_USAGE_MAX_USERS):
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._routes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, user_id: str, route: str, ledger: TokenLedger):
+        """Consolida o consumo de uma requisição concluída."""
+        ROUTE_TOKENS.labels(route=route, kind="prompt").inc(ledger.prompt_tokens)
+        ROUTE_TOKENS.labels(route=route, kind="completion").inc(ledger.completion_tokens)
+        if ledger.budget is not None and ledger.total_tokens > ledger.budget:
+            TOKEN_BUDGET_EXCEEDED.inc()
+            logger.warning(f"Orçamento de tokens excedido | User ID: {user_id} | Total: {ledger.total_tokens}/{ledger.budget}")
+
+        with self._lock:
+            for totals in (self._users.setdefault(user_id, defaultdict(int)), self._routes[route]):
+                totals["requests"] += 1
+                totals["prompt_tokens"] += ledger.prompt_tokens
+                totals["completion_tokens"] += ledger.completion_tokens
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def snapshot(self, top: int = 20) -> dict:
+        """Totais por rota e os usuários de maior consumo."""
+        with self._lock:
+            users = [(user, dict(totals)) for user, totals in self._users.items()]
+            routes = {route: dict(totals) for route, totals in self._routes.items()}
+
+        users.sort(key=lambda item: item[1]["prompt_tokens"] + item[1]["completion_tokens"], reverse=True)
+        return {"routes": routes, "top_users": [{"user_id": user, **totals} for user, totals in users[:top]]}
+
+    def clear(self):
+        """Zera os totais acumulados."""
+        with self._lock:
+            self._users.clear()
+            self._routes.clear()
+
+token_accounting = TokenAccounting()
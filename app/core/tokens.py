@@ -0,0 +1,87 @@
+"""
+Contagem de tokens para controle de contexto e custos.
+
+Utiliza o `tiktoken` (encoding cl100k_base) como estimativa; o tokenizer do
+modelo servido pela Groq difere ligeiramente, mas a proporção é estável o
+suficiente para limites de janela e orçamento. Caso o encoding não esteja
+disponível (ambiente sem rede e sem cache local), aplica a heurística de
+~4 caracteres por token.
+"""
+import logging
+from functools import lru_cache
+from typing import Iterable, Optional
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_ENCODING = "cl100k_base"
+
+# Tokens extras por mensagem (papel e delimitadores do template de chat)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+@lru_cache(maxsize=1)
+def get_encoding() -> Optional[tiktoken.Encoding]:
+    """
+    Carrega e armazena em cache o encoding do tiktoken.
+
+    Returns:
+        Optional[tiktoken.Encoding]: Encoding carregado ou None se indisponível.
+    """
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning(f"Encoding '{TOKENIZER_ENCODING}' indisponível, usando estimativa por caracteres: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """
+    Conta (ou estima) os tokens de um texto.
+
+    Args:
+        text (str): Texto a ser medido.
+
+    Returns:
+        int: Quantidade de tokens.
+    """
+    if not text:
+        return 0
+
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(messages: Iterable) -> int:
+    """
+    Soma os tokens de uma lista de mensagens (LangChain Message objects).
+
+    Args:
+        messages (Iterable): Mensagens do histórico.
+
+    Returns:
+        int: Total de tokens, incluindo o overhead por mensagem.
+    """
+    return sum(count_tokens(str(m.content)) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Limita um texto à quantidade de tokens informada (corte no final).
+
+    Args:
+        text (str): Texto original.
+        max_tokens (int): Limite de tokens.
+
+    Returns:
+        str: Texto original, se couber, ou seu prefixo truncado.
+    """
+    if not text or max_tokens <= 0:
+        return ""
+
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,301 @@
+"""
+Rastreamento (tracing) opt-in por requisição, exportável para Chrome/Perfetto.
+
+Um `TraceRecorder` é anexado aos callbacks da execução do grafo somente quando
+a requisição traz o header `TRACE_HEADER` (ex.: `X-Trace: 1`) ou é sorteada
+por `TRACE_SAMPLE_RATE`. Ele registra spans aninhados para a execução do
+grafo, cada nó, cada chamada ao LLM (tokens e tamanho do prompt/resposta) e
+cada ferramenta (tamanho de entrada/saída). O conteúdo das mensagens não é
+armazenado, apenas tamanhos.
+
+Os traces concluídos ficam em memória (`TRACE_MAX_STORED`, os mais antigos são
+descartados) e podem ser exportados individualmente ou por janela de tempo no
+formato Chrome Trace Event (JSON), aberto em https://ui.perfetto.dev ou
+chrome://tracing. Cada requisição vira um processo; spans concorrentes (ex.:
+ferramentas em paralelo) são distribuídos em trilhas (threads) distintas.
+"""
+import time
+import uuid
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from app.core.config import TRACING_ENABLED, TRACE_SAMPLE_RATE, TRACE_MAX_STORED
+from app.core.tokens import count_tokens
+
+class Span:
+    """Intervalo registrado no trace (tempos em `perf_counter`)."""
+
+    __slots__ = ("span_id", "parent_id", "name", "category", "start", "end", "args")
+
+    def __init__(self, span_id: Any, parent_id: Any, name: str, category: str, start: float):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end: Optional[float] = None
+        self.args: Dict[str, Any] = {}
+
+def _message_chars(messages: Iterable) -> int:
+    return sum(len(str(m.content)) for m in messages)
+
+def _llm_usage(response: Any) -> Dict[str, Any]:
+    """Tokens da resposta (usage do provedor ou estimativa via tiktoken) e tamanhos."""
+    generation = response.generations[0][0] if response.generations and response.generations[0] else None
+    message = getattr(generation, "message", None)
+    text = getattr(generation, "text", "") or ""
+    attrs = {"completion_chars": len(text), "tool_calls": len(getattr(message, "tool_calls", None) or [])}
+
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        attrs.update(prompt_tokens=usage.get("input_tokens"), completion_tokens=usage.get("output_tokens"))
+    else:
+        attrs.update(completion_tokens=count_tokens(text), tokens_estimated=True)
+    return attrs
+
+class TraceRecorder(BaseCallbackHandler):
+    """
+    Callback handler que registra os spans de uma execução do grafo.
+
+    Args:
+        label (str): Rótulo do trace (ex.: user_id da requisição).
+    """
+    run_inline = True
+
+    def __init__(self, label: str = ""):
+        self.trace_id = uuid.uuid4().hex
+        self.label = label
+        self.created_at = time.time()
+        self._perf_origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._spans: Dict[Any, Span] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self.finished_at: Optional[float] = None
+
+    # --- API manual (spans fora do grafo, ex.: espera em filas) ---
+    def add_span(self, name: str, start: float, end: Optional[float] = None, category: str = "api", **args: Any):
+        """Registra um span já concluído (tempos em `perf_counter`)."""
+        span = Span(uuid.uuid4(), None, name, category, start)
+        span.end = end if end is not None else time.perf_counter()
+        span.args.update(args)
+        with self._lock:
+            self._spans[span.span_id] = span
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return sorted(self._spans.values(), key=lambda s: s.start)
+
+    # --- Registro interno ---
+    def _recorded_parent(self, parent_run_id: Optional[UUID]) -> Optional[UUID]:
+        # Sobe pela cadeia de runs até o ancestral mais próximo com span
+        while parent_run_id is not None and parent_run_id not in self._spans:
+            parent_run_id = self._parents.get(parent_run_id)
+        return parent_run_id
+
+    def _open(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, category: str, **args: Any):
+        with self._lock:
+            span = Span(run_id, self._recorded_parent(parent_run_id), name, category, time.perf_counter())
+            span.args.update(args)
+            self._spans[run_id] = span
+
+    def _close(self, run_id: UUID, error: Optional[BaseException] = None, **args: Any):
+        with self._lock:
+            span = self._spans.get(run_id)
+            if span is None:
+                return
+            span.end = time.perf_counter()
+            span.args.update(args)
+            if error is not None:
+                span.args.update(status="error", error=type(error).__name__)
+
+    # --- Grafo e nós ---
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, metadata: Optional[dict] = None, **kwargs: Any):
+        self._parents[run_id] = parent_run_id
+        name = kwargs.get("name")
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._open(run_id, None, name or "graph", "graph")
+        elif node and name == node:
+            self._open(run_id, parent_run_id, node, "node")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        route = outputs.get("next_agent") if isinstance(outputs, dict) else None
+        self._close(run_id, **({"next_agent": route} if route else {}))
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id, error)
+
+    # --- LLM ---
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, metadata: Optional[dict] = None, **kwargs: Any):
+        prompt = messages[0] if messages else []
+        self._open(
+            run_id, parent_run_id, "llm", "llm",
+            node=(metadata or {}).get("langgraph_node"),
+            prompt_messages=len(prompt),
+            prompt_chars=_message_chars(prompt),
+            prompt_tokens_estimate=sum(count_tokens(str(m.content)) for m in prompt)
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id, **_llm_usage(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id, error)
+
+    # --- Ferramentas ---
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs: Any):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._open(run_id, parent_run_id, name, "tool", input_chars=len(input_str or ""))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        content = getattr(output, "content", output)
+        self._close(run_id, output_chars=len(str(content)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._close(run_id, error)
+
+def _assign_lanes(spans: List[Span]) -> Dict[Any, int]:
+    """
+    Distribui os spans em trilhas de forma que cada trilha contenha apenas
+    spans aninhados (requisito do formato para exibir a hierarquia).
+    """
+    by_id = {s.span_id: s for s in spans}
+    lanes: List[List[Span]] = []
+    assigned: Dict[Any, int] = {}
+
+    def ancestors(span: Span) -> set:
+        result, parent = set(), span.parent_id
+        while parent is not None and parent in by_id:
+            result.add(parent)
+            parent = by_id[parent].parent_id
+        return result
+
+    for span in spans:
+        lineage = ancestors(span)
+        preferred = [assigned[span.parent_id]] if span.parent_id in assigned else []
+        for lane in preferred + list(range(len(lanes))):
+            stack = lanes[lane]
+            while stack and stack[-1].end <= span.start:
+                stack.pop()
+            if not stack or stack[-1].span_id in lineage:
+                break
+        else:
+            lanes.append([])
+            lane = len(lanes) - 1
+        lanes[lane].append(span)
+        assigned[span.span_id] = lane
+    return assigned
+
+def to_chrome_trace(recorders: Iterable[TraceRecorder]) -> dict:
+    """
+    Converte traces para o formato Chrome Trace Event (um processo por requisição).
+
+    Args:
+        recorders (Iterable[TraceRecorder]): Traces concluídos.
+
+    Returns:
+        dict: Documento JSON com `traceEvents`.
+    """
+    events: List[dict] = []
+    for pid, recorder in enumerate(recorders, start=1):
+        spans = [s for s in recorder.spans if s.end is not None]
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                       "args": {"name": f"{recorder.label} [{recorder.trace_id[:8]}]"}})
+        lanes = _assign_lanes(spans)
+        for tid in sorted(set(lanes.values())):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": "main" if tid == 0 else f"concorrente {tid}"}})
+
+        # Tempos relativos ao relógio de parede, para alinhar requisições distintas
+        origin_us = recorder.created_at * 1e6 - recorder._perf_origin * 1e6
+        for span in spans:
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X",
+                "ts": round(origin_us + span.start * 1e6, 3),
+                "dur": round((span.end - span.start) * 1e6, 3),
+                "pid": pid, "tid": lanes[span.span_id],
+                "args": dict(span.args, trace_id=recorder.trace_id)
+            })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+class TraceStore:
+    """
+    Armazena os traces concluídos mais recentes.
+
+    Args:
+        max_traces (int): Quantidade máxima mantida em memória.
+    """
+
+    def __init__(self, max_traces: int = TRACE_MAX_STORED):
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, TraceRecorder]" = OrderedDict()
+
+    def add(self, recorder: TraceRecorder):
+        with self._lock:
+            self._traces[recorder.trace_id] = recorder
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[TraceRecorder]:
+        with self._lock:
+            return self._traces.get(trace_id)
+
+    def window(self, seconds: float) -> List[TraceRecorder]:
+        """Traces concluídos nos últimos `seconds` segundos."""
+        threshold = time.time() - seconds
+        with self._lock:
+            return [r for r in self._traces.values() if (r.finished_at or 0) >= threshold]
+
+    def summaries(self) -> List[dict]:
+        with self._lock:
+            recorders = list(self._traces.values())
+        summaries = []
+        for recorder in reversed(recorders):
+            spans = recorder.spans
+            graph = next((s for s in spans if s.category == "graph"), None)
+            summaries.append({
+                "trace_id": recorder.trace_id,
+                "label": recorder.label,
+                "started_at": recorder.created_at,
+                "duration_ms": round(((recorder.finished_at or recorder.created_at) - recorder.created_at) * 1000, 1),
+                "route": graph.args.get("next_agent") if graph else None,
+                "spans": len(spans)
+            })
+        return summaries
+
+trace_store = TraceStore()
+
+def start_trace(label: str, requested: bool = False) -> Optional[TraceRecorder]:
+    """
+    Cria um recorder se a requisição pediu tracing ou foi sorteada pela amostragem.
+
+    Args:
+        label (str): Rótulo do trace (ex.: user_id).
+        requested (bool): Tracing solicitado explicitamente (header).
+
+    Returns:
+        Optional[TraceRecorder]: Recorder a ser anexado aos callbacks ou None.
+    """
+    if not TRACING_ENABLED:
+        return None
+    if requested or (TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE):
+        return TraceRecorder(label)
+    return None
+
+def finish_trace(recorder: Optional[TraceRecorder]):
+    """Conclui o trace e o disponibiliza para exportação."""
+    if recorder is None:
+        return
+    recorder.finish()
+    trace_store.add(recorder)
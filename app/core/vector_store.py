@@ -1,8 +1,50 @@
+"""
+Acesso à base vetorial (ChromaDB) com índices versionados e troca a quente.
+
+Layout do diretório de persistência:
+
+    chroma_db/
+        CURRENT                   # nome da versão ativa (substituído atomicamente)
+        versions/<versão>/        # índice completo + manifest.json
+
+A ingestão (`ingest_data.py`) constrói cada índice em um diretório temporário,
+grava o `manifest.json` (modelo de embeddings, parâmetros de chunking, data de
+construção) e o publica com `os.rename`, trocando o ponteiro `CURRENT` por
+último (`os.replace`). O processo da API mantém um único cliente Chroma para a
+versão ativa e verifica o ponteiro no máximo a cada
+`VECTOR_STORE_CHECK_INTERVAL` segundos: ao mudar, abre a nova versão e passa a
+servi-la sem reinício; consultas em andamento terminam no cliente anterior,
+liberado após `VECTOR_STORE_RETIRE_GRACE` segundos. Um índice parcialmente
+gravado nunca é servido.
+
+A publicação remove as versões além de `VECTOR_STORE_KEEP_VERSIONS`, exceto as
+que estiveram ativas nos últimos `VECTOR_STORE_PRUNE_GRACE` segundos (outros
+workers podem ainda servi-las até a próxima verificação do ponteiro); essas
+ficam para a publicação seguinte.
+
+Diretórios no formato antigo (índice direto em `chroma_db/`, sem `CURRENT`)
+continuam sendo servidos como versão legada.
+
+Cada versão também contém um índice plano em NumPy (`flat/`, ver
+`app.core.flat_index`). `VECTOR_STORE_BACKEND=flat` serve as buscas a partir
+dele (arquivos mapeados em memória, compartilhados entre workers pelo page
+cache); versões sem `flat/` continuam servidas pelo Chroma.
+"""
 import os
+import json
+import time
+import uuid
+import shutil
 import logging
+import threading
+from datetime import datetime, timezone
 from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.vectorstores import VectorStore
+from app.core.embeddings import CachedBatchedEmbeddings
+from app.core.flat_index import FlatVectorStore, has_flat_index
 
 logger = logging.getLogger(__name__)
 
@@ -11,31 +53,306 @@ PERSIST_DIRECTORY = "./chroma_db"
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 SEARCH_K = 4
 
+# Índices versionados: ponteiro da versão ativa, subdiretório das versões e manifesto
+CURRENT_POINTER = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+
+# Intervalo mínimo (s) entre verificações do ponteiro e versões mantidas após uma publicação
+CHECK_INTERVAL = float(os.getenv("VECTOR_STORE_CHECK_INTERVAL", "2"))
+KEEP_VERSIONS = int(os.getenv("VECTOR_STORE_KEEP_VERSIONS", "3"))
+# Espera (s) antes de liberar o cliente de uma versão substituída (consultas em andamento)
+RETIRE_GRACE = float(os.getenv("VECTOR_STORE_RETIRE_GRACE", "30"))
+# Versões ativas há menos que isso (s) não são removidas; deve superar CHECK_INTERVAL + RETIRE_GRACE
+PRUNE_GRACE = float(os.getenv("VECTOR_STORE_PRUNE_GRACE", "120"))
+
+# Backend das buscas: "chroma" (padrão) ou "flat" (índice NumPy mapeado em memória)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma").lower()
+
+# Marcador gravado por versões antigas do ingest_data.py (layout legado)
+INDEX_VERSION_FILE = "index_version"
+
 @lru_cache(maxsize=1)
-def get_embedding_function() -> HuggingFaceEmbeddings:
+def get_embedding_function() -> CachedBatchedEmbeddings:
     """
     Inicializa e armazena em cache o modelo de embeddings.
-    
+
+    As consultas passam pelo cache LRU e pelo micro-batcher compartilhados
+    pelo processo (`app.core.embeddings`).
+
     Returns:
-        HuggingFaceEmbeddings: Instância do modelo configurado.
+        CachedBatchedEmbeddings: Modelo configurado com cache de consultas.
     """
     logger.info(f"Carregando modelo de embeddings: {EMBEDDING_MODEL_NAME}")
-    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    return CachedBatchedEmbeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME))
+
+def _legacy_version(root: str) -> str:
+    """Versão de um índice no layout antigo (marcador ou data de modificação do banco)."""
+    try:
+        with open(os.path.join(root, INDEX_VERSION_FILE), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        pass
+
+    database = os.path.join(root, "chroma.sqlite3")
+    if os.path.exists(database):
+        return str(os.path.getmtime(database))
+    return ""
+
+def read_current(root: str = PERSIST_DIRECTORY) -> str:
+    """Nome da versão ativa ("" se não houver índice publicado)."""
+    try:
+        with open(os.path.join(root, CURRENT_POINTER), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def version_path(version: str, root: str = PERSIST_DIRECTORY) -> str:
+    """Diretório de uma versão do índice."""
+    return os.path.join(root, VERSIONS_DIR, version)
 
-def get_vectorstore() -> Chroma:
+def resolve_index(root: str = PERSIST_DIRECTORY) -> Tuple[str, str]:
     """
-    Recupera a instância do banco vetorial ChromaDB.
+    Localiza o índice ativo.
+
+    Args:
+        root (str): Diretório de persistência.
 
     Returns:
-        Chroma: Cliente conectado ao diretório de persistência.
+        tuple: (versão, diretório do índice); versão "" se não houver índice.
     """
-    if not os.path.exists(PERSIST_DIRECTORY):
-        logger.error(f"Diretório do banco vetorial não encontrado: {PERSIST_DIRECTORY}")
-    
-    return Chroma(
-        persist_directory=PERSIST_DIRECTORY,
-        embedding_function=get_embedding_function()
-    )
+    version = read_current(root)
+    if version:
+        return version, version_path(version, root)
+    return _legacy_version(root), root
+
+def read_manifest(version: str, root: str = PERSIST_DIRECTORY) -> dict:
+    """Manifesto de uma versão ({} se ausente ou inválido)."""
+    try:
+        with open(os.path.join(version_path(version, root), MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def list_versions(root: str = PERSIST_DIRECTORY) -> List[str]:
+    """Versões publicadas, da mais antiga para a mais recente."""
+    try:
+        entries = os.listdir(os.path.join(root, VERSIONS_DIR))
+    except OSError:
+        return []
+    return sorted(e for e in entries if not e.startswith(".") and os.path.isdir(version_path(e, root)))
+
+def new_build_directory(root: str = PERSIST_DIRECTORY) -> Tuple[str, str]:
+    """
+    Reserva o nome da próxima versão e um diretório temporário para construí-la.
+
+    Returns:
+        tuple: (versão, diretório temporário, invisível para a API até `publish_index`).
+    """
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+    build_dir = os.path.join(root, VERSIONS_DIR, f".build-{version}")
+    os.makedirs(build_dir)
+    return version, build_dir
+
+def _write_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _mark_active(version: str, root: str):
+    """Registra (mtime do diretório) que a versão esteve ativa até agora."""
+    try:
+        os.utime(version_path(version, root))
+    except OSError:
+        pass
+
+def activate_version(version: str, root: str = PERSIST_DIRECTORY):
+    """
+    Aponta `CURRENT` para uma versão já publicada (também usado para rollback).
+
+    A versão anterior e a nova têm o mtime do diretório atualizado: a remoção
+    de versões antigas respeita `PRUNE_GRACE` a partir desse instante.
+
+    Raises:
+        FileNotFoundError: Versão inexistente.
+    """
+    if not os.path.isdir(version_path(version, root)):
+        raise FileNotFoundError(f"Versão do índice não encontrada: {version}")
+    previous = read_current(root)
+    _write_atomic(os.path.join(root, CURRENT_POINTER), version)
+    for active in {previous, version} - {""}:
+        _mark_active(active, root)
+    logger.info(f"Índice vetorial ativo: {version}")
+
+def publish_index(version: str, build_dir: str, manifest: dict, root: str = PERSIST_DIRECTORY,
+                  keep: int = KEEP_VERSIONS, grace: float = PRUNE_GRACE):
+    """
+    Publica um índice construído em `build_dir` e o torna a versão ativa.
+
+    O manifesto é gravado antes da renomeação do diretório e o ponteiro só é
+    trocado com o diretório final completo. Versões antigas além de `keep` são
+    removidas (a ativa nunca é), exceto as ativas há menos de `grace` segundos.
+
+    Args:
+        version (str): Nome reservado por `new_build_directory`.
+        build_dir (str): Diretório temporário com o índice completo.
+        manifest (dict): Metadados da construção.
+        root (str): Diretório de persistência.
+        keep (int): Quantidade de versões mantidas para rollback.
+        grace (float): Segundos desde a última ativação antes que uma versão possa ser removida.
+    """
+    _write_atomic(os.path.join(build_dir, MANIFEST_FILE), json.dumps(dict(manifest, version=version), indent=2))
+    os.rename(build_dir, version_path(version, root))
+    activate_version(version, root)
+
+    now = time.time()
+    for old in list_versions(root)[:-keep] if keep > 0 else []:
+        if old == version:
+            continue
+        if now - os.path.getmtime(version_path(old, root)) < grace:
+            logger.info(f"Versão {old} ativa recentemente; remoção adiada para a próxima publicação.")
+            continue
+        shutil.rmtree(version_path(old, root), ignore_errors=True)
+
+def _release_store(store: VectorStore):
+    """
+    Libera o cliente de uma versão substituída.
+
+    O Chroma mantém um sistema (conexão SQLite e índices HNSW) por diretório em
+    cache global; ele é encerrado e removido do cache para que um rollback para
+    a mesma versão abra um cliente novo. O índice plano é liberado pelo coletor
+    de lixo (mmap). Falhas são apenas registradas.
+    """
+    client = getattr(store, "_client", None)
+    if client is None:
+        return
+    try:
+        from chromadb.api.client import SharedSystemClient
+        identifier = SharedSystemClient._get_identifier_from_settings(client.get_settings())
+        system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        if system is not None:
+            system.stop()
+    except Exception as e:
+        logger.warning(f"Falha ao liberar cliente do banco vetorial: {e}")
+
+class VectorStoreManager:
+    """
+    Cliente único por processo, trocado quando o ponteiro `CURRENT` muda.
+
+    Args:
+        root (str): Diretório de persistência.
+        check_interval (float): Intervalo mínimo (s) entre verificações do ponteiro.
+        factory (Callable[[str], VectorStore]): Cria o cliente para o diretório de um índice.
+        backend (str): "chroma" ou "flat" (usado pela fábrica padrão).
+        retire_grace (float): Espera (s) antes de liberar o cliente de uma versão substituída.
+        release (Callable[[VectorStore], None]): Libera um cliente substituído.
+    """
+
+    def __init__(self, root: str = PERSIST_DIRECTORY, check_interval: float = CHECK_INTERVAL,
+                 factory: Optional[Callable[[str], VectorStore]] = None, backend: str = VECTOR_STORE_BACKEND,
+                 retire_grace: float = RETIRE_GRACE, release: Callable[[VectorStore], None] = _release_store):
+        self.root = root
+        self.check_interval = check_interval
+        self.backend = backend
+        self.factory = factory or self._open_store
+        self.retire_grace = retire_grace
+        self.release = release
+        self._retired: List[Tuple[VectorStore, str, float]] = []
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._directory = root
+        self._store: Optional[VectorStore] = None
+        self._checked_at = float("-inf")
+
+    def _open_store(self, directory: str) -> VectorStore:
+        if self.backend == "flat":
+            if has_flat_index(directory):
+                return FlatVectorStore(directory, get_embedding_function())
+            logger.warning(f"Índice plano ausente em {directory}; usando ChromaDB. Execute o ingest_data.py.")
+        return Chroma(persist_directory=directory, embedding_function=get_embedding_function())
+
+    def version(self) -> str:
+        """Versão ativa, relida do ponteiro no máximo a cada `check_interval` segundos."""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._version
+
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self.check_interval:
+                return self._version
+            self._checked_at = now
+
+            version, directory = resolve_index(self.root)
+            if version != self._version:
+                if self._version is not None:
+                    logger.info(f"Nova versão do índice vetorial: {self._version or '-'} -> {version or '-'}")
+                # O cliente anterior segue válido para as consultas em andamento até `retire_grace`
+                if self._store is not None:
+                    self._retired.append((self._store, self._directory, now))
+                self._version, self._directory, self._store = version, directory, None
+            self._release_retired(now)
+            return self._version
+
+    def _release_retired(self, now: float):
+        """Libera os clientes substituídos há mais de `retire_grace` segundos."""
+        while self._retired and now - self._retired[0][2] >= self.retire_grace:
+            store, directory, _ = self._retired.pop(0)
+            # Após um rollback, o cliente novo da mesma versão compartilha o sistema do Chroma
+            if directory != self._directory:
+                self.release(store)
+
+    def get(self) -> VectorStore:
+        """
+        Cliente da versão ativa (aberto uma única vez por versão).
+
+        Returns:
+            VectorStore: Cliente (Chroma ou índice plano) conectado ao índice ativo.
+        """
+        self.version()
+        store = self._store
+        if store is not None:
+            return store
+
+        with self._lock:
+            if self._store is None:
+                if not os.path.exists(self._directory):
+                    logger.error(f"Diretório do banco vetorial não encontrado: {self._directory}")
+                start = time.perf_counter()
+                self._store = self.factory(self._directory)
+                manifest = read_manifest(self._version, self.root) if self._directory != self.root else {}
+                logger.info(
+                    f"Banco vetorial aberto | Backend: {type(self._store).__name__} | "
+                    f"Versão: {self._version or 'legada'} | "
+                    f"Modelo: {manifest.get('embedding_model', EMBEDDING_MODEL_NAME)} | "
+                    f"{(time.perf_counter() - start) * 1000:.1f}ms"
+                )
+            return self._store
+
+vector_store_manager = VectorStoreManager()
+
+def get_vectorstore() -> VectorStore:
+    """
+    Recupera o cliente compartilhado do banco vetorial (`VECTOR_STORE_BACKEND`).
+
+    Returns:
+        VectorStore: Cliente conectado à versão ativa do índice.
+    """
+    return vector_store_manager.get()
+
+def get_index_version() -> str:
+    """
+    Identifica a versão atual do índice vetorial.
+
+    Usa o ponteiro `CURRENT` e, em índices no layout antigo, o marcador
+    gravado pela ingestão ou a data de modificação do banco do Chroma.
+
+    Returns:
+        str: Versão do índice ("" se o diretório não existir).
+    """
+    return vector_store_manager.version()
 
 def query_rag(query: str) -> str:
     """
@@ -57,15 +374,15 @@ def query_rag(query: str) -> str:
         
         if not docs:
             return "Nenhuma informação relevante encontrada na base de conhecimento."
-        
+
         formatted_context = []
         for doc in docs:
             src = doc.metadata.get("source", "Fonte desconhecida")
             content = doc.page_content.replace("\n", " ")
             formatted_context.append(f"[Fonte: {src}]\nConteúdo: {content}")
-            
+
         return "\n\n".join(formatted_context)
-        
+
     except Exception as e:
         logger.error(f"Falha na consulta RAG: {e}")
-        return "Erro interno ao acessar base de conhecimento."
\ No newline at end of file
+        return "Erro interno ao acessar base de conhecimento."
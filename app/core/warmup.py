@@ -0,0 +1,114 @@
+"""
+Rotina de aquecimento (warm-up) executada na inicialização da API.
+
+Antecipa os custos da primeira requisição após um deploy: carga do modelo de
+embeddings, abertura do banco vetorial, primeira inferência de embedding e uma
+execução completa do grafo (caminhos de compilação do LangGraph e, com
+`WARMUP_LLM=provider`, o handshake TLS com o provedor).
+
+A execução de teste é marcada com `WARMUP_TAG`: com `WARMUP_LLM=stub` (padrão)
+as chamadas ao LLM são atendidas pelo stub, e os caches de rotas e de respostas
+a ignoram. Ela não passa pela API, logo não entra nos totais de `/api/tokens`.
+"""
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+from langchain_core.messages import HumanMessage
+from app.core.config import WARMUP_GRAPH_PASS, INTENT_FAST_PATH
+from app.core.warmup_llm import WARMUP_TAG
+from app.core.vector_store import get_embedding_function, get_vectorstore
+from app.core.workflow import app_swarm
+from app.agents.router.intent_classifier import intent_classifier
+
+logger = logging.getLogger(__name__)
+
+WARMUP_THREAD_ID = "__warmup__"
+WARMUP_MESSAGE = "Quais as taxas da maquininha?"
+
+class WarmupStatus:
+    """
+    Estado de prontidão do serviço (Readiness).
+
+    Attributes:
+        ready (bool): Indica se o warm-up foi concluído.
+        steps (dict): Resultado e duração (ms) de cada etapa executada.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.steps: Dict[str, dict] = {}
+
+    def mark_ready(self):
+        self.ready = True
+
+    def failed_steps(self) -> List[str]:
+        """Etapas do warm-up que terminaram com erro."""
+        return [name for name, step in self.steps.items() if step["status"] != "ok"]
+
+    @property
+    def status(self) -> str:
+        """"warming_up", "ready" ou "degraded" (concluído com etapas em erro)."""
+        if not self.ready:
+            return "warming_up"
+        return "degraded" if self.failed_steps() else "ready"
+
+warmup_status = WarmupStatus()
+
+async def _run_step(name: str, step: Callable[[], Awaitable[None]]):
+    """Executa uma etapa do warm-up registrando duração e eventuais falhas."""
+    start = time.perf_counter()
+    try:
+        await step()
+        status = "ok"
+    except Exception as e:
+        logger.error(f"Falha no warm-up ({name}): {e}")
+        status = f"error: {e}"
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    warmup_status.steps[name] = {"status": status, "duration_ms": elapsed_ms}
+    logger.info(f"Warm-up | Etapa: {name} | Status: {status} | {elapsed_ms}ms")
+
+async def _warm_embeddings():
+    embeddings = await asyncio.to_thread(get_embedding_function)
+    await asyncio.to_thread(embeddings.embed_query, WARMUP_MESSAGE)
+
+async def _warm_vectorstore():
+    await asyncio.to_thread(get_vectorstore)
+
+async def _warm_intent_classifier():
+    if not await asyncio.to_thread(intent_classifier.fit):
+        raise RuntimeError("classificador de intenção indisponível")
+
+async def _warm_graph():
+    config = {"configurable": {"thread_id": WARMUP_THREAD_ID}, "tags": [WARMUP_TAG]}
+    input_state = {"messages": [HumanMessage(content=WARMUP_MESSAGE)], "user_id": WARMUP_THREAD_ID}
+    await app_swarm.ainvoke(input_state, config=config)
+
+    # Remove a sessão sintética para não poluir o checkpointer
+    await app_swarm.checkpointer.adelete_thread(WARMUP_THREAD_ID)
+
+async def run_warmup():
+    """
+    Executa todas as etapas de aquecimento e marca o serviço como pronto.
+
+    Falhas individuais são registradas mas não impedem a prontidão: o serviço
+    segue operando (ex.: rotas de suporte) mesmo sem a base vetorial, e o
+    `/ready` reporta o status `degraded` com as etapas que falharam.
+    """
+    start = time.perf_counter()
+    logger.info("Iniciando warm-up do serviço...")
+
+    await _run_step("embeddings", _warm_embeddings)
+    await _run_step("vectorstore", _warm_vectorstore)
+    if INTENT_FAST_PATH:
+        await _run_step("intent_classifier", _warm_intent_classifier)
+    if WARMUP_GRAPH_PASS:
+        await _run_step("graph", _warm_graph)
+
+    warmup_status.mark_ready()
+    failed = warmup_status.failed_steps()
+    if failed:
+        logger.warning(f"Warm-up concluído com falhas em {time.perf_counter() - start:.2f}s | Etapas: {', '.join(failed)}")
+    else:
+        logger.info(f"Warm-up concluido em {time.perf_counter() - start:.2f}s")
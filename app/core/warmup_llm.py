@@ -0,0 +1,67 @@
+"""
+Isolamento da execução de aquecimento (warm-up) do grafo.
+
+A execução de teste do warm-up é marcada com a tag `WARMUP_TAG` no config do
+LangGraph (propagada a todos os nós e chamadas ao LLM). Com `WARMUP_LLM=stub`,
+o `WarmupChatModel` atende essas chamadas com o LLM simulado, sem consumir
+cota do provedor a cada inicialização de worker; os caches de rotas e de
+respostas também ignoram a execução marcada.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables.config import var_child_runnable_config
+
+WARMUP_TAG = "warmup"
+
+def is_warmup_run() -> bool:
+    """Indica se o código corrente executa dentro da passada de warm-up do grafo."""
+    config = var_child_runnable_config.get() or {}
+    return WARMUP_TAG in (config.get("tags") or [])
+
+class WarmupChatModel(BaseChatModel):
+    """
+    Chat model que encaminha as chamadas do warm-up para um modelo alternativo.
+
+    Fora do warm-up, delega ao cliente de produção (`delegate`) sem alterações.
+    As chamadas são feitas diretamente (`_generate`/`_agenerate`/`_astream`),
+    como no `ResilientChatModel`, sem callbacks duplicados.
+
+    Attributes:
+        delegate (BaseChatModel): Cliente de produção (resiliência, cassette, provedor).
+        warmup (BaseChatModel): Modelo usado na passada de warm-up (ex.: `StubChatModel`).
+    """
+    delegate: BaseChatModel
+    warmup: BaseChatModel
+
+    @property
+    def _llm_type(self) -> str:
+        return self.delegate._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.delegate._identifying_params
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Formata as ferramentas como o provedor (o stub aceita o mesmo formato OpenAI)."""
+        return self.bind(**self.delegate.bind_tools(tools, **kwargs).kwargs)
+
+    def _target(self) -> BaseChatModel:
+        return self.warmup if is_warmup_run() else self.delegate
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return self._target()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return await self._target()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        target = self._target()
+        # O modelo do warm-up (stub) emite os próprios tokens no run_manager; evita duplicá-los
+        manager = run_manager if target is self.delegate else None
+        async for chunk in target._astream(messages, stop=stop, run_manager=manager, **kwargs):
+            yield chunk
@@ -1,54 +1,80 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 
+from app.core.config import ASYNC_NODES
 from app.core.state import AgentState
-from app.agents.router.node import router_node
-from app.agents.knowledge.node import knowledge_node
-from app.agents.support.node import support_node
-from app.agents.utils.nodes import guardrail_node, fallback_node, human_handoff_node, personality_node
+from app.core.checkpointer import build_checkpointer
+from app.agents.router.node import router_node, arouter_node
+from app.agents.knowledge.node import knowledge_node, aknowledge_node
+from app.agents.support.node import support_node, asupport_node
+from app.agents.utils.nodes import (
+    guardrail_node, fallback_node, human_handoff_node, personality_node,
+    aguardrail_node, afallback_node, ahuman_handoff_node, apersonality_node
+)
 
-# Configuração de persistência em memória (Checkpointer)
-memory = MemorySaver()
-
-# Inicialização do Grafo de Estado
-workflow = StateGraph(AgentState)
-
-# Registro de Nós (Nodes)
-workflow.add_node("router", router_node)
-workflow.add_node("knowledge_agent", knowledge_node)
-workflow.add_node("support_agent", support_node)
-workflow.add_node("guardrail", guardrail_node)
-workflow.add_node("human_handoff", human_handoff_node)
-workflow.add_node("fallback", fallback_node)
-workflow.add_node("personality", personality_node)
-
-# Definição do Ponto de Entrada
-workflow.set_entry_point("router")
+# Nós do grafo: (versão síncrona, versão assíncrona)
+NODES = {
+    "router": (router_node, arouter_node),
+    "knowledge_agent": (knowledge_node, aknowledge_node),
+    "support_agent": (support_node, asupport_node),
+    "guardrail": (guardrail_node, aguardrail_node),
+    "human_handoff": (human_handoff_node, ahuman_handoff_node),
+    "fallback": (fallback_node, afallback_node),
+    "personality": (personality_node, apersonality_node),
+}
 
 def route_decision(state: AgentState) -> str:
     """Extrai a decisão de roteamento do estado."""
     return state["next_agent"]
 
-# Arestas Condicionais (Roteamento Dinâmico)
-workflow.add_conditional_edges("router", route_decision, {
-    "knowledge_agent": "knowledge_agent",
-    "support_agent": "support_agent",
-    "guardrail": "guardrail",
-    "human_handoff": "human_handoff",
-    "fallback": "fallback",
-    "END": END
-})
-
-# Arestas de Convergência (Normalização de Saída)
-# Todos os fluxos operacionais convergem para o agente de personalidade
-workflow.add_edge("knowledge_agent", "personality")
-workflow.add_edge("support_agent", "personality")
-workflow.add_edge("guardrail", "personality")
-workflow.add_edge("human_handoff", "personality")
-workflow.add_edge("fallback", "personality")
-
-# Finalização do Fluxo
-workflow.add_edge("personality", END)
+def build_swarm(checkpointer=None, async_nodes: bool = True):
+    """
+    Monta e compila o grafo do Swarm.
+
+    Args:
+        checkpointer: Persistência das sessões (None desativa).
+        async_nodes (bool): Usa as variantes assíncronas dos nós em `ainvoke`/`astream`.
+            Nós síncronos são executados pelo LangGraph no thread pool padrão,
+            que passa a limitar a concorrência sob carga.
+
+    Returns:
+        CompiledStateGraph: Grafo compilado.
+    """
+    # Inicialização do Grafo de Estado
+    workflow = StateGraph(AgentState)
+
+    # Registro de Nós (Nodes); a variante síncrona segue disponível para `invoke`
+    for name, (sync_node, async_node) in NODES.items():
+        workflow.add_node(name, RunnableLambda(sync_node, afunc=async_node) if async_nodes else sync_node)
+
+    # Definição do Ponto de Entrada
+    workflow.set_entry_point("router")
+
+    # Arestas Condicionais (Roteamento Dinâmico)
+    workflow.add_conditional_edges("router", route_decision, {
+        "knowledge_agent": "knowledge_agent",
+        "support_agent": "support_agent",
+        "guardrail": "guardrail",
+        "human_handoff": "human_handoff",
+        "fallback": "fallback",
+        "END": END
+    })
+
+    # Arestas de Convergência (Normalização de Saída)
+    # Todos os fluxos operacionais convergem para o agente de personalidade
+    workflow.add_edge("knowledge_agent", "personality")
+    workflow.add_edge("support_agent", "personality")
+    workflow.add_edge("guardrail", "personality")
+    workflow.add_edge("human_handoff", "personality")
+    workflow.add_edge("fallback", "personality")
+
+    # Finalização do Fluxo
+    workflow.add_edge("personality", END)
+
+    return workflow.compile(checkpointer=checkpointer)
+
+# Configuração de persistência (Checkpointer), selecionada por CHECKPOINTER_BACKEND
+memory = build_checkpointer()
 
 # Compilação do App Swarm
-app_swarm = workflow.compile(checkpointer=memory)
\ No newline at end of file
+app_swarm = build_swarm(memory, async_nodes=ASYNC_NODES)
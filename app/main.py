@@ -1,8 +1,29 @@
+import json
+import time
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
+from app.core.config import (
+    BATCH_MAX_CONCURRENCY, BATCH_MAX_ITEMS,
+    SESSION_QUEUE_MAX_DEPTH, SESSION_QUEUE_TIMEOUT, RETRY_AFTER_SECONDS,
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT,
+    WARMUP_ENABLED, PERSONALITY_MODE, TRACE_HEADER, TOKEN_BUDGET_PER_REQUEST
+)
+from app.core.concurrency import BackpressureError, SessionExecutionQueue, AdmissionController
 from app.core.workflow import app_swarm
+from app.agents.utils.history import SUMMARY_TAG
+from app.core.warmup import run_warmup, warmup_status
+from app.core.token_budget import TokenLedger, token_accounting
+from app.core.tracing import TraceRecorder, trace_store, start_trace, finish_trace, to_chrome_trace
+from app.core.metrics import (
+    REQUEST_LATENCY, ROUTES, ERRORS, ADMISSION_IN_FLIGHT, ADMISSION_QUEUED,
+    mark_worker_stopped, metrics_handler, render_metrics
+)
 
 # Configuração de Logging
 logging.basicConfig(
@@ -11,70 +32,545 @@ logging.basicConfig(
 )
 logger = logging.getLogger("API_Gateway")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação.
+
+    O warm-up roda em segundo plano para que o liveness (`/health`) responda
+    imediatamente, enquanto o readiness (`/ready`) só libera tráfego ao final.
+    """
+    warmup_task = None
+    if WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(run_warmup())
+    else:
+        warmup_status.mark_ready()
+
+    yield
+
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    mark_worker_stopped()
+
 app = FastAPI(
     title="InfinitePay Agent Swarm API",
     description="Interface de orquestração para sistema multi-agente com persistência de contexto.",
-    version="1.2.0"
+    version="1.2.0",
+    lifespan=lifespan
+)
+
+# Serializa execuções de uma mesma sessão para evitar corrida no checkpoint
+session_queue = SessionExecutionQueue(
+    max_depth=SESSION_QUEUE_MAX_DEPTH,
+    timeout=SESSION_QUEUE_TIMEOUT,
+    retry_after=RETRY_AFTER_SECONDS
 )
 
+# Limita execuções simultâneas do grafo para proteger a latência sob rajadas
+admission = AdmissionController(
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    retry_after=RETRY_AFTER_SECONDS
+)
+
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    """Registra a latência de cada requisição HTTP (para streaming, até o primeiro byte)."""
+    start = time.perf_counter()
+    response = await call_next(request)
+
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    REQUEST_LATENCY.labels(
+        method=request.method, path=path, status=str(response.status_code)
+    ).observe(time.perf_counter() - start)
+    return response
+
 class UserRequest(BaseModel):
     """Payload de entrada para requisições de chat."""
     message: str
     user_id: str
+    token_budget: Optional[int] = Field(default=None, ge=1)
+
+class TokenUsage(BaseModel):
+    """Tokens consumidos pelas chamadas ao LLM da requisição."""
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    llm_calls: int
+    budget: Optional[int] = None
+    degraded: List[str] = []
+    by_node: Dict[str, int] = {}
 
 class AgentResponse(BaseModel):
     """Estrutura padronizada de resposta da API."""
     response: str
     agent_used: str
     status: str = "success"
+    usage: Optional[TokenUsage] = None
+
+class BatchRequest(BaseModel):
+    """Payload de entrada para processamento em lote."""
+    items: List[UserRequest]
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
+
+class BatchItemResult(BaseModel):
+    """Resultado individual de um item do lote (resposta ou erro)."""
+    index: int
+    user_id: str
+    status: str
+    result: Optional[AgentResponse] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    """Resultado agregado do processamento em lote."""
+    results: List[BatchItemResult]
+    total: int
+    succeeded: int
+    failed: int
+    elapsed_seconds: float
+    throughput_per_second: float
+
+# Nós do grafo reportados como eventos de progresso no streaming
+GRAPH_NODES = {
+    "router", "knowledge_agent", "support_agent", "guardrail",
+    "human_handoff", "fallback", "personality"
+}
+
+# Nós cujas chamadas ao LLM geram a resposta final (tokens repassados ao cliente).
+# No modo single_pass o tom é aplicado pelos especialistas e não há reescrita.
+TOKEN_NODES = {"knowledge_agent", "support_agent"} if PERSONALITY_MODE == "single_pass" else {"personality"}
+
+def trace_requested(http_request: Request) -> bool:
+    """Indica se o cliente pediu tracing da requisição (header `TRACE_HEADER`)."""
+    return http_request.headers.get(TRACE_HEADER, "").strip().lower() in ("1", "true", "yes", "on")
+
+def request_budget(request: UserRequest) -> Optional[int]:
+    """Orçamento de tokens efetivo: o cliente pode reduzir o do servidor, mas nunca ultrapassá-lo."""
+    budgets = [b for b in (request.token_budget, TOKEN_BUDGET_PER_REQUEST) if b]
+    return min(budgets) if budgets else None
+
+def build_graph_input(request: UserRequest, ledger: Optional[TokenLedger] = None,
+                      tracer: Optional[TraceRecorder] = None) -> tuple:
+    """
+    Monta o estado inicial e a configuração de sessão para execução do grafo.
+
+    Args:
+        request (UserRequest): Payload recebido pela API.
+        ledger (Optional[TokenLedger]): Contabilidade/orçamento de tokens da requisição.
+        tracer (Optional[TraceRecorder]): Recorder de spans, quando a requisição é rastreada.
+
+    Returns:
+        tuple: Par (input_state, config) no formato esperado pelo LangGraph.
+    """
+    handlers = [ledger, tracer]
+    config = {
+        "configurable": {"thread_id": request.user_id},
+        "callbacks": [metrics_handler] + [h for h in handlers if h is not None]
+    }
+    input_state = {
+        "messages": [HumanMessage(content=request.message)],
+        "user_id": request.user_id
+    }
+    return input_state, config
+
+def build_agent_response(result: dict, ledger: Optional[TokenLedger] = None) -> AgentResponse:
+    """Converte o estado final do grafo no payload padronizado da API."""
+    return AgentResponse(
+        response=result.get("final_response", "Sem resposta gerada."),
+        agent_used=result.get("next_agent", "router_fallback"),
+        usage=TokenUsage(**ledger.usage()) if ledger else None
+    )
+
+def record_response(request: UserRequest, response: AgentResponse, ledger: TokenLedger):
+    """Contabiliza a rota e o consumo de tokens de uma requisição concluída."""
+    ROUTES.labels(route=response.agent_used).inc()
+    token_accounting.record(request.user_id, response.agent_used, ledger)
+
+async def run_swarm(request: UserRequest, tracer: Optional[TraceRecorder] = None) -> AgentResponse:
+    """
+    Executa o grafo completo para uma requisição e retorna a resposta padronizada.
+
+    Requisições da mesma sessão aguardam em fila para que nunca executem o
+    grafo simultaneamente sobre o mesmo checkpoint. Em seguida, a execução
+    passa pelo controle de admissão global.
+
+    Args:
+        request (UserRequest): Payload recebido pela API.
+        tracer (Optional[TraceRecorder]): Recorder de spans; concluído ao final da execução.
+
+    Returns:
+        AgentResponse: Resposta gerada e agente responsável.
+
+    Raises:
+        BackpressureError: Fila da sessão ou de admissão cheia, ou tempo de espera excedido.
+    """
+    ledger = TokenLedger(request_budget(request))
+    input_state, config = build_graph_input(request, ledger, tracer)
+    queued_at = time.perf_counter()
+
+    try:
+        async with session_queue.acquire(request.user_id), admission.slot():
+            if tracer:
+                tracer.add_span("queue_wait", queued_at)
+            # Execução assíncrona (ainvoke) para não bloquear o Event Loop do FastAPI
+            result = await app_swarm.ainvoke(input_state, config=config)
+    finally:
+        finish_trace(tracer)
+
+    response = build_agent_response(result, ledger)
+    record_response(request, response, ledger)
+    return response
+
+def backpressure_exception(error: BackpressureError) -> HTTPException:
+    """Converte uma rejeição por saturação em resposta HTTP com Retry-After."""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def format_sse(event: str, data: dict) -> str:
+    """Serializa um evento no formato Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 @app.post("/api/chat", response_model=AgentResponse)
-async def chat_endpoint(request: UserRequest):
+async def chat_endpoint(request: UserRequest, http_request: Request, http_response: Response):
     """
     Processa interações de chat através do orquestrador multi-agente (Swarm).
 
     Utiliza o `user_id` para manter o estado da sessão no LangGraph e executa
     o fluxo de decisão de forma assíncrona para garantir alta concorrência.
+    Com o header `TRACE_HEADER` (ou quando sorteada pela amostragem), a
+    execução é rastreada e o id do trace retorna no header `X-Trace-Id`.
 
     Args:
         request (UserRequest): Objeto contendo a mensagem do usuário e ID da sessão.
+        http_request (Request): Requisição HTTP (headers de tracing).
+        http_response (Response): Resposta HTTP (header `X-Trace-Id`).
 
     Returns:
         AgentResponse: Objeto contendo a resposta gerada, o agente responsável e o status.
 
     Raises:
-        HTTPException: Retorna 500 em caso de falhas críticas no processamento do grafo.
+        HTTPException: Retorna 429/503 quando a sessão ou o serviço estão saturados e
+            500 em caso de falhas críticas no processamento do grafo.
     """
     logger.info(f"Requisicao recebida | User ID: {request.user_id}")
+    tracer = start_trace(request.user_id, trace_requested(http_request))
+    if tracer:
+        http_response.headers["X-Trace-Id"] = tracer.trace_id
     
     try:
-        config = {"configurable": {"thread_id": request.user_id}}
-        
-        input_state = {
-            "messages": [HumanMessage(content=request.message)],
-            "user_id": request.user_id
-        }
-        
-        # Execução assíncrona (ainvoke) para não bloquear o Event Loop do FastAPI
-        result = await app_swarm.ainvoke(input_state, config=config)
-        
-        agent_used = result.get("next_agent", "router_fallback")
-        final_text = result.get("final_response", "Sem resposta gerada.")
+        response = await run_swarm(request, tracer)
+        logger.info(f"Processamento concluido | Agente: {response.agent_used}")
         
-        logger.info(f"Processamento concluido | Agente: {agent_used}")
+        return response
         
-        return AgentResponse(
-            response=final_text,
-            agent_used=agent_used
-        )
+    except BackpressureError as e:
+        ERRORS.labels(component="api", name="backpressure").inc()
+        raise backpressure_exception(e)
         
     except Exception as e:
+        ERRORS.labels(component="api", name="internal").inc()
         logger.error(f"Erro critico no processamento: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500, 
             detail="Ocorreu um erro interno ao processar sua solicitacao."
         )
 
+@app.post("/api/chat/batch", response_model=BatchResponse)
+async def chat_batch_endpoint(batch: BatchRequest):
+    """
+    Processa um lote de mensagens através do Swarm com concorrência limitada.
+
+    Mensagens de um mesmo `user_id` são executadas em ordem (compartilham a
+    mesma thread de memória), enquanto sessões distintas são processadas em
+    paralelo até o limite de concorrência configurado.
+
+    Args:
+        batch (BatchRequest): Lista de requisições e limite opcional de concorrência.
+
+    Returns:
+        BatchResponse: Resultados por item e métricas agregadas de throughput.
+
+    Raises:
+        HTTPException: Retorna 413 quando o lote excede `BATCH_MAX_ITEMS`.
+    """
+    total = len(batch.items)
+    if total > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote excede o limite de {BATCH_MAX_ITEMS} itens."
+        )
+
+    # O cliente pode reduzir a concorrência, mas nunca ultrapassar o teto do servidor
+    limit = min(batch.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(limit)
+    logger.info(f"Lote recebido | Itens: {total} | Concorrencia: {limit}")
+
+    # Agrupamento por sessão preservando a ordem original das mensagens
+    sessions = {}
+    for index, item in enumerate(batch.items):
+        sessions.setdefault(item.user_id, []).append(index)
+
+    results: List[Optional[BatchItemResult]] = [None] * total
+
+    async def process_session(indexes: List[int]):
+        for index in indexes:
+            item = batch.items[index]
+            async with semaphore:
+                try:
+                    response = await run_swarm(item, start_trace(item.user_id))
+                    results[index] = BatchItemResult(
+                        index=index, user_id=item.user_id, status="success", result=response
+                    )
+                except Exception as e:
+                    ERRORS.labels(component="api", name="batch_item").inc()
+                    logger.error(f"Falha no item {index} do lote: {str(e)}")
+                    results[index] = BatchItemResult(
+                        index=index, user_id=item.user_id, status="error", error=str(e)
+                    )
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(process_session(indexes) for indexes in sessions.values()))
+    elapsed = time.perf_counter() - start_time
+
+    succeeded = sum(1 for r in results if r.status == "success")
+    logger.info(f"Lote concluido | Itens: {total} | Falhas: {total - succeeded} | Tempo: {elapsed:.2f}s")
+
+    return BatchResponse(
+        results=results,
+        total=total,
+        succeeded=succeeded,
+        failed=total - succeeded,
+        elapsed_seconds=round(elapsed, 4),
+        throughput_per_second=round(total / elapsed, 4) if elapsed > 0 else 0.0
+    )
+
+async def _iter_graph_events(input_state: dict, config: dict) -> AsyncIterator[str]:
+    """Traduz os eventos internos do LangGraph para eventos SSE públicos."""
+    async for event in app_swarm.astream_events(input_state, config=config, version="v2"):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+
+        # Eventos de nível de nó (ignora sub-runnables como route_decision)
+        if kind in ("on_chain_start", "on_chain_end") and event["name"] == node and node in GRAPH_NODES:
+            phase = "start" if kind == "on_chain_start" else "end"
+            yield format_sse("node", {"node": node, "phase": phase})
+
+            output = event["data"].get("output")
+            if node == "router" and phase == "end" and isinstance(output, dict):
+                yield format_sse("route", {"agent": output.get("next_agent")})
+
+        # Tokens apenas da etapa que gera a resposta final; demais chamadas são internas
+        elif kind == "on_chat_model_stream" and node in TOKEN_NODES and SUMMARY_TAG not in event.get("tags", []):
+            content = event["data"]["chunk"].content
+            if content:
+                yield format_sse("token", {"content": content})
+
+async def stream_swarm_events(request: UserRequest, tracer: Optional[TraceRecorder] = None) -> AsyncIterator[str]:
+    """
+    Executa o grafo emitindo eventos SSE à medida que o processamento avança.
+
+    A vez na fila da sessão e a vaga de admissão são obtidas antes do primeiro
+    evento: uma rejeição por saturação ainda pode virar 429/503 com Retry-After,
+    antes que o status 200 e os headers SSE sejam enviados.
+
+    Eventos emitidos:
+        - start: vaga obtida; a execução do grafo começa em seguida.
+        - route: decisão de roteamento tomada pelo Router.
+        - node: início/fim de cada nó do grafo.
+        - token: fragmentos da resposta gerada pelo agente de personalidade.
+        - done: payload final no mesmo formato de `AgentResponse`.
+        - error: falha crítica durante a execução.
+
+    Args:
+        request (UserRequest): Payload recebido pela API.
+        tracer (Optional[TraceRecorder]): Recorder de spans; concluído ao final do fluxo.
+
+    Yields:
+        str: Eventos serializados no formato SSE.
+
+    Raises:
+        BackpressureError: Fila da sessão ou de admissão cheia, antes do evento `start`.
+    """
+    try:
+        ledger = TokenLedger(request_budget(request))
+        input_state, config = build_graph_input(request, ledger, tracer)
+        queued_at = time.perf_counter()
+
+        async with session_queue.acquire(request.user_id), admission.slot():
+            if tracer:
+                tracer.add_span("queue_wait", queued_at)
+            yield format_sse("start", {"user_id": request.user_id} | ({"trace_id": tracer.trace_id} if tracer else {}))
+
+            async for sse in _iter_graph_events(input_state, config):
+                yield sse
+
+            # A resposta final pode divergir dos tokens após a sanitização da personalidade
+            snapshot = await app_swarm.aget_state(config)
+
+        response = build_agent_response(snapshot.values, ledger)
+        record_response(request, response, ledger)
+        logger.info(f"Streaming concluido | Agente: {response.agent_used}")
+        yield format_sse("done", response.model_dump())
+
+    except BackpressureError:
+        raise
+
+    except Exception as e:
+        ERRORS.labels(component="api", name="internal").inc()
+        logger.error(f"Erro critico no streaming: {str(e)}", exc_info=True)
+        yield format_sse("error", {"detail": "Ocorreu um erro interno ao processar sua solicitacao."})
+
+    finally:
+        finish_trace(tracer)
+
+async def _prepend_event(first_event: str, events: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Reemite o evento já consumido antes dos demais."""
+    yield first_event
+    async for sse in events:
+        yield sse
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: UserRequest, http_request: Request):
+    """
+    Versão em streaming (Server-Sent Events) do endpoint de chat.
+
+    Emite a decisão de roteamento, o progresso dos nós e os tokens da resposta
+    final conforme são gerados, encerrando com um evento `done` contendo os
+    mesmos campos de `AgentResponse`.
+
+    Args:
+        request (UserRequest): Objeto contendo a mensagem do usuário e ID da sessão.
+        http_request (Request): Requisição HTTP (headers de tracing).
+
+    Returns:
+        StreamingResponse: Fluxo `text/event-stream`.
+
+    Raises:
+        HTTPException: Retorna 429/503 quando a sessão ou o serviço estão saturados.
+    """
+    logger.info(f"Requisicao de streaming recebida | User ID: {request.user_id}")
+    tracer = start_trace(request.user_id, trace_requested(http_request))
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if tracer:
+        headers["X-Trace-Id"] = tracer.trace_id
+
+    # Avança até o evento `start` (fila e admissão) antes de enviar o status 200
+    events = stream_swarm_events(request, tracer)
+    try:
+        first_event = await anext(events)
+    except BackpressureError as e:
+        ERRORS.labels(component="api", name="backpressure").inc()
+        raise backpressure_exception(e)
+    
+    return StreamingResponse(
+        _prepend_event(first_event, events),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+@app.get("/api/admission")
+def admission_stats():
+    """
+    Expõe a ocupação atual do controle de admissão e da fila por sessão.
+
+    Utilizado para calibrar `ADMISSION_MAX_IN_FLIGHT`/`ADMISSION_MAX_QUEUE`
+    contra a latência p99 observada.
+
+    Returns:
+        dict: Contadores de execuções em andamento, fila e rejeições.
+    """
+    return {"admission": admission.stats(), "sessions": session_queue.stats()}
+
+@app.get("/api/tokens")
+def token_usage(top: int = 20):
+    """
+    Consumo de tokens agregado em memória (desde o início do processo).
+
+    Totais por nó e por rota também são exportados em `/metrics`
+    (`swarm_llm_tokens_total`, `swarm_route_tokens_total`).
+
+    Args:
+        top (int): Quantidade de usuários de maior consumo retornados.
+
+    Returns:
+        dict: Totais por rota e usuários de maior consumo.
+    """
+    return token_accounting.snapshot(top)
+
+@app.get("/api/traces")
+def list_traces():
+    """
+    Lista os traces concluídos mantidos em memória (mais recentes primeiro).
+
+    Returns:
+        dict: Resumo de cada trace (id, rótulo, duração, rota e quantidade de spans).
+    """
+    return {"traces": trace_store.summaries()}
+
+@app.get("/api/traces/export")
+def export_traces_window(seconds: float = 60.0):
+    """
+    Exporta os traces concluídos na janela recente em um único arquivo.
+
+    Cada requisição aparece como um processo distinto no Perfetto.
+
+    Args:
+        seconds (float): Tamanho da janela, em segundos.
+
+    Returns:
+        JSONResponse: Documento no formato Chrome Trace Event.
+    """
+    return JSONResponse(
+        to_chrome_trace(trace_store.window(seconds)),
+        headers={"Content-Disposition": f'attachment; filename="traces-{int(seconds)}s.json"'}
+    )
+
+@app.get("/api/traces/{trace_id}")
+def export_trace(trace_id: str):
+    """
+    Exporta o trace de uma requisição no formato Chrome Trace Event.
+
+    O arquivo pode ser aberto em https://ui.perfetto.dev ou chrome://tracing.
+
+    Args:
+        trace_id (str): Id retornado no header `X-Trace-Id`.
+
+    Returns:
+        JSONResponse: Documento com os spans do grafo, nós, LLM e ferramentas.
+
+    Raises:
+        HTTPException: 404 quando o trace não existe ou já foi descartado.
+    """
+    recorder = trace_store.get(trace_id)
+    if recorder is None:
+        raise HTTPException(status_code=404, detail="Trace não encontrado.")
+    return JSONResponse(
+        to_chrome_trace([recorder]),
+        headers={"Content-Disposition": f'attachment; filename="trace-{trace_id}.json"'}
+    )
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Exposição de métricas no formato textual do Prometheus.
+
+    Inclui latência por requisição, por nó do grafo, por chamada ao LLM e por
+    ferramenta, distribuição de rotas, erros e ocupação do controle de admissão.
+
+    Returns:
+        Response: Payload `text/plain` no formato de exposição do Prometheus.
+    """
+    ADMISSION_IN_FLIGHT.set(admission.in_flight)
+    ADMISSION_QUEUED.set(admission.queued)
+
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.get("/health")
 def health_check():
     """
@@ -83,4 +579,25 @@ def health_check():
     Returns:
         dict: Status operacional do serviço.
     """
-    return {"status": "operational", "service": "agent-swarm"}
\ No newline at end of file
+    return {"status": "operational", "service": "agent-swarm"}
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Endpoint de prontidão (Readiness Probe).
+
+    Retorna 200 apenas após o warm-up (embeddings, vector store e execução de
+    teste do grafo), evitando que o primeiro tráfego pague pela inicialização.
+    Etapas com falha não bloqueiam o tráfego (ex.: o suporte funciona sem a
+    base vetorial), mas o status passa a `degraded`, listando-as em `failed`.
+
+    Returns:
+        JSONResponse: Status de prontidão e resultado de cada etapa do warm-up.
+    """
+    payload = {
+        "ready": warmup_status.ready,
+        "status": warmup_status.status,
+        "failed": warmup_status.failed_steps(),
+        "steps": warmup_status.steps
+    }
+    return JSONResponse(status_code=200 if warmup_status.ready else 503, content=payload)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Benchmark de throughput: nós síncronos (thread pool) vs. nós assíncronos.
+
+Executa N conversas simultâneas contra o grafo usando o LLM simulado
+(`LLM_PROVIDER=stub`) com latência fixa por chamada, isolando o custo de
+orquestração do tempo de resposta do provedor.
+
+Uso:
+    python -m benchmarks.async_nodes --requests 200 --latency-ms 200
+"""
+import os
+import time
+import asyncio
+import argparse
+
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Throughput de nós síncronos vs. assíncronos.")
+    parser.add_argument("--requests", type=int, default=200, help="Conversas simultâneas.")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latência simulada por chamada ao LLM.")
+    return parser.parse_args()
+
+async def run_scenario(graph, total: int) -> float:
+    from langchain_core.messages import HumanMessage
+
+    async def one(index: int):
+        user_id = f"bench_{index}"
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content="Qual o saldo da minha conta?")], "user_id": user_id},
+            config={"configurable": {"thread_id": user_id}}
+        )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start
+
+def main():
+    args = parse_args()
+    os.environ["STUB_LLM_LATENCY_MS"] = str(args.latency_ms)
+
+    from langgraph.checkpoint.memory import MemorySaver
+    from app.core.workflow import build_swarm
+    from app.core.tokens import count_tokens
+
+    # Carrega o tokenizer antes das medições (custo único, fora dos cenários)
+    count_tokens("aquecimento")
+
+    print(f"Conversas simultâneas: {args.requests} | Latência LLM simulada: {args.latency_ms}ms")
+    for label, async_nodes in (("síncrono", False), ("assíncrono", True)):
+        graph = build_swarm(MemorySaver(), async_nodes=async_nodes)
+        elapsed = asyncio.run(run_scenario(graph, args.requests))
+        print(f"- Nós {label:<11} | {elapsed:7.2f}s | {args.requests / elapsed:8.2f} req/s")
+
+if __name__ == "__main__":
+    main()
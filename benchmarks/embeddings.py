@@ -0,0 +1,142 @@
+"""
+Benchmark de embeddings de consultas: chamadas individuais vs. micro-batching.
+
+Para cada nível de concorrência, N threads embedam consultas distintas (sem
+acertos de cache, isolando o efeito do batching) chamando o modelo
+diretamente ou via `CachedBatchedEmbeddings`. Imprime throughput, latência
+p50/p99 e tamanho médio dos lotes; ao final, mede a taxa de acerto do cache
+com uma fração de consultas repetidas.
+
+Sem `sentence_transformers` instalado (ou com `--model simulated`), usa um
+modelo simulado com custo fixo por forward pass + custo por texto, executando
+um forward pass por vez (como a CPU compartilhada pelo modelo real).
+
+Uso:
+    python -m benchmarks.embeddings --concurrency 1,4,16,64 --queries 200
+    python -m benchmarks.embeddings --model simulated --max-batch 16 --max-wait-ms 2
+"""
+import time
+import random
+import argparse
+import threading
+from typing import List
+from langchain_core.embeddings import Embeddings
+from app.core.embeddings import CachedBatchedEmbeddings
+from benchmarks.load_test import percentile
+
+class SimulatedEmbeddings(Embeddings):
+    """Modelo simulado: `fixed_ms` por forward pass + `per_item_ms` por texto, um pass por vez."""
+
+    def __init__(self, fixed_ms: float, per_item_ms: float, dim: int = 384):
+        self.fixed_ms = fixed_ms
+        self.per_item_ms = per_item_ms
+        self.dim = dim
+        self._device = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._device:
+            time.sleep((self.fixed_ms + self.per_item_ms * len(texts)) / 1000)
+        return [[float(len(t) % 7)] * self.dim for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def load_model(kind: str, fixed_ms: float, per_item_ms: float) -> Embeddings:
+    if kind in ("auto", "real"):
+        try:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            from app.core.vector_store import EMBEDDING_MODEL_NAME
+            return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        except Exception as e:
+            if kind == "real":
+                raise
+            print(f"Modelo real indisponível ({type(e).__name__}); usando modelo simulado.")
+    return SimulatedEmbeddings(fixed_ms, per_item_ms)
+
+def run(embed, concurrency: int, queries: List[str]) -> dict:
+    """Dispara as consultas em `concurrency` threads e mede latência e throughput."""
+    latencies: List[float] = []
+    lock = threading.Lock()
+    chunks = [queries[i::concurrency] for i in range(concurrency)]
+
+    def worker(chunk: List[str]):
+        for text in chunk:
+            start = time.perf_counter()
+            embed(text)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "qps": len(queries) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000
+    }
+
+class _CountingEmbeddings(Embeddings):
+    """Conta os forward passes do modelo (tamanho médio dos lotes)."""
+
+    def __init__(self, delegate: Embeddings):
+        self.delegate = delegate
+        self.passes = 0
+        self.texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.passes += 1
+        self.texts += len(texts)
+        return self.delegate.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embeddings individuais vs. micro-batching.")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Níveis de concorrência (threads).")
+    parser.add_argument("--queries", type=int, default=256, help="Consultas por cenário.")
+    parser.add_argument("--max-batch", type=int, default=32, help="Tamanho máximo do lote.")
+    parser.add_argument("--max-wait-ms", type=float, default=5, help="Espera máxima (ms) pelo lote.")
+    parser.add_argument("--model", choices=("auto", "real", "simulated"), default="auto", help="Modelo de embeddings.")
+    parser.add_argument("--fixed-ms", type=float, default=8, help="Custo fixo por forward pass (modelo simulado).")
+    parser.add_argument("--per-item-ms", type=float, default=0.5, help="Custo por texto (modelo simulado).")
+    parser.add_argument("--repeat-ratio", type=float, default=0.5, help="Fração de consultas repetidas no teste de cache.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    model = load_model(args.model, args.fixed_ms, args.per_item_ms)
+    model.embed_query("aquecimento")
+
+    print(f"Lote máximo: {args.max_batch} | Espera máxima: {args.max_wait_ms}ms | Consultas: {args.queries}")
+    print(f"{'Threads':>8} | {'Modo':<9} | {'consultas/s':>11} | {'p50 ms':>8} | {'p99 ms':>8} | {'lote médio':>10}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        queries = [f"consulta {concurrency}-{i} sobre taxas da maquininha" for i in range(args.queries)]
+        for mode in ("direto", "batching"):
+            counter = _CountingEmbeddings(model)
+            if mode == "direto":
+                embed = counter.embed_query
+            else:
+                embed = CachedBatchedEmbeddings(counter, max_entries=0, max_batch=args.max_batch,
+                                                max_wait_ms=args.max_wait_ms).embed_query
+            stats = run(embed, concurrency, queries)
+            print(f"{concurrency:>8} | {mode:<9} | {stats['qps']:>11.1f} | {stats['p50']:>8.1f} | "
+                  f"{stats['p99']:>8.1f} | {counter.texts / max(counter.passes, 1):>10.1f}")
+
+    # Cache: consultas repetidas (mesmo texto com variações de caixa/acentos) não voltam ao modelo
+    rng = random.Random(42)
+    base = [f"Quais as taxas do produto {i}?" for i in range(args.queries)]
+    mixed = [rng.choice(base[:8]).upper() if rng.random() < args.repeat_ratio else text for text in base]
+    counter = _CountingEmbeddings(model)
+    cached = CachedBatchedEmbeddings(counter, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    stats = run(cached.embed_query, 16, mixed)
+    print(f"Cache ({args.repeat_ratio:.0%} repetidas, 16 threads): {stats['qps']:.1f} consultas/s | "
+          f"textos embedados: {counter.texts}/{len(mixed)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de recuperação: índice plano NumPy (mmap) vs. ChromaDB.
+
+Gera um corpus sintético (vetores normalizados aleatórios, dimensão do
+`all-MiniLM-L6-v2`), grava os dois índices em um diretório temporário e mede,
+com os mesmos vetores de consulta (sem custo do modelo de embeddings):
+
+- tempo de abertura do índice (cold start de um worker);
+- latência p50/p99 e throughput do top-k;
+- tamanho em disco;
+- concordância do top-k (o HNSW do Chroma é aproximado; o índice plano é exato).
+
+Sem `chromadb` instalado, mede apenas o índice plano.
+
+Uso:
+    python -m benchmarks.flat_index --chunks 3000 --queries 500 --k 4
+"""
+import os
+import time
+import argparse
+import tempfile
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.flat_index import FlatVectorStore, write_flat_index
+from benchmarks.load_test import percentile
+
+class _FixedEmbeddings(Embeddings):
+    """Devolve os vetores sintéticos já calculados (a consulta chega como vetor)."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[int(t.split()[1])].tolist() for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        raise NotImplementedError("o benchmark consulta por vetor")
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(base, name)) for base, _, files in os.walk(path) for name in files)
+
+def measure(search, queries: np.ndarray, k: int) -> dict:
+    """Executa o top-k para cada consulta e mede latência e throughput."""
+    latencies, results = [], []
+    start = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        results.append(search(query.tolist(), k))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {
+        "qps": len(queries) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "results": results
+    }
+
+def _ids(docs) -> List[int]:
+    return [int(doc.page_content.split()[1]) for doc in docs]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Índice plano NumPy vs. ChromaDB.")
+    parser.add_argument("--chunks", type=int, default=3000, help="Tamanho do corpus sintético.")
+    parser.add_argument("--dim", type=int, default=384, help="Dimensão dos embeddings.")
+    parser.add_argument("--queries", type=int, default=500, help="Consultas medidas por backend.")
+    parser.add_argument("--k", type=int, default=4, help="Documentos por consulta (SEARCH_K).")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(args.chunks, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    texts = [f"chunk {i} " + "lorem ipsum " * 60 for i in range(args.chunks)]
+    metadatas = [{"source": f"https://www.infinitepay.io/pagina-{i % 15}"} for i in range(args.chunks)]
+    embedding = _FixedEmbeddings(vectors)
+
+    print(f"Corpus: {args.chunks} chunks x {args.dim} dims | Consultas: {args.queries} | k={args.k}")
+    print(f"{'Backend':<8} | {'abertura ms':>11} | {'consultas/s':>11} | {'p50 ms':>8} | {'p99 ms':>8} | {'disco MB':>8}")
+
+    with tempfile.TemporaryDirectory() as root:
+        flat_dir = os.path.join(root, "flat-index")
+        write_flat_index(flat_dir, vectors, texts, metadatas)
+        start = time.perf_counter()
+        flat = FlatVectorStore(flat_dir, embedding)
+        opened = (time.perf_counter() - start) * 1000
+        flat.similarity_search_by_vector(queries[0].tolist(), args.k)
+        flat_stats = measure(flat.similarity_search_by_vector, queries, args.k)
+        print(f"{'flat':<8} | {opened:>11.1f} | {flat_stats['qps']:>11.1f} | {flat_stats['p50']:>8.2f} | "
+              f"{flat_stats['p99']:>8.2f} | {_directory_size(flat_dir) / 1e6:>8.1f}")
+
+        try:
+            from langchain_community.vectorstores import Chroma
+            chroma_dir = os.path.join(root, "chroma")
+            Chroma.from_texts(texts, embedding, metadatas=metadatas, persist_directory=chroma_dir,
+                              collection_metadata={"hnsw:space": "cosine"})
+            start = time.perf_counter()
+            chroma = Chroma(persist_directory=chroma_dir, embedding_function=embedding,
+                            collection_metadata={"hnsw:space": "cosine"})
+            chroma.similarity_search_by_vector(queries[0].tolist(), args.k)
+            opened = (time.perf_counter() - start) * 1000
+        except ImportError as e:
+            print(f"ChromaDB indisponível ({e}); comparação omitida.")
+            return
+
+        chroma_stats = measure(chroma.similarity_search_by_vector, queries, args.k)
+        print(f"{'chroma':<8} | {opened:>11.1f} | {chroma_stats['qps']:>11.1f} | {chroma_stats['p50']:>8.2f} | "
+              f"{chroma_stats['p99']:>8.2f} | {_directory_size(chroma_dir) / 1e6:>8.1f}")
+
+        overlap = np.mean([
+            len(set(_ids(a)) & set(_ids(b))) / args.k
+            for a, b in zip(flat_stats["results"], chroma_stats["results"])
+        ])
+        print(f"Concordância do top-{args.k} (Chroma vs. exato): {overlap:.1%}")
+
+if __name__ == "__main__":
+    main()
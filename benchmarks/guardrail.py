@@ -0,0 +1,60 @@
+"""
+Benchmark do guardrail: varredura ingênua vs. regex compilada em trie.
+
+Gera milhares de padrões sintéticos e mede o tempo de varredura de uma
+mensagem longa (ex.: texto colado pelo usuário) sem nenhuma ocorrência,
+que é o pior caso para ambas as abordagens.
+
+Uso:
+    python -m benchmarks.guardrail --patterns 5000 --message-kb 50
+"""
+import os
+import time
+import random
+import string
+import argparse
+
+# O benchmark não usa o LLM; evita exigir a chave do provedor
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+from app.agents.router.guardrail import compile_patterns
+from app.core.text import normalize_text
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Varredura ingênua vs. regex em trie.")
+    parser.add_argument("--patterns", type=int, default=5000, help="Quantidade de padrões.")
+    parser.add_argument("--message-kb", type=int, default=50, help="Tamanho da mensagem (KB).")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por medição.")
+    return parser.parse_args()
+
+def random_word(rng: random.Random, min_len: int, max_len: int) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_len, max_len)))
+
+def measure(label: str, scan, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scan()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"- {label:<22} | {elapsed * 1000:10.2f} ms/mensagem")
+    return elapsed
+
+def main():
+    args = parse_args()
+    rng = random.Random(42)
+
+    # Padrões longos e aleatórios: ocorrências acidentais são improváveis (pior caso)
+    patterns = sorted({random_word(rng, 8, 14) for _ in range(args.patterns)})
+    alphabet = string.ascii_lowercase + "     "
+    message = "".join(rng.choice(alphabet) for _ in range(args.message_kb * 1024))
+
+    start = time.perf_counter()
+    regex = compile_patterns(patterns)
+    print(f"Padrões: {len(patterns)} | Mensagem: {args.message_kb}KB | Compilação: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    normalized = normalize_text(message)
+    naive = measure("any(p in texto)", lambda: any(p in normalized for p in patterns), args.repeat)
+    compiled = measure("regex em trie", lambda: regex.search(normalized), args.repeat)
+    print(f"Speedup: {naive / compiled:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Teste de carga HTTP do endpoint `/api/chat` com relatório de percentis.
+
+Usuários virtuais (closed loop) disparam os cenários da aba de QA
+(`SCENARIOS`) conforme o mix configurado, com rampa de entrada e duração
+definidas. Ao final, imprime throughput, latência p50/p90/p99 e taxa de erros
+por rota (agente que respondeu) e grava o relatório completo em JSON.
+
+Cada usuário virtual usa um `user_id` próprio por cenário, evitando que a fila
+por sessão serialize a carga; use `--shared-sessions` para reproduzir os
+`user_id` originais.
+
+Uso:
+    # Servidor local com LLM simulado, iniciado pelo próprio comando
+    python -m benchmarks.load_test --serve --concurrency 50 --duration 30 --ramp-up 5
+
+    # Servidor já em execução, com mix por categoria
+    python -m benchmarks.load_test --url http://localhost:8000 --mix KNOWLEDGE=3,SUPPORT=2,GUARDRAIL=1
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+import httpx
+from app.frontend.components.scenarios import SCENARIOS
+
+CHAT_PATH = "/api/chat"
+
+class Sample(NamedTuple):
+    """Resultado de uma requisição."""
+    route: str
+    expected: str
+    latency: float
+    status: int
+    error: Optional[str]
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Interpreta o mix de cenários no formato "KNOWLEDGE=3,SUPPORT=1".
+
+    Args:
+        spec (str): Pesos por categoria (vazio = todos os cenários com peso 1).
+
+    Returns:
+        Dict[str, float]: Peso por categoria.
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        category, _, weight = item.partition("=")
+        weights[category.strip().upper()] = float(weight or 1)
+    return weights
+
+def weighted_scenarios(mix: Dict[str, float]) -> tuple:
+    """Cenários elegíveis e respectivos pesos (o peso da categoria é dividido entre seus cenários)."""
+    if not mix:
+        return SCENARIOS, [1.0] * len(SCENARIOS)
+
+    unknown = set(mix) - {s["category"] for s in SCENARIOS}
+    if unknown:
+        raise ValueError(f"Categorias desconhecidas no mix: {sorted(unknown)}")
+
+    per_category = defaultdict(int)
+    for scenario in SCENARIOS:
+        per_category[scenario["category"]] += 1
+    chosen = [s for s in SCENARIOS if mix.get(s["category"], 0) > 0]
+    return chosen, [mix[s["category"]] / per_category[s["category"]] for s in chosen]
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por posição mais próxima (nearest-rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def _stats(samples: List[Sample], elapsed: float) -> dict:
+    latencies = [s.latency for s in samples if s.error is None]
+    errors = [s for s in samples if s.error is not None]
+    by_status = defaultdict(int)
+    for s in errors:
+        by_status[str(s.status or s.error)] += 1
+
+    return {
+        "requests": len(samples),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "errors_by_status": dict(by_status),
+        "route_mismatches": sum(1 for s in samples if s.error is None and s.route != s.expected),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 1)
+            for name, q in (("p50", 50), ("p90", 90), ("p99", 99))
+        } | {"max": round(max(latencies, default=0.0) * 1000, 1)}
+    }
+
+def summarize(samples: List[Sample], elapsed: float, config: dict) -> dict:
+    """
+    Consolida as amostras em um relatório global e por rota.
+
+    Requisições com erro são agrupadas na rota esperada do cenário.
+
+    Args:
+        samples (List[Sample]): Resultados individuais.
+        elapsed (float): Duração total da medição, em segundos.
+        config (dict): Parâmetros da execução (incluídos no relatório).
+
+    Returns:
+        dict: Relatório serializável em JSON.
+    """
+    by_route = defaultdict(list)
+    for sample in samples:
+        by_route[sample.route].append(sample)
+
+    return {
+        "config": config,
+        "elapsed_s": round(elapsed, 2),
+        "overall": _stats(samples, elapsed),
+        "routes": {route: _stats(items, elapsed) for route, items in sorted(by_route.items())}
+    }
+
+async def _request(client: httpx.AsyncClient, scenario: dict, user_id: str) -> Sample:
+    payload = dict(scenario["payload"], user_id=user_id)
+    expected = scenario["expected_agent"]
+    start = time.perf_counter()
+    try:
+        response = await client.post(CHAT_PATH, json=payload)
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            return Sample(expected, expected, latency, response.status_code, f"HTTP {response.status_code}")
+        return Sample(response.json().get("agent_used", expected), expected, latency, 200, None)
+    except httpx.HTTPError as e:
+        return Sample(expected, expected, time.perf_counter() - start, 0, type(e).__name__)
+
+async def run_load(url: str, concurrency: int, duration: float, ramp_up: float = 0.0, mix: Optional[Dict[str, float]] = None,
+                   timeout: float = 60.0, shared_sessions: bool = False, transport: Optional[httpx.AsyncBaseTransport] = None,
+                   seed: Optional[int] = None) -> tuple:
+    """
+    Executa a carga com `concurrency` usuários virtuais em closed loop.
+
+    Args:
+        url (str): URL base da API.
+        concurrency (int): Usuários virtuais simultâneos.
+        duration (float): Duração total (s), incluindo a rampa.
+        ramp_up (float): Tempo (s) até todos os usuários estarem ativos.
+        mix (Optional[Dict[str, float]]): Pesos por categoria de cenário.
+        timeout (float): Timeout (s) por requisição.
+        shared_sessions (bool): Usa os `user_id` originais dos cenários.
+        transport (Optional[httpx.AsyncBaseTransport]): Transporte alternativo (ex.: ASGI em testes).
+        seed (Optional[int]): Semente do sorteio de cenários.
+
+    Returns:
+        tuple: (amostras, duração efetiva em segundos).
+    """
+    scenarios, weights = weighted_scenarios(mix or {})
+    rng = random.Random(seed)
+    samples: List[Sample] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits, transport=transport) as client:
+        start = time.perf_counter()
+        stop_at = start + duration
+
+        async def virtual_user(index: int):
+            await asyncio.sleep(ramp_up * index / max(concurrency, 1))
+            while time.perf_counter() < stop_at:
+                scenario = rng.choices(scenarios, weights)[0]
+                user_id = scenario["payload"]["user_id"]
+                if not shared_sessions:
+                    user_id = f"{user_id}-vu{index}"
+                samples.append(await _request(client, scenario, user_id))
+
+        await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return samples, elapsed
+
+def print_report(report: dict):
+    """Imprime o relatório em formato tabular."""
+    header = f"{'Rota':<16}{'Req':>8}{'Erros':>8}{'Erro %':>8}{'RPS':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["routes"].items()) + [("TOTAL", report["overall"])]
+    for route, stats in rows:
+        lat = stats["latency_ms"]
+        print(f"{route:<16}{stats['requests']:>8}{stats['errors']:>8}{stats['error_rate'] * 100:>7.1f}%"
+              f"{stats['throughput_rps']:>9.2f}{lat['p50']:>10.1f}{lat['p90']:>10.1f}{lat['p99']:>10.1f}")
+
+    overall = report["overall"]
+    if overall["errors_by_status"]:
+        print(f"Erros por status: {overall['errors_by_status']}")
+    if overall["route_mismatches"]:
+        print(f"Respostas em rota diferente da esperada: {overall['route_mismatches']}")
+
+def _serve(port: int, latency_ms: float) -> subprocess.Popen:
+    """Sobe a API local com LLM simulado e aguarda o health check."""
+    env = dict(os.environ, LLM_PROVIDER="stub", STUB_LLM_LATENCY_MS=str(latency_ms))
+    env.setdefault("WARMUP_GRAPH_PASS", "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("Servidor local não respondeu ao health check.")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Teste de carga do /api/chat com relatório de percentis.")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base da API.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Usuários virtuais simultâneos.")
+    parser.add_argument("--duration", type=float, default=30, help="Duração total (s), incluindo a rampa.")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Tempo (s) até todos os usuários estarem ativos.")
+    parser.add_argument("--mix", default="", help="Pesos por categoria, ex.: KNOWLEDGE=3,SUPPORT=2,GUARDRAIL=1.")
+    parser.add_argument("--timeout", type=float, default=60, help="Timeout (s) por requisição.")
+    parser.add_argument("--shared-sessions", action="store_true", help="Reutiliza os user_id originais dos cenários.")
+    parser.add_argument("--seed", type=int, default=None, help="Semente do sorteio de cenários.")
+    parser.add_argument("--output", default="load_report.json", help="Arquivo JSON do relatório.")
+    parser.add_argument("--serve", action="store_true", help="Sobe a API local com LLM simulado (LLM_PROVIDER=stub).")
+    parser.add_argument("--port", type=int, default=8011, help="Porta da API local (--serve).")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latência do LLM simulado (--serve).")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    url = f"http://127.0.0.1:{args.port}" if args.serve else args.url
+    server = _serve(args.port, args.latency_ms) if args.serve else None
+    config = {k: v for k, v in vars(args).items() if k != "output"} | {"url": url}
+
+    try:
+        print(f"Carga em {url}{CHAT_PATH} | Usuários: {args.concurrency} | Duração: {args.duration}s | Rampa: {args.ramp_up}s")
+        samples, elapsed = asyncio.run(run_load(
+            url, args.concurrency, args.duration, args.ramp_up, parse_mix(args.mix),
+            args.timeout, args.shared_sessions, seed=args.seed
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = summarize(samples, elapsed, config)
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Relatório salvo em {args.output}")
+
+if __name__ == "__main__":
+    main()
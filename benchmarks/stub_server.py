@@ -0,0 +1,196 @@
+"""
+Servidor HTTP stub compatível com a API de chat completions do Groq (formato OpenAI).
+
+Permite exercitar o cliente real (`ChatGroq`) e o `ResilientChatModel` offline,
+com injeção de latência e de erros. As respostas reutilizam as regras do
+`StubChatModel` (rotas, tool calls e texto simulado), inclusive em streaming (SSE).
+
+Uso:
+    python -m benchmarks.stub_server --port 8099 --latency-ms 300 --slow-rate 0.05 --error-rate 0.02
+    GROQ_BASE_URL=http://127.0.0.1:8099 CHAVE_GROQ=stub uvicorn app.main:app
+
+Falhas podem ser sorteadas (`slow_rate`, `error_rate`) ou roteirizadas em
+`FaultProfile.script` ("slow", "error" ou None por requisição, em ordem), o que
+torna os testes determinísticos.
+
+Ferramenta de testes e benchmarks: não faz parte da aplicação (`app`).
+"""
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from app.core.stub_llm import StubChatModel
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+@dataclass
+class FaultProfile:
+    """
+    Perfil de latência e falhas injetadas.
+
+    Attributes:
+        latency_ms (float): Latência base de cada resposta.
+        slow_ms (float): Latência das respostas lentas (cauda).
+        slow_rate (float): Probabilidade de resposta lenta.
+        error_rate (float): Probabilidade de erro HTTP.
+        error_status (int): Status HTTP dos erros injetados.
+        script (Deque[Optional[str]]): Falhas roteirizadas, consumidas antes do sorteio.
+    """
+    latency_ms: float = 0.0
+    slow_ms: float = 5000.0
+    slow_rate: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    script: Deque[Optional[str]] = field(default_factory=deque)
+
+    def next_fault(self) -> Optional[str]:
+        if self.script:
+            return self.script.popleft()
+        if random.random() < self.error_rate:
+            return "error"
+        if random.random() < self.slow_rate:
+            return "slow"
+        return None
+
+def _to_messages(payload: List[dict]) -> List[BaseMessage]:
+    roles = {"system": SystemMessage, "user": HumanMessage}
+    return [roles.get(m.get("role"), AIMessage)(content=m.get("content") or "") for m in payload]
+
+def _tool_calls(message: AIMessage) -> List[dict]:
+    return [
+        {"id": c["id"], "type": "function", "function": {"name": c["name"], "arguments": json.dumps(c["args"])}}
+        for c in message.tool_calls
+    ]
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubLLMServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.server.request_count += 1
+        if self.path.rstrip("/") != COMPLETIONS_PATH:
+            return self._json(404, {"error": {"message": "not found"}})
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        profile = self.server.profile
+        fault = profile.next_fault()
+
+        delay = profile.slow_ms if fault == "slow" else profile.latency_ms
+        time.sleep(delay / 1000)
+        if fault == "error":
+            return self._json(profile.error_status, {"error": {"message": "falha injetada", "type": "server_error"}})
+
+        message = self.server.model._respond(_to_messages(body.get("messages", [])), body.get("tools"))
+        if body.get("stream"):
+            return self._stream(body, message)
+
+        self._json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": message.content,
+                            **({"tool_calls": _tool_calls(message)} if message.tool_calls else {})},
+                "finish_reason": "tool_calls" if message.tool_calls else "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    def _json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body: dict, message: AIMessage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "stub")}
+        if message.tool_calls:
+            deltas = [{"role": "assistant", "content": "",
+                       "tool_calls": [dict(c, index=i) for i, c in enumerate(_tool_calls(message))]}]
+        else:
+            words = message.content.split(" ")
+            deltas = [{"content": w if i == len(words) - 1 else f"{w} "} for i, w in enumerate(words)]
+
+        for delta in deltas:
+            self._event(dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+        finish = "tool_calls" if message.tool_calls else "stop"
+        self._event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": finish}]))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _event(self, payload: dict):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+
+class StubLLMServer(ThreadingHTTPServer):
+    """
+    Servidor stub com perfil de falhas ajustável em tempo de execução.
+
+    Args:
+        profile (FaultProfile): Latência e falhas injetadas.
+        host (str): Interface de escuta.
+        port (int): Porta (0 escolhe uma porta livre).
+    """
+    daemon_threads = True
+
+    def __init__(self, profile: Optional[FaultProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.profile = profile or FaultProfile()
+        self.model = StubChatModel()
+        self.request_count = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Requisições abandonadas pelo cliente (hedge perdedor, prazo) são esperadas
+        pass
+
+    def start(self) -> "StubLLMServer":
+        """Inicia o servidor em uma thread de segundo plano."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub do provedor LLM com injeção de falhas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--slow-ms", type=float, default=5000.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    profile = FaultProfile(args.latency_ms, args.slow_ms, args.slow_rate, args.error_rate, args.error_status)
+    server = StubLLMServer(profile, args.host, args.port)
+    print(f"Stub LLM em {server.base_url} (GROQ_BASE_URL) | Perfil: {profile}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
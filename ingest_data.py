@@ -1,13 +1,21 @@
-import os
+import shutil
 import logging
+import argparse
 import time
-from typing import List
+from datetime import datetime, timezone
+from typing import Dict, List
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from dotenv import load_dotenv
+from app.core.flat_index import write_flat_index
+from app.core.vector_store import (
+    PERSIST_DIRECTORY, new_build_directory, publish_index, activate_version,
+    list_versions, read_current, read_manifest
+)
 
 # Configuração de Logging
 logging.basicConfig(
@@ -20,7 +28,7 @@ logger = logging.getLogger("DataIngestion")
 load_dotenv()
 
 # Constantes de Configuração
-CHROMA_PATH = "./chroma_db"
+CHROMA_PATH = PERSIST_DIRECTORY
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
@@ -105,9 +113,31 @@ def split_text(documents: List[Document]) -> List[Document]:
     logger.info(f"Documentos divididos em {len(chunks)} chunks.")
     return chunks
 
+class _PrecomputedEmbeddings(Embeddings):
+    """Reaproveita os vetores já calculados dos chunks (um único cálculo para os dois backends)."""
+
+    def __init__(self, delegate: Embeddings, vectors: Dict[str, List[float]]):
+        self.delegate = delegate
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        missing = [t for t in texts if t not in self.vectors]
+        if missing:
+            self.vectors.update(zip(missing, self.delegate.embed_documents(missing)))
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.delegate.embed_query(text)
+
 def save_to_chroma(chunks: List[Document]):
     """
-    Gera embeddings e persiste os dados no ChromaDB.
+    Gera embeddings e publica uma nova versão do índice (ChromaDB + índice plano).
+
+    Os embeddings são calculados uma única vez e gravados nos dois backends
+    (`VECTOR_STORE_BACKEND` escolhe qual a API usa). O índice é construído em
+    um diretório temporário e só se torna visível para a API (ponteiro
+    `CURRENT`) depois de completo, junto com o manifesto. Em caso de falha, a
+    versão ativa permanece inalterada.
 
     Args:
         chunks (List[Document]): Fragmentos de texto para indexação.
@@ -119,21 +149,63 @@ def save_to_chroma(chunks: List[Document]):
     logger.info(f"Inicializando modelo de embeddings: {EMBEDDING_MODEL}")
     embedding_function = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
 
-    logger.info(f"Persistindo dados em: {CHROMA_PATH}")
+    version, build_dir = new_build_directory(CHROMA_PATH)
+    logger.info(f"Construindo versão {version} em: {build_dir}")
+    start_time = time.perf_counter()
     try:
+        texts = [c.page_content for c in chunks]
+        vectors = embedding_function.embed_documents(texts)
+        write_flat_index(build_dir, vectors, texts, [c.metadata for c in chunks])
+
         Chroma.from_documents(
             documents=chunks,
-            embedding=embedding_function,
-            persist_directory=CHROMA_PATH
+            embedding=_PrecomputedEmbeddings(embedding_function, dict(zip(texts, vectors))),
+            persist_directory=build_dir
         )
-        logger.info("Banco vetorial atualizado com sucesso.")
+        manifest = {
+            "embedding_model": EMBEDDING_MODEL,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "chunks": len(chunks),
+            "dimensions": len(vectors[0]),
+            "backends": ["chroma", "flat"],
+            "sources": sorted({c.metadata.get("source", "") for c in chunks}),
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "build_seconds": round(time.perf_counter() - start_time, 2)
+        }
+        publish_index(version, build_dir, manifest, CHROMA_PATH)
+        logger.info(f"Banco vetorial atualizado com sucesso. Versão ativa: {version}")
         
     except Exception as e:
+        shutil.rmtree(build_dir, ignore_errors=True)
         logger.critical(f"Erro ao salvar no ChromaDB: {e}")
         raise e
 
+def print_versions():
+    """Lista as versões publicadas, indicando a ativa."""
+    current = read_current(CHROMA_PATH)
+    for version in list_versions(CHROMA_PATH):
+        manifest = read_manifest(version, CHROMA_PATH)
+        marker = "*" if version == current else " "
+        print(f"{marker} {version} | {manifest.get('embedding_model', '?')} | "
+              f"chunks: {manifest.get('chunks', '?')} | {manifest.get('built_at', '?')}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingestão e versionamento do índice vetorial.")
+    parser.add_argument("--list", action="store_true", help="Lista as versões publicadas do índice.")
+    parser.add_argument("--activate", metavar="VERSAO", help="Ativa uma versão existente (rollback), sem reingestão.")
+    return parser.parse_args()
+
 def main():
     """Orquestrador do pipeline de ingestão de dados."""
+    args = parse_args()
+    if args.list:
+        print_versions()
+        return
+    if args.activate:
+        activate_version(args.activate, CHROMA_PATH)
+        return
+
     start_time = time.time()
     
     try:
@@ -1,5 +1,16 @@
 #!/bin/bash
 
+WORKERS="${UVICORN_WORKERS:-1}"
+
+# Métricas multi-worker: diretório compartilhado, recriado vazio a cada inicialização
+if [ "$WORKERS" -gt 1 ] && [ -z "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    export PROMETHEUS_MULTIPROC_DIR="/tmp/prometheus_multiproc"
+fi
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Verifica a existência e integridade do banco vetorial
 if [ ! -d "chroma_db" ] || [ -z "$(ls -A chroma_db)" ]; then
     echo "📦 Banco Vetorial não detectado. Iniciando processo de ingestão..."
@@ -9,5 +20,7 @@ else
 fi
 
 # Inicialização do servidor da API
-echo "🚀 Iniciando servidor Uvicorn..."
-uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# Múltiplos workers exigem CHECKPOINTER_BACKEND=sqlite (sessões compartilhadas) e
+# sticky sessions por user_id no balanceador (a fila por sessão é por processo)
+echo "🚀 Iniciando servidor Uvicorn ($WORKERS worker(s))..."
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
@@ -0,0 +1,28 @@
+"""
+Configuração compartilhada dos testes.
+
+Os testes que importam `app.main` executam o grafo completo: o LLM simulado
+(`LLM_PROVIDER=stub`) é definido antes de qualquer import de `app`, mantendo a
+suíte offline e determinística. Para rodar contra o provedor real, exporte
+`LLM_PROVIDER=groq` e `CHAVE_GROQ`.
+"""
+import os
+
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("CHAVE_GROQ", "dummy")
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def reset_shared_state():
+    """Isola os testes do estado global do processo (circuit breaker, caches e totais de tokens)."""
+    yield
+    from app.core.config import llm_circuit
+    from app.core.token_budget import token_accounting
+    from app.agents.router.cache import route_cache
+    from app.agents.knowledge.cache import semantic_cache
+
+    llm_circuit.record_success()
+    route_cache.clear()
+    semantic_cache.clear()
+    token_accounting.clear()
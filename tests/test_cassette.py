@@ -0,0 +1,39 @@
+import time
+import asyncio
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import tool
+from app.core.cassette import Cassette, CassetteChatModel, CassetteMissError
+from app.core.stub_llm import StubChatModel
+
+@tool
+def consultar_taxas(query: str) -> str:
+    """Consulta as taxas."""
+    return query
+
+PROMPT = [SystemMessage(content="Especialista"), HumanMessage(content="Quais as taxas?")]
+
+def test_record_then_replay_offline(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    recorder = CassetteChatModel(cassette=Cassette(path), mode="record", delegate=StubChatModel(latency_ms=100))
+    recorded_call = recorder.bind_tools([consultar_taxas]).invoke(PROMPT)
+    recorded_text = asyncio.run(recorder.ainvoke([HumanMessage(content="oi")])).content
+
+    player = CassetteChatModel(cassette=Cassette(path), mode="replay")
+    start = time.monotonic()
+    replayed_call = player.bind_tools([consultar_taxas]).invoke(PROMPT)
+    assert time.monotonic() - start < 0.05
+    assert replayed_call.tool_calls == recorded_call.tool_calls
+    assert player.invoke([HumanMessage(content="oi")]).content == recorded_text
+
+    with pytest.raises(CassetteMissError):
+        player.invoke([HumanMessage(content="pergunta nunca gravada")])
+
+def test_replay_with_recorded_timing(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    CassetteChatModel(cassette=Cassette(path), mode="record", delegate=StubChatModel(latency_ms=100)).invoke(PROMPT)
+
+    player = CassetteChatModel(cassette=Cassette(path), mode="replay", timing="recorded")
+    start = time.monotonic()
+    asyncio.run(player.ainvoke(PROMPT))
+    assert time.monotonic() - start >= 0.09
@@ -0,0 +1,107 @@
+import time
+import asyncio
+from typing import Annotated, TypedDict
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, END
+from langgraph.graph.message import add_messages
+from app.core.checkpointer import BoundedMemorySaver, SQLiteCheckpointSaver
+
+class EchoState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+def echo_node(state: EchoState) -> dict:
+    return {"messages": [AIMessage(content=f"eco: {state['messages'][-1].content}")]}
+
+def build_graph(saver):
+    workflow = StateGraph(EchoState)
+    workflow.add_node("echo", echo_node)
+    workflow.set_entry_point("echo")
+    workflow.add_edge("echo", END)
+    return workflow.compile(checkpointer=saver)
+
+def test_sqlite_checkpointer_shares_sessions_between_workers(tmp_path):
+    """
+    Duas instâncias (simulando workers distintos) devem enxergar o mesmo histórico da thread.
+    """
+    db_path = str(tmp_path / "checkpoints.sqlite")
+    worker_a = build_graph(SQLiteCheckpointSaver(db_path))
+    worker_b = build_graph(SQLiteCheckpointSaver(db_path))
+    config = {"configurable": {"thread_id": "user_1"}}
+
+    worker_a.invoke({"messages": [HumanMessage(content="oi")]}, config=config)
+    result = asyncio.run(worker_b.ainvoke({"messages": [HumanMessage(content="tudo bem?")]}, config=config))
+
+    assert [m.content for m in result["messages"]] == ["oi", "eco: oi", "tudo bem?", "eco: tudo bem?"]
+    assert len(list(worker_a.get_state_history(config))) == 6
+
+def test_sqlite_checkpointer_delete_thread(tmp_path):
+    """
+    A remoção de uma thread não deve afetar as demais.
+    """
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build_graph(saver)
+
+    for thread_id in ("keep", "drop"):
+        graph.invoke({"messages": [HumanMessage(content=thread_id)]}, config={"configurable": {"thread_id": thread_id}})
+
+    saver.delete_thread("drop")
+
+    assert saver.get_tuple({"configurable": {"thread_id": "drop"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "keep"}}) is not None
+
+def test_bounded_memory_saver_keeps_latest_checkpoint_only():
+    """
+    Com retenção de 1 checkpoint por thread, o histórico de mensagens permanece íntegro
+    e o armazenamento não cresce com o número de turnos.
+    """
+    saver = BoundedMemorySaver(max_threads=10, idle_ttl=0, max_checkpoints_per_thread=1)
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "long_session"}}
+
+    for turn in range(5):
+        result = graph.invoke({"messages": [HumanMessage(content=f"turno {turn}")]}, config=config)
+        blobs_after_turn = len(saver.blobs)
+
+    assert len(result["messages"]) == 10
+    assert len(list(graph.get_state_history(config))) == 1
+    assert saver.stats()["checkpoints"] == 1
+    assert blobs_after_turn <= 4
+
+def test_bounded_memory_saver_evicts_by_lru_and_ttl():
+    """
+    Threads excedentes são removidas por LRU e threads ociosas expiram pelo TTL.
+    """
+    saver = BoundedMemorySaver(max_threads=2, idle_ttl=0.05, max_checkpoints_per_thread=1)
+    graph = build_graph(saver)
+
+    for thread_id in ("a", "b", "c"):
+        graph.invoke({"messages": [HumanMessage(content=thread_id)]}, config={"configurable": {"thread_id": thread_id}})
+
+    assert saver.get_tuple({"configurable": {"thread_id": "a"}}) is None
+    assert saver.stats()["evictions"]["lru"] == 1
+
+    time.sleep(0.06)
+    assert saver.get_tuple({"configurable": {"thread_id": "c"}}) is None
+    assert saver.stats()["evictions"]["ttl"] == 1
+    assert "a" not in saver.storage and "c" not in saver.storage
+
+def test_sqlite_checkpointer_retention(tmp_path):
+    """
+    O SQLite retém apenas os checkpoints mais recentes de cada thread e remove threads ociosas.
+    """
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), max_checkpoints_per_thread=1,
+                                  idle_ttl=0.05, sweep_interval=0)
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "long_session"}}
+
+    for turn in range(5):
+        result = graph.invoke({"messages": [HumanMessage(content=f"turno {turn}")]}, config=config)
+
+    assert len(result["messages"]) == 10
+    assert len(list(graph.get_state_history(config))) == 1
+
+    time.sleep(0.1)
+    graph.invoke({"messages": [HumanMessage(content="oi")]}, config={"configurable": {"thread_id": "active"}})
+
+    assert saver.get_tuple(config) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "active"}}) is not None
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from app.core.concurrency import (
+    SessionExecutionQueue, SessionQueueFullError, SessionQueueTimeoutError,
+    AdmissionController, AdmissionRejectedError, AdmissionTimeoutError
+)
+
+async def _run_job(queue: SessionExecutionQueue, thread_id: str, log: list, name: str, delay: float = 0.05):
+    async with queue.acquire(thread_id):
+        log.append(f"{name}:start")
+        await asyncio.sleep(delay)
+        log.append(f"{name}:end")
+
+def test_session_queue_serializes_same_thread():
+    """
+    Requisições do mesmo thread_id devem executar em ordem, sem sobreposição.
+    """
+    async def scenario():
+        queue = SessionExecutionQueue(max_depth=4, timeout=5)
+        log = []
+        await asyncio.gather(*(_run_job(queue, "user", log, f"r{i}") for i in range(3)))
+        return log, queue.stats()
+
+    log, stats = asyncio.run(scenario())
+    assert log == ["r0:start", "r0:end", "r1:start", "r1:end", "r2:start", "r2:end"]
+    assert stats == {"active_sessions": 0, "pending_requests": 0}
+
+def test_session_queue_runs_distinct_threads_in_parallel():
+    """
+    Sessões diferentes não devem aguardar umas pelas outras.
+    """
+    async def scenario():
+        queue = SessionExecutionQueue(max_depth=1, timeout=5)
+        log = []
+        await asyncio.gather(_run_job(queue, "a", log, "a"), _run_job(queue, "b", log, "b"))
+        return log
+
+    log = asyncio.run(scenario())
+    assert log[:2] == ["a:start", "b:start"]
+
+@pytest.mark.parametrize("max_depth, timeout, expected_error", [
+    (1, 5, SessionQueueFullError),
+    (4, 0.01, SessionQueueTimeoutError),
+])
+def test_session_queue_rejections(max_depth, timeout, expected_error):
+    """
+    Valida as rejeições por profundidade máxima e por tempo de espera.
+    """
+    async def scenario():
+        queue = SessionExecutionQueue(max_depth=max_depth, timeout=timeout, retry_after=3)
+        first = asyncio.create_task(_run_job(queue, "user", [], "first", delay=0.2))
+        await asyncio.sleep(0)
+
+        with pytest.raises(expected_error) as excinfo:
+            await _run_job(queue, "user", [], "second")
+        await first
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.retry_after == 3
+
+def test_admission_controller_backpressure():
+    """
+    Excedida a capacidade, requisições aguardam na fila; com a fila cheia, são rejeitadas.
+    """
+    async def hold(controller: AdmissionController, delay: float):
+        async with controller.slot():
+            await asyncio.sleep(delay)
+
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05, retry_after=5)
+        running = asyncio.create_task(hold(controller, 0.2))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(hold(controller, 0))
+        await asyncio.sleep(0)
+        snapshot = controller.stats()
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            await hold(controller, 0)
+        with pytest.raises(AdmissionTimeoutError):
+            await waiting
+        await running
+        return snapshot, rejected.value, controller.stats()
+
+    snapshot, rejected, final = asyncio.run(scenario())
+    assert (snapshot["in_flight"], snapshot["queued"]) == (1, 1)
+    assert rejected.status_code == 429 and rejected.retry_after == 5
+    assert (final["in_flight"], final["queued"]) == (0, 0)
+    assert (final["rejected_total"], final["timed_out_total"]) == (1, 1)
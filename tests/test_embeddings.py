@@ -0,0 +1,51 @@
+import threading
+from typing import List
+import pytest
+from langchain_core.embeddings import Embeddings
+from app.core.embeddings import CachedBatchedEmbeddings
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self, fail: bool = False):
+        self.batches: List[List[str]] = []
+        self.fail = fail
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("modelo indisponível")
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+def test_cache_is_keyed_by_normalized_text():
+    model = RecordingEmbeddings()
+    embeddings = CachedBatchedEmbeddings(model, max_wait_ms=0)
+    first = embeddings.embed_query("Quais as taxas?")
+    assert embeddings.embed_query("  QUAIS as   TAXAS? ") == first
+    assert len(model.batches) == 1 and embeddings.cache_size == 1
+
+def test_concurrent_misses_share_forward_passes():
+    model = RecordingEmbeddings()
+    embeddings = CachedBatchedEmbeddings(model, max_entries=0, max_batch=32, max_wait_ms=50)
+    results = {}
+    barrier = threading.Barrier(16)
+
+    def worker(index: int):
+        barrier.wait()
+        results[index] = embeddings.embed_query("x" * index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: [float(i)] for i in range(16)}
+    assert len(model.batches) < 16
+
+def test_model_errors_reach_every_caller():
+    embeddings = CachedBatchedEmbeddings(RecordingEmbeddings(fail=True), max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        embeddings.embed_query("oi")
+    assert embeddings.cache_size == 0
@@ -0,0 +1,43 @@
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.flat_index import FlatVectorStore, has_flat_index, write_flat_index
+
+class AxisEmbeddings(Embeddings):
+    """Cada texto vira um vetor na direção do eixo indicado pelo primeiro caractere."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.1] * 4
+        vector["abcd".index(text[0])] = 1.0
+        return vector
+
+def test_top_k_is_sorted_by_cosine_similarity(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 16)).astype(np.float32)
+    texts = [f"chunk {i} — conteúdo" for i in range(200)]
+    metadatas = [{"source": f"https://exemplo/{i % 3}"} for i in range(200)]
+    write_flat_index(str(tmp_path), vectors, texts, metadatas)
+
+    store = FlatVectorStore(str(tmp_path), AxisEmbeddings())
+    query = rng.normal(size=16)
+    results = store.similarity_search_with_score_by_vector(query, k=5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+    assert [doc.page_content for doc, _ in results] == [texts[i] for i in expected]
+    assert [doc.metadata["source"] for doc, _ in results] == [metadatas[i]["source"] for i in expected]
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    assert len(store.similarity_search_by_vector(query, k=500)) == 200
+
+def test_retriever_interface(tmp_path):
+    texts = ["a: taxas da maquininha", "b: pix", "c: empréstimo", "d: conta pj"]
+    store = FlatVectorStore.from_texts(texts, AxisEmbeddings(), metadatas=[{"source": t[0]} for t in texts],
+                                       persist_directory=str(tmp_path))
+    assert has_flat_index(str(tmp_path))
+
+    docs = store.as_retriever(search_kwargs={"k": 2}).invoke("c?")
+    assert docs[0].page_content == "c: empréstimo" and docs[0].metadata == {"source": "c"}
+    assert len(docs) == 2
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage
+from app.agents.utils import history
+
+def build_messages(turns: int):
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"pergunta {i} " + "x" * 200, id=f"h{i}"))
+        messages.append(AIMessage(content=f"resposta {i} " + "y" * 200, id=f"a{i}"))
+    messages.append(HumanMessage(content="pergunta atual", id="atual"))
+    return messages
+
+def test_short_history_is_kept_verbatim():
+    messages = build_messages(2)
+    summary, window, updates = history.build_history_context({"messages": messages})
+    assert summary == "" and updates == {}
+    assert window == messages
+
+def test_long_history_is_summarized_incrementally():
+    """
+    Turnos fora da janela viram resumo; no turno seguinte apenas o novo excedente é consolidado.
+    """
+    messages = build_messages(40)
+    with patch.object(history, "_summarize", return_value="resumo 1") as summarize:
+        summary, window, updates = history.build_history_context({"messages": messages})
+
+    assert summary == "resumo 1"
+    assert window[-1].id == "atual"
+    ids = [m.id for m in messages]
+    assert ids.index(updates["summarized_until"]) + 1 == ids.index(window[0].id)
+    folded = summarize.call_args.args[1]
+    assert folded[-1].id == updates["summarized_until"]
+    assert history.count_message_tokens(window) <= history.HISTORY_WINDOW_TOKENS
+
+    # Próximo turno: resumo reaproveitado, sem nova chamada ao LLM
+    state = {"messages": messages + [AIMessage(content="ok", id="r"), HumanMessage(content="nova", id="n")], **updates}
+    with patch.object(history, "_summarize") as summarize:
+        summary, window, new_updates = history.build_history_context(state)
+    summarize.assert_not_called()
+    assert summary == "resumo 1" and new_updates == {}
+    assert all(m.id != updates["summarized_until"] for m in window)
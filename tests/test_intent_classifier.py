@@ -0,0 +1,71 @@
+import json
+import zlib
+import numpy as np
+from app.agents.router.intent_classifier import IntentClassifier
+
+class BagOfWordsEmbeddings:
+    """Embeddings determinísticos (hash de palavras) para testes sem o modelo real."""
+    dims = 256
+
+    def embed_query(self, text: str):
+        vector = np.zeros(self.dims)
+        for word in text.lower().replace("?", "").split():
+            vector[zlib.crc32(word.encode()) % self.dims] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+def build_classifier(tmp_path, **kwargs) -> IntentClassifier:
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({
+        "knowledge_agent": ["quais as taxas da maquininha", "como funciona o link de pagamento"],
+        "support_agent": ["qual o meu saldo", "minha transferência falhou"],
+    }), encoding="utf-8")
+    embeddings = BagOfWordsEmbeddings()
+    return IntentClassifier(exemplars_path=str(path), embeddings_factory=lambda: embeddings, **kwargs)
+
+def test_confident_prediction_routes_locally(tmp_path):
+    classifier = build_classifier(tmp_path, threshold=0.6, margin=0.1)
+    prediction = classifier.predict("Quais as taxas da maquininha?")
+    assert prediction.route == "knowledge_agent"
+    assert prediction.confident
+
+def test_ambiguous_message_falls_back_to_llm(tmp_path):
+    classifier = build_classifier(tmp_path, threshold=0.6, margin=0.1)
+    prediction = classifier.predict("bom dia")
+    assert not prediction.confident
+
+def test_missing_embeddings_disables_classifier(tmp_path):
+    def broken_factory():
+        raise ImportError("sentence_transformers ausente")
+
+    classifier = IntentClassifier(exemplars_path=str(tmp_path / "intents.json"), embeddings_factory=broken_factory)
+    assert classifier.predict("qual o meu saldo") is None
+
+def test_failed_fit_is_retried(tmp_path):
+    classifier = build_classifier(tmp_path, threshold=0.6, margin=0.1, retry_backoff=0)
+    embeddings = classifier.embeddings_factory()
+    attempts = []
+
+    def flaky_factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("modelo ainda não baixado")
+        return embeddings
+
+    classifier.embeddings_factory = flaky_factory
+    assert classifier.predict("Quais as taxas da maquininha?") is None
+    assert classifier.predict("Quais as taxas da maquininha?").confident
+
+def test_negative_exemplars_defer_to_llm(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({
+        "knowledge_agent": ["quais as taxas da maquininha"],
+        "fallback": ["qual a previsão do tempo amanhã"],
+    }), encoding="utf-8")
+    embeddings = BagOfWordsEmbeddings()
+    classifier = IntentClassifier(exemplars_path=str(path), embeddings_factory=lambda: embeddings,
+                                  threshold=0.6, margin=0.1)
+    prediction = classifier.predict("Qual a previsão do tempo amanhã?")
+    assert prediction.route == "fallback" and not prediction.confident
@@ -0,0 +1,24 @@
+import asyncio
+import httpx
+from app.main import app
+from benchmarks.load_test import Sample, parse_mix, percentile, run_load, summarize
+
+def test_percentiles_and_per_route_report():
+    latencies = [i / 1000 for i in range(1, 101)]
+    assert percentile(latencies, 50) == 0.05 and percentile(latencies, 99) == 0.099
+
+    samples = [Sample("support_agent", "support_agent", 0.1, 200, None),
+               Sample("support_agent", "support_agent", 0.3, 503, "HTTP 503"),
+               Sample("fallback", "knowledge_agent", 0.2, 200, None)]
+    report = summarize(samples, elapsed=2.0, config={})
+    assert report["overall"]["requests"] == 3 and report["overall"]["route_mismatches"] == 1
+    assert report["routes"]["support_agent"]["error_rate"] == 0.5
+    assert report["routes"]["support_agent"]["errors_by_status"] == {"503": 1}
+
+def test_load_run_against_asgi_app():
+    samples, elapsed = asyncio.run(run_load(
+        "http://testserver", concurrency=4, duration=0.5, mix=parse_mix("GUARDRAIL=1,HANDOFF=1"),
+        transport=httpx.ASGITransport(app=app), seed=7
+    ))
+    assert samples and all(s.error is None for s in samples)
+    assert {s.route for s in samples} <= {"guardrail", "human_handoff"}
@@ -0,0 +1,24 @@
+from unittest.mock import patch
+from langchain_core.messages import HumanMessage
+from app.agents.utils import nodes
+
+def test_single_pass_skips_editor_llm_call():
+    """
+    No modo single_pass o Editor não chama o LLM, apenas sanitiza a resposta do especialista.
+    """
+    state = {
+        "messages": [HumanMessage(content="Qual a taxa?", id="m1")],
+        "final_response": '"Taxa de 1,99% ⚡" Fonte: inventada',
+        "next_agent": "knowledge_agent"
+    }
+    with patch.object(nodes, "PERSONALITY_MODE", "single_pass"), patch.object(nodes, "llm") as llm:
+        result = nodes.personality_node(state)
+
+    llm.invoke.assert_not_called()
+    assert result["final_response"] == "Taxa de 1,99% ⚡"
+
+def test_single_pass_adds_tone_rules_to_specialist_prompt():
+    with patch.object(nodes, "PERSONALITY_MODE", "single_pass"):
+        assert nodes.TONE_RULES in nodes.with_tone("Prompt base")
+    with patch.object(nodes, "PERSONALITY_MODE", "rewrite"):
+        assert nodes.with_tone("Prompt base") == "Prompt base"
@@ -0,0 +1,138 @@
+import time
+import asyncio
+from collections import deque
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+from langchain_groq import ChatGroq
+from app.core.resilience import CircuitBreaker, CircuitOpenError, LLMDeadlineExceeded, ResilientChatModel
+from benchmarks.stub_server import FaultProfile, StubLLMServer
+
+@pytest.fixture
+def server():
+    srv = StubLLMServer(FaultProfile(latency_ms=10, slow_ms=1500)).start()
+    yield srv
+    srv.stop()
+
+def resilient(server, **kwargs):
+    provider = ChatGroq(model_name="stub", api_key="stub", base_url=server.base_url, max_retries=0, timeout=5)
+    kwargs.setdefault("retry_backoff", 0.01)
+    return ResilientChatModel(delegate=provider, **kwargs)
+
+def test_hedged_request_beats_slow_response(server):
+    llm = resilient(server, hedge_delay=0.2)
+    server.profile.script = deque(["slow"])
+
+    start = time.monotonic()
+    response = asyncio.run(llm.ainvoke([HumanMessage(content="qual a taxa?")]))
+
+    assert time.monotonic() - start < 1.0
+    assert response.content.startswith("Resposta simulada")
+    assert server.request_count == 2
+
+def test_transient_errors_are_retried(server):
+    llm = resilient(server, max_retries=2)
+    server.profile.script = deque(["error", "error"])
+
+    assert llm.invoke([HumanMessage(content="oi")]).content.startswith("Resposta simulada")
+    assert server.request_count == 3
+
+def test_node_deadline_abandons_slow_call(server):
+    llm = resilient(server, deadline=5, node_deadlines={"router": 0.2}, max_retries=0)
+    server.profile.script = deque(["slow"])
+
+    start = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(llm.ainvoke([HumanMessage(content="oi")], config={"metadata": {"langgraph_node": "router"}}))
+    assert time.monotonic() - start < 1.0
+
+def test_circuit_opens_and_recovers(server):
+    llm = resilient(server, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    server.profile.error_rate = 1.0
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            llm.invoke([HumanMessage(content="oi")])
+    requests = server.request_count
+    with pytest.raises(CircuitOpenError):
+        llm.invoke([HumanMessage(content="oi")])
+    assert server.request_count == requests and llm.breaker.is_open()
+
+    server.profile.error_rate = 0.0
+    time.sleep(0.25)
+    assert llm.invoke([HumanMessage(content="oi")]).content
+    assert llm.breaker.state == CircuitBreaker.CLOSED
+
+class BrokenChatModel(BaseChatModel):
+    """Provedor com erro de programação (não transitório)."""
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "broken"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        raise KeyError("choices")
+
+def test_non_transient_errors_are_not_retried_nor_counted():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    llm = ResilientChatModel(delegate=BrokenChatModel(), breaker=breaker, max_retries=2, retry_backoff=0.01)
+
+    for _ in range(3):
+        with pytest.raises(KeyError):
+            llm.invoke([HumanMessage(content="oi")])
+    assert llm.delegate.calls == 3 and breaker.state == CircuitBreaker.CLOSED
+
+def test_retries_count_as_one_failure_per_request(server):
+    llm = resilient(server, max_retries=2, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30))
+    server.profile.error_rate = 1.0
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            llm.invoke([HumanMessage(content="oi")])
+    assert server.request_count == 6 and llm.breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probe_ending_in_client_error_reopens_circuit(server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    llm = resilient(server, max_retries=0, breaker=breaker)
+    server.profile.script = deque(["error"])
+    with pytest.raises(Exception):
+        llm.invoke([HumanMessage(content="oi")])
+    assert breaker.is_open()
+
+    time.sleep(0.25)
+    server.profile.error_status = 400
+    server.profile.script = deque(["error"])
+    with pytest.raises(Exception):
+        asyncio.run(llm.ainvoke([HumanMessage(content="oi")]))
+    assert breaker.state == CircuitBreaker.OPEN and breaker.is_open()
+
+    time.sleep(0.25)
+    assert llm.invoke([HumanMessage(content="oi")]).content
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_open_circuit_after_routing_returns_unstable_message(monkeypatch, use_async):
+    from langgraph.checkpoint.memory import MemorySaver
+    from app.core.config import llm_circuit
+    from app.core.workflow import build_swarm
+    from app.agents.utils.nodes import UNSTABLE_PROVIDER_MESSAGE
+
+    # O roteador passa; o circuito abre antes das chamadas do Agente de Conhecimento
+    calls = []
+    def before_call():
+        calls.append(1)
+        if len(calls) > 1:
+            raise CircuitOpenError("circuito aberto")
+        return False
+    monkeypatch.setattr(llm_circuit, "before_call", before_call)
+
+    graph = build_swarm(MemorySaver(), async_nodes=use_async)
+    payload = {"messages": [HumanMessage(content="Quais as taxas da maquininha?")], "user_id": "client_happy"}
+    config = {"configurable": {"thread_id": f"circuit-{use_async}"}}
+    state = asyncio.run(graph.ainvoke(payload, config=config)) if use_async else graph.invoke(payload, config=config)
+
+    assert state["next_agent"] == "knowledge_agent"
+    assert state["final_response"] == UNSTABLE_PROVIDER_MESSAGE
+    assert len(calls) > 1
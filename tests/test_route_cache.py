@@ -0,0 +1,22 @@
+import time
+from app.agents.router.cache import RouteCache
+
+def test_near_identical_messages_share_entry():
+    cache = RouteCache(max_entries=10, ttl=60)
+    cache.put("Qual meu saldo?", "support_agent")
+    assert cache.get("qual   MEU saldo") == "support_agent"
+    assert cache.get("Quáis as taxas?") is None
+
+def test_lru_eviction_and_ttl():
+    cache = RouteCache(max_entries=2, ttl=60)
+    cache.put("a", "knowledge_agent")
+    cache.put("b", "support_agent")
+    cache.get("a")
+    cache.put("c", "fallback")
+    assert cache.get("b") is None
+    assert cache.get("a") == "knowledge_agent" and len(cache) == 2
+
+    short = RouteCache(max_entries=2, ttl=0.05)
+    short.put("a", "knowledge_agent")
+    time.sleep(0.1)
+    assert short.get("a") is None
@@ -0,0 +1,64 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from app.agents.knowledge.cache import SemanticAnswerCache
+from test_intent_classifier import BagOfWordsEmbeddings
+
+def build_state(user_id: str, text: str, message_id: str) -> dict:
+    return {"user_id": user_id, "messages": [HumanMessage(content=text, id=message_id)]}
+
+def build_cache(version: dict, **kwargs) -> SemanticAnswerCache:
+    embeddings = BagOfWordsEmbeddings()
+    return SemanticAnswerCache(
+        embeddings_factory=lambda: embeddings, version_provider=lambda: version["value"], threshold=0.9, **kwargs
+    )
+
+def test_similar_question_reuses_answer_across_sessions():
+    cache = build_cache({"value": "v1"})
+    first = build_state("user_a", "Quais as taxas da maquininha?", "m1")
+    assert cache.lookup(first) is None
+    cache.store(first, "Taxas a partir de 0,75%.")
+
+    assert cache.lookup(build_state("user_b", "quais as taxas da maquininha", "m2")) == "Taxas a partir de 0,75%."
+    assert cache.lookup(build_state("user_b", "Como funciona o Pix?", "m3")) is None
+
+def test_discarded_turns_are_not_stored_and_size_is_bounded():
+    cache = build_cache({"value": "v1"}, max_entries=1)
+    state = build_state("user_a", "qual a taxa do débito", "m1")
+    cache.lookup(state)
+    cache.discard(state)
+    cache.store(state, "resposta com falha")
+    assert len(cache) == 0
+
+    for index, text in enumerate(["taxa do debito", "como funciona o link de pagamento"]):
+        turn = build_state("user_a", text, f"t{index}")
+        cache.lookup(turn)
+        cache.store(turn, text)
+    assert len(cache) == 1
+    assert cache.lookup(build_state("user_c", "taxa do debito", "x")) is None
+
+def test_index_rebuild_invalidates_cache():
+    version = {"value": "v1"}
+    cache = build_cache(version)
+    state = build_state("user_a", "Quais as taxas da maquininha?", "m1")
+    cache.lookup(state)
+    cache.store(state, "Taxas antigas.")
+
+    version["value"] = "v2"
+    assert cache.lookup(build_state("user_b", "Quais as taxas da maquininha?", "m2")) is None
+    assert len(cache) == 0
+
+def test_follow_up_questions_only_match_the_same_history():
+    cache = build_cache({"value": "v1"})
+
+    def follow_up(user_id: str, opening: str, message_id: str) -> dict:
+        return {"user_id": user_id, "messages": [
+            HumanMessage(content=opening, id=f"{message_id}-q"), AIMessage(content="Resposta anterior."),
+            HumanMessage(content="e no débito?", id=message_id)
+        ]}
+
+    first = follow_up("user_a", "Quais as taxas da maquininha?", "m1")
+    assert cache.lookup(first) is None
+    cache.store(first, "No débito, 1,37%.")
+
+    assert cache.lookup(follow_up("user_b", "Quais as taxas do link de pagamento?", "m2")) is None
+    assert cache.lookup(build_state("user_b", "e no débito?", "m3")) is None
+    assert cache.lookup(follow_up("user_c", "Quais as taxas da maquininha?", "m4")) == "No débito, 1,37%."
@@ -0,0 +1,38 @@
+from unittest.mock import patch
+from langchain_core.messages import HumanMessage
+from prometheus_client import REGISTRY
+from app.agents.utils.tools import run_tool_calls
+from app.agents.knowledge.node import TOOLS
+from app.core import speculation
+from app.core.speculation import SpeculativeRetriever, speculation_key
+
+def outcome_count(outcome: str) -> float:
+    return REGISTRY.get_sample_value("swarm_speculative_retrievals_total", {"outcome": outcome}) or 0.0
+
+def build_state(text: str) -> dict:
+    return {"user_id": "spec_user", "messages": [HumanMessage(content=text, id="m1")]}
+
+def test_prefetched_retrieval_replaces_rag_tool_call():
+    retriever = SpeculativeRetriever(retrieve=lambda query: f"contexto antecipado: {query}")
+    state = build_state("Quais as taxas?")
+    retriever.start(speculation_key(state), "Quais as taxas?")
+
+    prefetched = {"search_infinitepay_knowledge": retriever.claim(speculation_key(state))}
+    calls = [{"name": "search_infinitepay_knowledge", "args": {"query": "taxas da maquininha"}}]
+    results = run_tool_calls(calls, TOOLS, prefetched=prefetched)
+
+    assert results[0].output == "contexto antecipado: Quais as taxas?"
+    assert prefetched == {}
+    assert retriever.claim(speculation_key(state)) is None
+
+def test_speculation_discarded_for_other_routes():
+    retriever = SpeculativeRetriever(retrieve=lambda query: "contexto")
+    state = build_state("Qual meu saldo?")
+    before = outcome_count("wasted_route")
+
+    with patch.object(speculation, "speculative_retriever", retriever), patch.object(speculation, "SPECULATIVE_RAG", True):
+        speculation.start_speculation(state)
+        speculation.resolve_speculation(state, "support_agent")
+
+    assert outcome_count("wasted_route") == before + 1
+    assert retriever.claim(speculation_key(state)) is None
@@ -0,0 +1,35 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from app.core.token_budget import TokenLedger
+from app.main import app
+
+client = TestClient(app)
+
+def test_ledger_prefers_provider_usage():
+    ledger = TokenLedger(budget=100)
+    for usage in ({"input_tokens": 40, "output_tokens": 10, "total_tokens": 50}, None):
+        run_id = uuid4()
+        ledger.on_chat_model_start({}, [[HumanMessage(content="oi")]], run_id=run_id, metadata={"langgraph_node": "router"})
+        message = AIMessage(content="resposta", usage_metadata=usage)
+        ledger.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+    assert ledger.llm_calls == 2
+    assert ledger.prompt_tokens > 40 and ledger.completion_tokens > 10
+    assert ledger.by_node["router"] == ledger.total_tokens
+    assert ledger.remaining() == 100 - ledger.total_tokens
+
+def test_budget_degrades_instead_of_exceeding():
+    payload = {"message": "Quanto tenho na conta?", "user_id": "client_happy"}
+    usage = client.post("/api/chat", json=payload).json()["usage"]
+    assert usage["budget"] is None and usage["degraded"] == []
+    assert "personality" in usage["by_node"]
+
+    budget = usage["total_tokens"] - usage["by_node"]["personality"] + 10
+    limited = client.post("/api/chat", json=dict(payload, token_budget=budget)).json()["usage"]
+    assert "skip_personality" in limited["degraded"]
+    assert limited["total_tokens"] <= budget
+
+    totals = client.get("/api/tokens").json()["top_users"]
+    assert any(u["user_id"] == "client_happy" and u["requests"] >= 2 for u in totals)
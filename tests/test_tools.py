@@ -0,0 +1,48 @@
+import time
+import asyncio
+from langchain_core.tools import tool
+from app.agents.utils.tools import run_tool_calls, arun_tool_calls
+
+@tool
+def slow_a(query: str) -> str:
+    """Ferramenta lenta A."""
+    time.sleep(0.3)
+    return f"a:{query}"
+
+@tool
+def slow_b(query: str) -> str:
+    """Ferramenta lenta B."""
+    time.sleep(0.3)
+    return f"b:{query}"
+
+@tool
+def stuck(query: str) -> str:
+    """Ferramenta que excede o timeout."""
+    time.sleep(1.0)
+    return "tarde demais"
+
+TOOLS = {"slow_a": slow_a, "slow_b": slow_b, "stuck": stuck}
+CALLS = [
+    {"name": "slow_b", "args": {"query": "1"}},
+    {"name": "slow_a", "args": {"query": "2"}},
+]
+
+def test_tool_calls_run_concurrently_preserving_order():
+    start = time.perf_counter()
+    results = run_tool_calls(CALLS, TOOLS)
+    assert time.perf_counter() - start < 0.55
+    assert [r.output for r in results] == ["b:1", "a:2"]
+
+    start = time.perf_counter()
+    results = asyncio.run(arun_tool_calls(CALLS, TOOLS))
+    assert time.perf_counter() - start < 0.55
+    assert [r.output for r in results] == ["b:1", "a:2"]
+
+def test_tool_call_timeout_keeps_other_results():
+    calls = [{"name": "stuck", "args": {"query": "x"}}] + CALLS
+    for results in (
+        run_tool_calls(calls, TOOLS, timeout=0.5),
+        asyncio.run(arun_tool_calls(calls, TOOLS, timeout=5, deadline=0.5)),
+    ):
+        assert results[0].output is None and "Tempo limite" in results[0].error
+        assert [r.output for r in results[1:]] == ["b:1", "a:2"]
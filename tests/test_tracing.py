@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+from app.core.tracing import Span, _assign_lanes
+from app.main import app
+
+client = TestClient(app)
+
+def _span(span_id, parent_id, start, end):
+    span = Span(span_id, parent_id, span_id, "tool", start)
+    span.end = end
+    return span
+
+def test_concurrent_siblings_get_separate_lanes():
+    spans = [
+        _span("node", None, 0.0, 10.0),
+        _span("tool_a", "node", 1.0, 5.0),
+        _span("tool_b", "node", 2.0, 6.0),
+        _span("llm", "node", 7.0, 9.0)
+    ]
+    lanes = _assign_lanes(spans)
+    assert lanes["node"] == lanes["tool_a"] == lanes["llm"] == 0
+    assert lanes["tool_b"] != 0
+
+def test_traced_request_exports_chrome_trace():
+    payload = {"message": "Quais as taxas da maquininha?", "user_id": "trace_user"}
+    assert "X-Trace-Id" not in client.post("/api/chat", json=payload).headers
+
+    response = client.post("/api/chat", json=payload, headers={"X-Trace": "1"})
+    trace_id = response.headers["X-Trace-Id"]
+
+    events = client.get(f"/api/traces/{trace_id}").json()["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    names = {e["name"] for e in spans}
+    assert {"queue_wait", "router", "llm"} <= names
+    llm_span = next(e for e in spans if e["cat"] == "llm")
+    assert llm_span["args"]["prompt_chars"] > 0 and "completion_tokens" in llm_span["args"]
+
+    assert trace_id in {t["trace_id"] for t in client.get("/api/traces").json()["traces"]}
+    assert client.get("/api/traces/inexistente").status_code == 404
@@ -0,0 +1,84 @@
+import os
+import time
+from app.core.vector_store import (
+    VectorStoreManager, new_build_directory, publish_index, activate_version, list_versions, read_manifest
+)
+
+def _build(root, marker):
+    version, build_dir = new_build_directory(str(root))
+    with open(os.path.join(build_dir, "chroma.sqlite3"), "w") as f:
+        f.write(marker)
+    return version, build_dir
+
+def test_blue_green_swap_reuses_one_client_per_version(tmp_path):
+    opened = []
+    manager = VectorStoreManager(root=str(tmp_path), check_interval=0, factory=lambda d: opened.append(d) or d)
+
+    v1, build_dir = _build(tmp_path, "v1")
+    publish_index(v1, build_dir, {"embedding_model": "m", "chunk_size": 1000}, root=str(tmp_path))
+    first = manager.get()
+    assert manager.get() is first and manager.version() == v1
+    assert read_manifest(v1, str(tmp_path))["chunk_size"] == 1000
+
+    # Índice em construção não é visível
+    v2, build_dir = _build(tmp_path, "v2")
+    assert manager.get() is first and list_versions(str(tmp_path)) == [v1]
+
+    publish_index(v2, build_dir, {}, root=str(tmp_path))
+    assert manager.version() == v2
+    assert manager.get().endswith(v2)
+    assert len(opened) == 2
+
+    activate_version(v1, root=str(tmp_path))
+    assert manager.get().endswith(v1)
+
+def test_publish_prunes_old_versions(tmp_path):
+    versions = []
+    for marker in ("a", "b", "c"):
+        version, build_dir = _build(tmp_path, marker)
+        publish_index(version, build_dir, {}, root=str(tmp_path), keep=2, grace=0)
+        versions.append(version)
+    assert list_versions(str(tmp_path)) == versions[1:]
+
+def test_publish_keeps_recently_active_versions(tmp_path):
+    versions = []
+    for marker in ("a", "b", "c"):
+        version, build_dir = _build(tmp_path, marker)
+        publish_index(version, build_dir, {}, root=str(tmp_path), keep=1, grace=60)
+        versions.append(version)
+
+    # Todas estiveram ativas há menos de 60s; só saem quando a espera expira
+    assert list_versions(str(tmp_path)) == versions
+    for old in versions[:2]:
+        past = time.time() - 120
+        os.utime(os.path.join(tmp_path, "versions", old), (past, past))
+    version, build_dir = _build(tmp_path, "d")
+    publish_index(version, build_dir, {}, root=str(tmp_path), keep=1, grace=60)
+    assert list_versions(str(tmp_path)) == [versions[2], version]
+
+def test_swap_releases_previous_client_after_grace(tmp_path):
+    released = []
+    manager = VectorStoreManager(root=str(tmp_path), check_interval=0, factory=lambda d: d,
+                                 retire_grace=0.05, release=released.append)
+
+    v1, build_dir = _build(tmp_path, "v1")
+    publish_index(v1, build_dir, {}, root=str(tmp_path))
+    first = manager.get()
+
+    v2, build_dir = _build(tmp_path, "v2")
+    publish_index(v2, build_dir, {}, root=str(tmp_path))
+    second = manager.get()
+    assert released == []
+
+    time.sleep(0.1)
+    manager.version()
+    assert released == [first]
+
+    # Rollback: o cliente substituído da versão reativada não é liberado
+    activate_version(v1, root=str(tmp_path))
+    assert manager.get().endswith(v1)
+    activate_version(v2, root=str(tmp_path))
+    manager.get()
+    time.sleep(0.1)
+    manager.version()
+    assert second not in released
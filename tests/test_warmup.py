@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+from app.core import warmup
+from app.core.token_budget import token_accounting
+from app.core.warmup import run_warmup, warmup_status
+from app.core.warmup_llm import WARMUP_TAG, WarmupChatModel
+from app.agents.router.cache import route_cache
+from app.agents.knowledge.cache import semantic_cache
+from app.main import app
+
+client = TestClient(app)
+
+async def _ok():
+    pass
+
+async def _broken():
+    raise RuntimeError("modelo indisponível")
+
+@pytest.fixture
+def fresh_status(monkeypatch):
+    monkeypatch.setattr(warmup_status, "ready", False)
+    monkeypatch.setattr(warmup_status, "steps", {})
+    for step in ("_warm_embeddings", "_warm_vectorstore", "_warm_intent_classifier", "_warm_graph"):
+        monkeypatch.setattr(warmup, step, _ok)
+    return monkeypatch
+
+def test_ready_only_after_warmup(fresh_status):
+    response = client.get("/ready")
+    assert response.status_code == 503 and response.json()["status"] == "warming_up"
+
+    asyncio.run(run_warmup())
+    body = client.get("/ready").json()
+    assert body["ready"] and body["status"] == "ready" and body["failed"] == []
+
+def test_failed_steps_report_degraded(fresh_status):
+    fresh_status.setattr(warmup, "_warm_vectorstore", _broken)
+    asyncio.run(run_warmup())
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded" and response.json()["failed"] == ["vectorstore"]
+    assert response.json()["steps"]["vectorstore"]["status"].startswith("error")
+
+def test_warmup_model_serves_only_the_tagged_run():
+    model = WarmupChatModel(delegate=FakeListChatModel(responses=["provedor"]),
+                            warmup=FakeListChatModel(responses=["stub"]))
+    node = RunnableLambda(lambda _: model.invoke("oi").content)
+
+    async def anode(_):
+        return (await model.ainvoke("oi")).content
+
+    assert node.invoke({}, config={"tags": [WARMUP_TAG]}) == "stub"
+    assert asyncio.run(RunnableLambda(anode).ainvoke({}, config={"tags": [WARMUP_TAG]})) == "stub"
+    assert node.invoke({}) == "provedor"
+
+def test_graph_pass_leaves_no_trace():
+    asyncio.run(warmup._warm_graph())
+
+    assert len(route_cache) == 0 and len(semantic_cache) == 0
+    assert token_accounting.snapshot()["top_users"] == []